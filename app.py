@@ -1,14 +1,23 @@
 import streamlit as st
 import os
+import json
+import logging
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 import sys
 import pathlib
 
-from src.news_fetcher import NewsFetcher 
-from src.text_extract_summarizer import ArticleSummarizer 
+from src.news_fetcher import NewsFetcher
+from src.text_extract_summarizer import ArticleSummarizer
 from src.analyze_sentiment import SentimentAnalyzer
-from src.digest_generator import DailyDigestGenerator 
+from src.digest_generator import DailyDigestGenerator
+from src.digest_store import DigestStore
+from src.cache import ContentCache
+from src.http_client import HttpClient
+from src.parse_pool import ParsePool, default_parse_workers
+from src.jobs import JobManager
+from src.ranking import RelevanceRanker
+from src.service import run_digest
 
 # Set page configuration
 st.set_page_config(
@@ -20,12 +29,195 @@ st.set_page_config(
 
 # Load environment variables
 load_dotenv()
+logging.basicConfig(level=logging.INFO, format='%(asctime)s -%(levelname)s - %(message)s')
+
+# Clients and jobs are shared by every session of this server process, so
+# reruns and other users reuse connections, prompt templates and results
+@st.cache_resource
+def get_clients():
+    cache = ContentCache()
+    client = HttpClient(host_rates={"newsapi.org": 1.0}, cache=cache)
+    return cache, client, NewsFetcher(client=client)
+
+@st.cache_resource
+def get_parse_pool():
+    # Page parsing runs in worker processes shared by every job (NEWS_PARSE_WORKERS, 0 = in-process)
+    workers = default_parse_workers()
+    return ParsePool(workers) if workers else None
+
+@st.cache_resource
+def get_summarizer(model_name: str, compress_articles: bool):
+    cache, client, _ = get_clients()
+    compressor = None
+    if compress_articles:
+        from src.extractive import ExtractiveCompressor
+        compressor = ExtractiveCompressor()
+    return ArticleSummarizer(model_name=model_name, cache=cache, client=client, compressor=compressor,
+                             overflow_model=os.getenv("GROQ_OVERFLOW_MODEL"), parser=get_parse_pool())
+
+@st.cache_resource
+def get_sentiment_analyzer(local_sentiment: bool):
+    cache, _, _ = get_clients()
+    local_classifier = None
+    if local_sentiment:
+        from src.local_sentiment import LexiconSentimentClassifier
+        local_classifier = LexiconSentimentClassifier()
+    return SentimentAnalyzer(model_name="llama3-8b-8192", cache=cache, local_classifier=local_classifier)
+
+@st.cache_resource
+def get_store():
+    # Every generated digest is kept, so past digests and trends need no LLM calls
+    return DigestStore()
+
+@st.cache_resource
+def get_job_manager():
+    # Digests for the same settings are reused for NEWS_DIGEST_RESULT_TTL seconds
+    return JobManager(
+        max_workers=int(os.getenv("NEWS_DIGEST_JOB_WORKERS", "2")),
+        ttl_seconds=float(os.getenv("NEWS_DIGEST_RESULT_TTL", "1800"))
+    )
+
+@st.fragment(run_every=0.5)
+def show_progress(job_id: str):
+    """Poll the background job; summaries and finished cards appear as they arrive"""
+    job = get_job_manager().get(job_id)
+    if job is None or not job.active:
+        # Done (or expired): rerun the whole page to show the results
+        st.rerun()
+    snapshot = job.snapshot()
+    state = snapshot["state"]
+
+    total = state.get("total") or 0
+    st.progress(state.get("done", 0) / total if total else 0.0)
+    st.text(state.get("message", "Waiting for a free worker..." if snapshot["status"] == "queued" else ""))
+
+    if state.get("digest"):
+        st.text(state["digest"])
+    for i, title in enumerate(state.get("titles", [])):
+        article = snapshot["items"].get(i)
+        if article is not None:
+            st.markdown(
+                f"**{article['title']}** ({article['sentiment']})  \n"
+                f"*{article['source']}*\n\n{article['summary']}"
+            )
+        elif i in snapshot["streams"]:
+            st.markdown(f"**{title}** ✍️\n\n{snapshot['streams'][i]}▌")
+
+def show_results(result: dict):
+    topic = result["topic"]
+    digest = result["digest"]
+    processed_articles = result["articles"]
+
+    # Display results
+    st.success("Digest generated successfully!")
+    cache_stats = result["cache_stats"]
+    if cache_stats:
+        st.caption("Cache: " + ", ".join(
+            f"{ns} {counts['hits']}/{counts['hits'] + counts['misses']} hits"
+            for ns, counts in cache_stats.items()
+        ))
+
+    # Create tabs for different views
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["Digest", "Individual Articles", "Sentiment Analysis", "Timing", "Trends"])
+
+    with tab1:
+        st.subheader(f"Daily Digest: {topic}")
+        st.text(digest)
+
+        # Download buttons; other formats are rendered from the stored digest
+        date_str = datetime.now(timezone.utc).strftime('%Y%m%d')
+        st.download_button(
+            label="Download Digest as TXT",
+            data=digest,
+            file_name=f"news_digest_{date_str}.txt",
+            mime="text/plain"
+        )
+        for fmt, label, mime in (("md", "Markdown", "text/markdown"), ("html", "HTML", "text/html"),
+                                 ("json", "JSON", "application/json")):
+            st.download_button(
+                label=f"Download Digest as {label}",
+                data=DailyDigestGenerator.from_store(get_store(), digest_id=result["digest_id"], fmt=fmt),
+                file_name=f"news_digest_{date_str}.{fmt}",
+                mime=mime
+            )
+
+    with tab2:
+        for i, article in enumerate(processed_articles, 1):
+            with st.expander(f"Article {i}: {article['title']}"):
+                st.markdown(f"**Source:** {article['source']}")
+                st.markdown(f"**Sentiment:** {article['sentiment']}")
+                st.markdown(f"**URL:** {article['url']}")
+                if article.get('also_reported_by'):
+                    st.markdown("**Also reported by:** " + ", ".join(
+                        f"[{other['source']}]({other['url']})" for other in article['also_reported_by']
+                    ))
+                st.markdown("**Summary:**")
+                if article.get('title_mismatch'):
+                    st.warning("This summary shares few words with the headline; the page may be about another story.")
+                st.write(article['summary'])
+
+    with tab3:
+        # Sentiment analysis visualization
+        sentiment_counts = {
+            "POSITIVE": 0,
+            "NEGATIVE": 0,
+            "NEUTRAL": 0
+        }
+
+        for article in processed_articles:
+            sentiment_counts[article['sentiment']] += 1
+
+        # Display sentiment distribution
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Positive", sentiment_counts["POSITIVE"],
+                     delta=None, delta_color="normal")
+        with col2:
+            st.metric("Neutral", sentiment_counts["NEUTRAL"],
+                     delta=None, delta_color="off")
+        with col3:
+            st.metric("Negative", sentiment_counts["NEGATIVE"],
+                     delta=None, delta_color="inverse")
+
+        # Simple bar chart
+        st.bar_chart(sentiment_counts)
+
+    with tab4:
+        # Where the time went: scraping vs inference
+        report = result["report"]
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Wall time", f"{report['wall_seconds']:.1f}s")
+        col2.metric("LLM tokens", sum(
+            usage["prompt_tokens"] + usage["completion_tokens"] for usage in report["tokens"].values()
+        ))
+        col3.metric("Estimated cost", f"${report['total_cost_usd']:.4f}")
+        st.dataframe(
+            [{"stage": stage, **entry} for stage, entry in report["stages"].items()],
+            use_container_width=True
+        )
+        st.bar_chart({stage: entry["total_seconds"] for stage, entry in report["stages"].items()})
+        st.download_button(
+            label="Download run report (JSON)",
+            data=json.dumps(report, indent=2),
+            file_name=f"run_report_{report['run_id']}.json",
+            mime="application/json"
+        )
+
+    with tab5:
+        # Sentiment of this topic's stored digests, one bar per day
+        trend = get_store().sentiment_trend(topic, days=14)
+        st.caption(f"{sum(day['articles'] for day in trend)} articles about '{topic}' in the last 14 days")
+        st.bar_chart(
+            {label.title(): [day[label] for day in trend] for label in ("POSITIVE", "NEUTRAL", "NEGATIVE")}
+            | {"day": [day["day"] for day in trend]},
+            x="day"
+        )
 
 def main():
     # App title and description
     st.title("📰 AI-Powered News Digest Generator")
     st.markdown("""
-    This application automatically fetches news articles on your chosen topic, 
+    This application automatically fetches news articles on your chosen topic,
     summarizes key insights, analyzes sentiment, and generates a concise daily digest.
     """)
 
@@ -34,15 +226,15 @@ def main():
         st.header("Configuration")
 
         # User inputs
-        topic = st.text_input("Topic/Query", "AI Startups", 
+        topic = st.text_input("Topic/Query", "AI Startups",
                              help="Enter the topic you want news about (e.g., 'AI startups', 'quantum computing')")
-        
-        num_articles = st.slider("Number of Articles", 1, 10, 5, 
+
+        num_articles = st.slider("Number of Articles", 1, 10, 5,
                                 help="How many articles would you like to include in your digest?")
-        
-        days_back = st.slider("Days Back", 1, 7, 1, 
+
+        days_back = st.slider("Days Back", 1, 7, 1,
                              help="How many days back should we search for news?")
-        
+
         # Model selection
         model_name = st.selectbox(
             "LLM Model for Summarization",
@@ -51,6 +243,16 @@ def main():
             help="Select the language model for summarization (larger models are more accurate but slower)"
         )
 
+        compress_articles = st.checkbox(
+            "Pre-compress long articles", value=False,
+            help="Send only the most central sentences of long articles to the summarizer (faster, fewer tokens)"
+        )
+
+        local_sentiment = st.checkbox(
+            "Classify clear-cut sentiment locally", value=False,
+            help="A fast on-device classifier labels obvious cases; only uncertain summaries are sent to the LLM"
+        )
+
         # Generate button
         generate_btn = st.button("Generate Digest", type="primary")
 
@@ -59,117 +261,29 @@ def main():
         if not os.getenv("NEWSAPI_KEY") or not os.getenv("GROQ_API_KEY"):
             st.error("Please ensure NEWSAPI_KEY and GROQ_API_KEY are set in your .env file")
             return
-        
-        # Initialize components with progress indicators
-        with st.spinner("Initializing components..."):
-            fetcher = NewsFetcher()
-            summarizer = ArticleSummarizer(model_name=model_name)
-            sentiment_analyzer = SentimentAnalyzer(model_name="llama3-8b-8192")
-            digest_generator = DailyDigestGenerator(topic)
-
-        # Fetch articles
-        with st.spinner(f"Fetching {num_articles} articles about '{topic}'..."):
-            raw_articles = fetcher.fetch_articles(
-                query=topic, 
-                num_articles=num_articles, 
-                days_back=days_back
-            )
 
-            if not raw_articles:
-                st.error("No articles found. Please try a different topic or check your API keys.")
-                return
-            
-        # Process articles
-        processed_articles = []
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        for i, article in enumerate(raw_articles):
-            status_text.text(f"Processing article {i+1}/{len(raw_articles)}: {article['title'][:50]}...")
-
-            # Summarize
-            summary = summarizer.summarize(article)
-            
-            # Analyze sentiment
-            sentiment = sentiment_analyzer.analyze(summary)
-            
-            processed_articles.append({
-                "title": article['title'],
-                "source": article['source'],
-                "url": article['url'],
-                "summary": summary,
-                "sentiment": sentiment
-            })
-
-            progress_bar.progress((i + 1) / len(raw_articles))
-        
-        status_text.text("Generating final digest...")
-        
-        # Generate digest
-        digest = digest_generator.generate(processed_articles)
-        
-        # Display results
-        st.success("Digest generated successfully!")
-
-        # Create tabs for different views
-        tab1, tab2, tab3 = st.tabs(["Digest", "Individual Articles", "Sentiment Analysis"])
-        
-        with tab1:
-            st.subheader(f"Daily Digest: {topic}")
-            st.text(digest)
-            
-            # Download button
-            st.download_button(
-                label="Download Digest as TXT",
-                data=digest,
-                file_name=f"news_digest_{datetime.now(timezone.utc).strftime('%Y%m%d')}.txt",
-                mime="text/plain"
-            )
+        # Same settings within the TTL reuse the running or finished job
+        key = (" ".join(topic.lower().split()), days_back, num_articles, model_name,
+               compress_articles, local_sentiment)
+        cache, _, fetcher = get_clients()
+        job = get_job_manager().submit(
+            key, run_digest, topic, num_articles, days_back, fetcher,
+            get_summarizer(model_name, compress_articles), get_sentiment_analyzer(local_sentiment), cache,
+            get_store(), ranker=RelevanceRanker()
+        )
+        st.session_state["job_id"] = job.id
 
-        with tab2:
-            for i, article in enumerate(processed_articles, 1):
-                with st.expander(f"Article {i}: {article['title']}"):
-                    st.markdown(f"**Source:** {article['source']}")
-                    st.markdown(f"**Sentiment:** {article['sentiment']}")
-                    st.markdown(f"**URL:** {article['url']}")
-                    st.markdown("**Summary:**")
-                    st.write(article['summary'])
-
-        with tab3:
-            # Sentiment analysis visualization
-            sentiment_counts = {
-                "POSITIVE": 0,
-                "NEGATIVE": 0, 
-                "NEUTRAL": 0
-            }
-            
-            for article in processed_articles:
-                sentiment_counts[article['sentiment']] += 1
-            
-            # Display sentiment distribution
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Positive", sentiment_counts["POSITIVE"], 
-                         delta=None, delta_color="normal")
-            with col2:
-                st.metric("Neutral", sentiment_counts["NEUTRAL"], 
-                         delta=None, delta_color="off")
-            with col3:
-                st.metric("Negative", sentiment_counts["NEGATIVE"], 
-                         delta=None, delta_color="inverse")
-            
-            # Simple bar chart
-            st.bar_chart(sentiment_counts)
-
-        # Clear progress indicators
-        progress_bar.empty()
-        status_text.empty()
+    # The job keeps running across reruns; this session just watches it
+    job_id = st.session_state.get("job_id")
+    job = get_job_manager().get(job_id) if job_id else None
+    if job is None:
+        return
+    if job.active:
+        show_progress(job.id)
+    elif job.status == "failed":
+        st.error(job.error)
+    else:
+        show_results(job.result)
 
 if __name__ == "__main__":
     main()
-
-
-        
-            
-
-        
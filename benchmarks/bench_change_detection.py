@@ -0,0 +1,124 @@
+"""LLM calls spent on articles that come back after their pages were edited.
+
+`--articles` fixture articles are digested once, then their pages are edited
+before a second run: a third stay as they were, a third get one paragraph
+rewritten (a typo fix or a changed figure), and a third get
+`--major-share` of their paragraphs rewritten. The second run is measured
+three ways:
+
+- rerun: no cache, every article is summarized from scratch;
+- cache: the default cache, which never notices the edits, so every edited
+  article keeps a stale summary;
+- changes: `--change-threshold`, which keeps the summaries of unchanged and
+  slightly edited articles and updates the rest from their changed paragraphs.
+
+Run from the repository root:
+    python -m benchmarks.bench_change_detection
+    python -m benchmarks.bench_change_detection --articles 30 --change-threshold 0.1
+"""
+import os
+import re
+import time
+import random
+import argparse
+import tempfile
+
+from benchmarks.fake_services import FixtureServer, BenchChatModel
+from src import instrumentation
+from src.analyze_sentiment import SentimentAnalyzer
+from src.cache import ContentCache
+from src.http_client import HttpClient
+from src.pipeline import ArticlePipeline
+from src.text_extract_summarizer import ArticleSummarizer, FullTextExtractor
+
+PARAGRAPH_RE = re.compile(rb"<p>(.*?)</p>")
+EDITS = ("unchanged", "minor", "major")
+
+
+def edit_page(page: bytes, share: float, rng: random.Random) -> bytes:
+    """`page` with `share` of its article paragraphs (at least one) rewritten"""
+    text = FullTextExtractor.parse_html(page)
+    matches = [m for m in PARAGRAPH_RE.finditer(page) if m.group(1).decode() in text]
+    chosen = set(rng.sample(range(len(matches)), max(1, round(len(matches) * share))))
+    parts, position = [], 0
+    for i, match in enumerate(matches):
+        if i in chosen:
+            words = match.group(1).split()
+            rng.shuffle(words)
+            parts += [page[position:match.start(1)], b"Updated: " + b" ".join(words)]
+            position = match.end(1)
+    parts.append(page[position:])
+    return b"".join(parts)
+
+
+def story_of(article: dict) -> str:
+    return article["url"].rsplit("/", 1)[-1]
+
+
+def run(server: FixtureServer, articles: list, edited: dict, major: set, cache_path: str, llm,
+        threshold: float = None):
+    """(seconds, LLM calls, prompt tokens, stale summaries) of the second run; the first run is not measured.
+
+    A summary is stale when an article in `major` kept its first-run summary.
+    """
+    cache = ContentCache(cache_path) if cache_path else None
+    client = HttpClient(cache=cache)
+    summarizer = ArticleSummarizer(cache=cache, client=client, llm=llm, change_threshold=threshold)
+    pipeline = ArticlePipeline(summarizer, SentimentAnalyzer(model_name="llama3-8b-8192", cache=cache, llm=llm))
+    originals = {story: server.page(story) for story in edited}
+    before = [None] * len(articles)
+    try:
+        if cache:
+            before = [result["summary"] for result in pipeline.run(articles)]
+        for story, page in edited.items():
+            server.set_page(story, page)
+        recorder = instrumentation.start_run()
+        start = time.perf_counter()
+        results = pipeline.run(articles)
+        seconds = time.perf_counter() - start
+    finally:
+        for story, page in originals.items():
+            server.set_page(story, page)
+        if cache:
+            cache.close()
+    usage = recorder.report()["tokens"].values()
+    stale = sum(
+        1 for article, summary, result in zip(articles, before, results)
+        if story_of(article) in major and summary == result["summary"]
+    )
+    return seconds, sum(u["calls"] for u in usage), sum(u["prompt_tokens"] for u in usage), stale
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-summarization of edited articles with and without change detection")
+    parser.add_argument("--articles", type=int, default=12)
+    parser.add_argument("--change-threshold", type=float, default=0.2)
+    parser.add_argument("--major-share", type=float, default=0.5, help="Share of paragraphs rewritten in major edits")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per fake LLM call")
+    args = parser.parse_args(argv)
+
+    llm = BenchChatModel(latency=args.llm_latency, jitter=0.0)
+    rng = random.Random(0)
+    with FixtureServer() as server, tempfile.TemporaryDirectory() as tmp:
+        articles = server.newsapi_page({"q": "Edited Stories", "pageSize": args.articles})["articles"]
+        kinds = [EDITS[i % len(EDITS)] for i in range(len(articles))]
+        edited = {
+            story_of(article): edit_page(server.page(story_of(article)), args.major_share if kind == "major" else 0.0, rng)
+            for article, kind in zip(articles, kinds) if kind != "unchanged"
+        }
+        major = {story_of(article) for article, kind in zip(articles, kinds) if kind == "major"}
+
+        print(f"{len(articles)} articles: {kinds.count('unchanged')} unchanged, {kinds.count('minor')} with one "
+              f"paragraph rewritten, {kinds.count('major')} with {args.major_share:.0%} rewritten\n")
+        print(f"{'second run':<12}{'seconds':>9}{'LLM calls':>11}{'prompt tokens':>15}{'stale':>7}")
+        for name, cache_path, threshold in (
+            ("rerun", None, None),
+            ("cache", os.path.join(tmp, "cache.sqlite"), None),
+            ("changes", os.path.join(tmp, "changes.sqlite"), args.change_threshold),
+        ):
+            seconds, calls, tokens, stale = run(server, articles, edited, major, cache_path, llm, threshold)
+            print(f"{name:<12}{seconds:>9.2f}{calls:>11}{tokens:>15}{stale:>7}")
+
+
+if __name__ == "__main__":
+    main()
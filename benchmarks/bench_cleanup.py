@@ -0,0 +1,113 @@
+"""Per-article CPU time of text assembly and cleanup, before and after the
+single-pass cleanup stage in src/text_cleaning.py.
+
+Run from the repository root:
+    python -m benchmarks.bench_cleanup
+"""
+import re
+import time
+import random
+
+from benchmarks.fixtures import WORDS
+from src import text_cleaning
+
+BOILERPLATE_LINES = [
+    "Advertisement",
+    "Sign up for our daily newsletters",
+    "Read more: another story about startups",
+    "Follow us on social media",
+    "Recommended for you",
+    "© Copyright 2025 Example News",
+]
+
+
+def legacy_assemble(blocks: list[tuple[str, str]]) -> str:
+    """Previous extract_text assembly: repeated string concatenation and two regex passes"""
+    text = ""
+    for tag, content in blocks:
+        if tag == 'p':
+            text += content.strip() + "\n\n"
+        elif tag == 'blockquote':
+            text += f"> {content.strip()}\n\n"
+        else:
+            text += f"\n\n{content.strip().upper()}\n\n"
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = re.sub(r'\[\+[0-9,]+\s*chars?\]', '', text)
+    return text.strip()
+
+
+LEGACY_PATTERNS = [
+    r"Sign up for.*newsletters",
+    r"Subscribe to.*channel",
+    r"Follow us on.*",
+    r"Download our.*app",
+    r"Read more:.*",
+    r"Continue reading.*",
+    r"Advertisement",
+    r"Recommended for you",
+    r"Related:.*",
+    r"Please enter your email",
+    r"Already have an account\? Log in",
+    r"Create a free account",
+    r"© Copyright.*"
+]
+
+
+def legacy_preprocess(text: str) -> str:
+    """Previous ArticleSummarizer.preprocess_text: one re.sub pass per pattern"""
+    for pattern in LEGACY_PATTERNS:
+        text = re.sub(pattern, "", text, flags=re.IGNORECASE)
+    return text.strip()
+
+
+def assemble(blocks: list[tuple[str, str]]) -> str:
+    parts = []
+    for tag, content in blocks:
+        if tag == 'p':
+            parts.append(content.strip() + "\n\n")
+        elif tag == 'blockquote':
+            parts.append(f"> {content.strip()}\n\n")
+        else:
+            parts.append(f"\n\n{content.strip().upper()}\n\n")
+    return text_cleaning.join_blocks(parts)
+
+
+def make_blocks(paragraphs: int, seed: int = 7) -> list[tuple[str, str]]:
+    rng = random.Random(seed)
+    blocks = []
+    for i in range(paragraphs):
+        if i % 15 == 0:
+            blocks.append(("h2", " ".join(rng.choice(WORDS) for _ in range(8))))
+        sentences = [" ".join(rng.choice(WORDS) for _ in range(18)).capitalize() + "." for _ in range(5)]
+        if i % 6 == 0:
+            sentences.append(rng.choice(BOILERPLATE_LINES))
+        blocks.append(("p", " ".join(sentences)))
+    return blocks
+
+
+def cpu_time(func, *args, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        func(*args)
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def main():
+    before = lambda blocks: legacy_preprocess(legacy_assemble(blocks))
+    after = lambda blocks: text_cleaning.clean_text(assemble(blocks))
+
+    print(f"{'paragraphs':>10}{'KiB':>8}{'before ms':>11}{'after ms':>10}{'speedup':>9}  same text")
+    for paragraphs in (50, 500, 2000, 8000):
+        blocks = make_blocks(paragraphs)
+        size = sum(len(content) for _, content in blocks) // 1024
+        before_s = cpu_time(before, blocks)
+        after_s = cpu_time(after, blocks)
+        same = before(blocks) == after(blocks)
+        print(f"{paragraphs:>10}{size:>8}{before_s * 1000:>11.2f}{after_s * 1000:>10.2f}"
+              f"{before_s / after_s:>8.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Input size, latency and summary quality with and without the extractive
+pre-pass in src/extractive.py.
+
+For each article the full cleaned text and its compressed version are both
+summarized. Quality is reported as ROUGE-1 and ROUGE-L F1 of the compressed-
+input summary against the full-input summary, plus how many of the full
+summary's facts (numbers and proper names) survive. Without GROQ_API_KEY, or
+with --offline, the fake benchmark model is used and only the token and
+latency columns are meaningful.
+
+Run from the repository root:
+    python -m benchmarks.bench_compression
+    python -m benchmarks.bench_compression --articles saved/*.txt --budget 800
+"""
+import os
+import re
+import glob
+import time
+import argparse
+
+from dotenv import load_dotenv
+
+from benchmarks.fixtures import ensure_html_fixtures
+from benchmarks.fake_services import BenchChatModel
+from src import instrumentation
+from src.extractive import ExtractiveCompressor
+from src.model_limits import estimate_tokens
+from src.text_extract_summarizer import ArticleSummarizer, FullTextExtractor
+
+FACT_RE = re.compile(r"\b(?:\d[\d,.]*%?|[A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)*)\b")
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def rouge_1(candidate: str, reference: str) -> float:
+    cand, ref = WORD_RE.findall(candidate.lower()), WORD_RE.findall(reference.lower())
+    if not cand or not ref:
+        return 0.0
+    counts = {}
+    for word in ref:
+        counts[word] = counts.get(word, 0) + 1
+    overlap = 0
+    for word in cand:
+        if counts.get(word):
+            counts[word] -= 1
+            overlap += 1
+    precision, recall = overlap / len(cand), overlap / len(ref)
+    return 2 * precision * recall / (precision + recall) if overlap else 0.0
+
+
+def rouge_l(candidate: str, reference: str) -> float:
+    cand, ref = WORD_RE.findall(candidate.lower()), WORD_RE.findall(reference.lower())
+    if not cand or not ref:
+        return 0.0
+    previous = [0] * (len(ref) + 1)
+    for word in cand:
+        current = [0]
+        for j, ref_word in enumerate(ref, 1):
+            current.append(previous[j - 1] + 1 if word == ref_word else max(previous[j], current[j - 1]))
+        previous = current
+    lcs = previous[-1]
+    precision, recall = lcs / len(cand), lcs / len(ref)
+    return 2 * precision * recall / (precision + recall) if lcs else 0.0
+
+
+def fact_recall(candidate: str, reference: str) -> float:
+    """Share of the reference's numbers and proper names that the candidate mentions"""
+    facts = {fact.lower() for fact in FACT_RE.findall(reference) if len(fact) > 2}
+    if not facts:
+        return 1.0
+    text = candidate.lower()
+    return sum(fact in text for fact in facts) / len(facts)
+
+
+def load_articles(patterns: list[str]) -> dict[str, str]:
+    """name -> cleaned article text, from .txt/.html files (default: benchmark fixtures)"""
+    paths = sorted({path for pattern in patterns for path in glob.glob(pattern)}) if patterns \
+        else ensure_html_fixtures()
+    articles = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            raw = f.read()
+        text = FullTextExtractor.parse_html(raw) if path.endswith((".html", ".htm")) else raw
+        articles[os.path.basename(path)] = text
+    return articles
+
+
+def timed_summary(summarizer: ArticleSummarizer, text: str) -> tuple[str, float, int]:
+    """(summary, seconds, prompt tokens) for one uncached summarization"""
+    recorder = instrumentation.start_run()
+    start = time.perf_counter()
+    summary = summarizer.summarize_text(text)
+    seconds = time.perf_counter() - start
+    tokens = sum(usage["prompt_tokens"] for usage in recorder.report()["tokens"].values())
+    return summary, seconds, tokens
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare summaries with and without extractive pre-compression")
+    parser.add_argument("--articles", nargs="*", help="Article .txt/.html files or globs (default: fixtures)")
+    parser.add_argument("--budget", type=int, default=1200, help="Token budget of the compressed text")
+    parser.add_argument("--method", choices=("textrank", "tfidf"), default="textrank")
+    parser.add_argument("--model", default="llama3-70b-8192")
+    parser.add_argument("--offline", action="store_true", help="Use the fake model even if GROQ_API_KEY is set")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    live = bool(os.getenv("GROQ_API_KEY")) and not args.offline
+    llm = None if live else BenchChatModel(latency=0.3, jitter=0.0)
+    full = ArticleSummarizer(model_name=args.model, llm=llm)
+    compressor = ExtractiveCompressor(max_tokens=args.budget, method=args.method)
+    compressed = ArticleSummarizer(model_name=args.model, llm=llm, compressor=compressor)
+    if not live:
+        print("GROQ_API_KEY not set or --offline: quality columns compare fake summaries\n")
+
+    print(f"{'article':<24}{'in tok':>8}{'cmp tok':>8}{'cmp ms':>8}{'full s':>8}{'cmp s':>7}"
+          f"{'prompt tok':>12}{'R-1':>6}{'R-L':>6}{'facts':>7}")
+    for name, text in load_articles(args.articles).items():
+        start = time.perf_counter()
+        reduced = compressor.compress(text)
+        compress_ms = (time.perf_counter() - start) * 1000
+
+        full_summary, full_seconds, full_tokens = timed_summary(full, text)
+        short_summary, short_seconds, short_tokens = timed_summary(compressed, text)
+        print(f"{name[:23]:<24}{estimate_tokens(text):>8}{estimate_tokens(reduced):>8}{compress_ms:>8.1f}"
+              f"{full_seconds:>8.2f}{short_seconds:>7.2f}{f'{full_tokens}->{short_tokens}':>12}"
+              f"{rouge_1(short_summary, full_summary):>6.2f}{rouge_l(short_summary, full_summary):>6.2f}"
+              f"{fact_recall(short_summary, full_summary):>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
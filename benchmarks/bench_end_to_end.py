@@ -0,0 +1,181 @@
+"""End-to-end throughput and per-stage latency of `main.main`, fully offline.
+
+NewsAPI and the article sites are served by a local FixtureServer and Groq is
+replaced by BenchChatModel, so the numbers reflect the pipeline's own
+concurrency, rate limiting and CPU work. Every run is appended to
+`benchmarks/results/end_to_end.jsonl` with the current commit, and compared
+with the previous run of the same configuration to catch regressions.
+
+Run from the repository root:
+    python -m benchmarks.bench_end_to_end
+    python -m benchmarks.bench_end_to_end --topics "AI Startups" "Chip Industry" --num-articles 10
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import contextlib
+from unittest import mock
+from datetime import datetime, timezone
+
+from benchmarks.fake_services import FixtureServer, BenchChatModel
+
+RESULTS_PATH = os.path.join(os.path.dirname(__file__), "results", "end_to_end.jsonl")
+
+# Stages compared against the previous run
+TRACKED_STAGES = ("fetch_articles", "extract_text", "summarize_chunk", "analyze", "generate")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_once(args) -> dict:
+    """One cold run of the CLI against the fixture server; returns its run report"""
+    import main
+
+    llm = BenchChatModel(
+        latency=args.llm_latency, jitter=args.llm_latency / 4,
+        requests_per_minute=args.llm_rpm,
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        # A fresh cache per run, so every article is scraped and summarized; the digest
+        # store is kept in the temp dir too, so fixture digests never reach the real history
+        env = {"NEWS_DIGEST_CACHE": os.path.join(tmp, "cache.sqlite"),
+               "NEWS_DIGEST_STORE": os.path.join(tmp, "digests.sqlite")}
+        argv = ["--topics", *args.topics, "--num-articles", str(args.num_articles),
+                "--output-dir", tmp]
+        start = time.perf_counter()
+        with mock.patch.dict(os.environ, env), contextlib.redirect_stdout(open(os.devnull, "w")):
+            report = main.main(argv, llm=llm)
+        report["wall_seconds"] = round(time.perf_counter() - start, 3)
+        report["articles"] = report["stages"].get("extract_text", {}).get("count", 0)
+        report["throttled_seconds"] = round(llm.throttled_seconds, 3)
+    return report
+
+
+def summarize(reports: list[dict]) -> dict:
+    """Median over repeats of throughput and per-stage p50/p95"""
+    def median(values):
+        values = sorted(values)
+        return values[len(values) // 2] if values else 0.0
+
+    result = {
+        "wall_seconds": median([r["wall_seconds"] for r in reports]),
+        "articles": median([r["articles"] for r in reports]),
+        "throttled_seconds": median([r["throttled_seconds"] for r in reports]),
+        "stages": {},
+    }
+    result["articles_per_minute"] = round(result["articles"] / result["wall_seconds"] * 60, 1)
+    stage_names = {stage for r in reports for stage in r["stages"]}
+    for stage in sorted(stage_names):
+        entries = [r["stages"][stage] for r in reports if stage in r["stages"]]
+        result["stages"][stage] = {
+            "count": median([e["count"] for e in entries]),
+            "p50_seconds": median([e["p50_seconds"] for e in entries]),
+            "p95_seconds": median([e["p95_seconds"] for e in entries]),
+            "total_seconds": median([e["total_seconds"] for e in entries]),
+        }
+    return result
+
+
+def previous_result(config: dict):
+    if not os.path.exists(RESULTS_PATH):
+        return None
+    previous = None
+    with open(RESULTS_PATH, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("config") == config:
+                previous = record
+    return previous
+
+
+def compare(current: dict, previous: dict, tolerance: float) -> list[str]:
+    """Descriptions of metrics that got worse by more than `tolerance`"""
+    regressions = []
+    old, new = previous["result"], current["result"]
+    if new["articles_per_minute"] < old["articles_per_minute"] * (1 - tolerance):
+        regressions.append(
+            f"throughput {old['articles_per_minute']} -> {new['articles_per_minute']} articles/min"
+        )
+    for stage in TRACKED_STAGES:
+        if stage not in old["stages"] or stage not in new["stages"]:
+            continue
+        for stat in ("p50_seconds", "p95_seconds"):
+            before, after = old["stages"][stage][stat], new["stages"][stage][stat]
+            # Ignore sub-millisecond noise
+            if after > before * (1 + tolerance) and after - before > 0.001:
+                regressions.append(f"{stage} {stat[:3]} {before:.4f}s -> {after:.4f}s")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of main.main")
+    parser.add_argument("--topics", nargs="+", default=["AI Startups", "Chip Industry"])
+    parser.add_argument("--num-articles", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sites", type=int, default=4, help="Local article hosts")
+    parser.add_argument("--site-delay", type=float, default=0.05, help="Seconds per fixture response")
+    parser.add_argument("--llm-latency", type=float, default=0.4, help="Seconds per fake LLM call")
+    parser.add_argument("--llm-rpm", type=int, default=0, help="Fake LLM requests/minute (0 = unlimited)")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Relative slowdown versus the previous run reported as a regression")
+    parser.add_argument("--no-save", action="store_true", help="Do not append this run to the results file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # The fixture server needs no real keys; never hit live services from a benchmark
+    os.environ["NEWSAPI_KEY"] = "bench"
+    config = {
+        "topics": args.topics, "num_articles": args.num_articles, "sites": args.sites,
+        "site_delay": args.site_delay, "llm_latency": args.llm_latency, "llm_rpm": args.llm_rpm,
+    }
+
+    with FixtureServer(sites=args.sites, response_delay=args.site_delay) as server:
+        os.environ["NEWSAPI_BASE_URL"] = server.newsapi_url
+        reports = [run_once(args) for _ in range(args.repeat)]
+
+    result = summarize(reports)
+    print(f"\n{result['articles']} articles in {result['wall_seconds']:.2f}s "
+          f"-> {result['articles_per_minute']} articles/min "
+          f"(LLM throttled {result['throttled_seconds']:.1f}s)")
+    print(f"{'stage':<18}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'total s':>10}")
+    for stage, entry in result["stages"].items():
+        print(f"{stage:<18}{entry['count']:>7}{entry['p50_seconds'] * 1000:>10.1f}"
+              f"{entry['p95_seconds'] * 1000:>10.1f}{entry['total_seconds']:>10.2f}")
+
+    record = {
+        "commit": git_commit(),
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": config,
+        "result": result,
+    }
+    previous = previous_result(config)
+    regressions = compare(record, previous, args.tolerance) if previous else []
+    if previous:
+        print(f"\nCompared with {previous['commit']} ({previous['recorded_at']}):")
+        for regression in regressions:
+            print(f"  REGRESSION {regression}")
+        if not regressions:
+            print("  no regressions")
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+        with open(RESULTS_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
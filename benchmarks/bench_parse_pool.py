@@ -0,0 +1,96 @@
+"""Pages per second when HTML parsing runs in a ParsePool instead of the fetch threads.
+
+`--pages` fixture pages are "fetched" by a pool of fetch threads, each
+download simulated by `--fetch-latency` seconds of sleep, and then parsed.
+With `in-process` the fetch threads parse themselves, so parses serialize on
+the GIL; with `pool=N` they hand the bytes to N worker processes. Workers are
+started before timing, so the figures exclude process start-up. On a machine
+with C cores, throughput should grow with N up to about C.
+
+A final check parses the heaviest fixture with a timeout far below its parse
+time: the worker must be killed, ParseTimeout raised, and the pool must still
+parse the next page correctly.
+
+Run from the repository root:
+    python -m benchmarks.bench_parse_pool
+    python -m benchmarks.bench_parse_pool --pages 400 --workers 1 2 4 8
+"""
+import os
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fixtures import ensure_html_fixtures
+from src.parse_pool import ParsePool, ParseTimeout
+from src.text_extract_summarizer import FullTextExtractor
+
+
+def load_pages() -> list[bytes]:
+    pages = []
+    for path in ensure_html_fixtures():
+        with open(path, "rb") as f:
+            pages.append(f.read())
+    return pages
+
+
+def run(parser, pages: list[bytes], count: int, fetch_threads: int, fetch_latency: float) -> float:
+    """Seconds to fetch and parse `count` pages, cycling through `pages`"""
+    def fetch_and_parse(i):
+        time.sleep(fetch_latency)
+        return parser.parse_html(pages[i % len(pages)])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=fetch_threads) as executor:
+        texts = list(executor.map(fetch_and_parse, range(count)))
+    seconds = time.perf_counter() - start
+    assert all(texts), "a page parsed to empty text"
+    return seconds
+
+
+def check_timeout(pages: list[bytes]) -> str:
+    heaviest = max(pages, key=len)
+    with ParsePool(1, timeout=30.0) as pool:
+        # Start the worker under a normal timeout, then squeeze it for the heavy page
+        pool.parse_html(b"<p>start the worker</p>")
+        pool.timeout = 0.001
+        started = time.perf_counter()
+        try:
+            pool.parse_html(heaviest)
+            return "FAIL: the slow parse was not interrupted"
+        except ParseTimeout:
+            killed_after = time.perf_counter() - started
+        pool.timeout = 30.0
+        if pool.parse_html(pages[0]) != FullTextExtractor.parse_html(pages[0]):
+            return "FAIL: the replacement worker returned different text"
+    return f"ok (interrupted after {killed_after * 1000:.0f} ms, replacement worker parsed the next page)"
+
+
+def main(argv=None):
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Parse throughput with and without worker processes")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--fetch-threads", type=int, default=16)
+    parser.add_argument("--fetch-latency", type=float, default=0.02, help="Simulated seconds per download")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, cores} | ({8} if cores >= 8 else set())))
+    args = parser.parse_args(argv)
+
+    pages = load_pages()
+    print(f"{args.pages} pages ({len(pages)} fixtures, avg {sum(map(len, pages)) // len(pages) // 1024} KiB), "
+          f"{args.fetch_threads} fetch threads, {args.fetch_latency * 1000:.0f} ms per fetch, {cores} cores\n")
+    print(f"{'parser':<14}{'seconds':>9}{'pages/s':>10}{'speedup':>9}")
+
+    baseline = run(FullTextExtractor, pages, args.pages, args.fetch_threads, args.fetch_latency)
+    print(f"{'in-process':<14}{baseline:>9.2f}{args.pages / baseline:>10.1f}{1.0:>8.1f}x")
+    for workers in args.workers:
+        with ParsePool(workers) as pool:
+            # Start every worker before timing
+            run(pool, pages, workers * 2, workers * 2, 0.0)
+            seconds = run(pool, pages, args.pages, args.fetch_threads, args.fetch_latency)
+        print(f"{f'pool={workers}':<14}{seconds:>9.2f}{args.pages / seconds:>10.1f}{baseline / seconds:>8.1f}x")
+
+    print(f"\ntimeout: {check_timeout(pages)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""How well local pre-ranking keeps off-topic articles away from the summarizer.
+
+A candidate list is built per topic the way NewsAPI's relevancy sort returns
+it: on-topic stories mixed with off-topic ones that only mention the query
+deep in their body (their headline and snippet are about something else),
+plus "[Removed]" stubs and many stories from one source. For each
+`--num-articles`, the first N in NewsAPI's order are compared with the N the
+RelevanceRanker picks from `--overfetch` times as many candidates: how many
+are off-topic (each one a wasted scrape and 70B call), how many distinct
+sources they cover, and the ranking time. A final check runs the
+summary/title mismatch test on matching and mismatched pairs.
+
+Run from the repository root:
+    python -m benchmarks.bench_ranking
+    python -m benchmarks.bench_ranking --off-topic-share 0.5 --overfetch 4
+"""
+import time
+import random
+import argparse
+
+from benchmarks.fixtures import WORDS
+from src.ranking import RelevanceRanker, title_mismatch
+
+TOPICS = ("Middle East Startups", "Quantum Computing", "Chip Industry", "Electric Vehicles")
+OFF_TOPIC = ("Nvidia faces new export curbs as China demand surges", "Central bank holds rates steady",
+             "Streaming service raises prices again", "Heatwave strains the power grid")
+
+
+def _words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def candidates(topic: str, count: int, off_topic_share: float, rng: random.Random) -> list[dict]:
+    """(article, on_topic) pairs in a plausible NewsAPI relevancy order"""
+    articles = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < off_topic_share:
+            title = rng.choice(OFF_TOPIC)
+            article = {"title": f"{title}: {_words(rng, 4)}", "content": f"{title}. {_words(rng, 30)} [+3000 chars]",
+                       "source": f"Wire {rng.randint(0, 3)}"}
+        elif roll < off_topic_share + 0.05:
+            article = {"title": "[Removed]", "content": "[Removed]", "source": "[Removed]"}
+        else:
+            article = {"title": f"{topic}: {_words(rng, 6)}",
+                       "content": f"{_words(rng, 10)} {topic.lower()} {_words(rng, 20)} [+2000 chars]",
+                       # A third of the on-topic stories come from one prolific source
+                       "source": "Prolific Daily" if rng.random() < 0.33 else f"Outlet {rng.randint(0, 9)}"}
+        article["url"] = f"https://example.com/{i}"
+        articles.append((article, article["title"].startswith(topic)))
+    return articles
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Off-topic articles summarized with and without pre-ranking")
+    parser.add_argument("--num-articles", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--overfetch", type=int, default=3)
+    parser.add_argument("--off-topic-share", type=float, default=0.3)
+    args = parser.parse_args(argv)
+
+    ranker = RelevanceRanker(args.overfetch)
+    rng = random.Random(0)
+    print(f"{len(TOPICS)} topics, {args.off_topic_share:.0%} of candidates off-topic, overfetch {args.overfetch}\n")
+    print(f"{'N':>4}{'off-topic (newsapi)':>21}{'off-topic (ranked)':>20}{'sources':>13}{'rank ms':>10}")
+    for num_articles in args.num_articles:
+        baseline_off = ranked_off = baseline_sources = ranked_sources = 0
+        seconds = 0.0
+        for topic in TOPICS:
+            pool = candidates(topic, ranker.candidates(num_articles), args.off_topic_share, rng)
+            on_topic = {article["url"]: flag for article, flag in pool}
+            articles = [article for article, _ in pool]
+            baseline = articles[:num_articles]
+            start = time.perf_counter()
+            ranked = ranker.rank(topic, articles, num_articles)
+            seconds += time.perf_counter() - start
+            baseline_off += sum(not on_topic[article["url"]] for article in baseline)
+            ranked_off += sum(not on_topic[article["url"]] for article in ranked)
+            baseline_sources += len({article["source"] for article in baseline})
+            ranked_sources += len({article["source"] for article in ranked})
+        print(f"{num_articles:>4}{baseline_off:>21}{ranked_off:>20}"
+              f"{f'{baseline_sources}->{ranked_sources}':>13}{seconds / len(TOPICS) * 1000:>10.2f}")
+
+    pairs = [
+        ("Middle East startups raise record funding - Wamda",
+         "Startups across the Middle East raised record funding this quarter, led by fintech rounds.", False),
+        ("Middle East startups raise record funding - Wamda",
+         "Nvidia shares fell after new export curbs on AI chips to China; demand remains strong.", True),
+        ("Quantum computing firm unveils 1,000-qubit processor",
+         "The company unveiled a processor with 1,000 qubits, a milestone for quantum computing.", False),
+        ("Quantum computing firm unveils 1,000-qubit processor",
+         "The central bank held interest rates steady, citing cooling inflation.", True),
+    ]
+    correct = sum(title_mismatch(title, summary) == mismatched for title, summary, mismatched in pairs)
+    print(f"\ntitle check: {correct}/{len(pairs)} summary/title pairs classified correctly")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Failed summaries, wall time and retries when Groq rate limits bite.
+
+A burst of summarize calls goes through ArticleSummarizer's batch path
+against fake models that answer 429 once their requests-per-window limit is
+spent, the way Groq does. Three setups are compared:
+
+- unscheduled: calls go straight to the model, so throttled ones come back
+  as "Summary generation failed";
+- scheduled: the LLMScheduler paces calls to the limit;
+- optimistic: the scheduler assumes twice the real limit, so it must back
+  off and retry the 429s it gets;
+- overflow: as scheduled, with a second model taking calls while the first
+  one is saturated.
+
+The rate-limit window is shortened (`--window`, default 3 s) so a run takes
+seconds instead of minutes; the limits scale with it.
+
+A final check summarizes one long article per model under the default
+free-tier limits: every chunk call has to fit the model's tokens/minute
+budget, or the scheduler refuses it (CallTooLarge) and the summary fails.
+
+Run from the repository root:
+    python -m benchmarks.bench_rate_limits
+    python -m benchmarks.bench_rate_limits --calls 60 --rpm 20
+"""
+import sys
+import time
+import argparse
+
+from benchmarks.fake_services import BenchChatModel
+from benchmarks.fixtures import WORDS
+from src import instrumentation
+from src.llm_scheduler import LLMScheduler
+from src.model_limits import MODEL_CONTEXT_TOKENS, SUMMARY_TOKENS_ESTIMATE, estimate_tokens
+from src.scheduled_model import ScheduledChatModel
+from src.text_extract_summarizer import SUMMARY_FAILED, SUMMARY_TEMPLATE, ArticleSummarizer
+
+PRIMARY, OVERFLOW = "llama3-70b-8192", "llama3-8b-8192"
+
+
+def fake_model(model_name: str, args) -> BenchChatModel:
+    return BenchChatModel(
+        model_name=model_name, latency=args.latency, jitter=0.0, requests_per_minute=args.rpm,
+        window_seconds=args.window, block_on_limit=False,
+    )
+
+
+def run(label: str, args, texts: list[str], scheduled: bool = False, overflow: bool = False,
+        assumed_rpm: int = None) -> dict:
+    summarizer = ArticleSummarizer(model_name=PRIMARY, llm=fake_model(PRIMARY, args),
+                                   max_concurrency=args.concurrency)
+    if scheduled:
+        rpm = assumed_rpm or args.rpm
+        scheduler = LLMScheduler(
+            limits={PRIMARY: (rpm, 10 ** 9), OVERFLOW: (rpm, 10 ** 9)},
+            window_seconds=args.window, backoff_factor=args.window / 10, overflow_after=0.0,
+        )
+        models = {PRIMARY: summarizer.model}
+        if overflow:
+            models[OVERFLOW] = fake_model(OVERFLOW, args)
+        summarizer.model = ScheduledChatModel(models, PRIMARY, scheduler, overflow=OVERFLOW if overflow else None)
+
+    recorder = instrumentation.start_run()
+    start = time.perf_counter()
+    summaries = summarizer.summarize_chunks(texts)
+    seconds = time.perf_counter() - start
+    report = recorder.report()
+    stage = report["stages"].get("summarize_chunk", {})
+    return {
+        "label": label,
+        "failed": sum(summary == SUMMARY_FAILED for summary in summaries),
+        "seconds": seconds,
+        "retries": stage.get("throttled", 0),
+        "waited": report["stages"].get("rate_limit_wait", {}).get("total_seconds", 0.0),
+        "models": sorted(report["tokens"]),
+    }
+
+
+def chunk_fits(model_name: str, args) -> dict:
+    """Summarize a multi-chunk article under `model_name`'s default limits"""
+    scheduler = LLMScheduler(window_seconds=args.window)
+    summarizer = ArticleSummarizer(model_name=model_name, scheduler=scheduler,
+                                   llm=BenchChatModel(model_name=model_name, latency=args.latency, jitter=0.0))
+    words = int(summarizer.chunk_tokens * 2.5 * 3.8 / 6)
+    text = ". ".join(" ".join(WORDS[(i + j) % len(WORDS)] for j in range(12)) for i in range(0, words, 12))
+    summary = summarizer.summarize_text(text)
+    return {
+        "chunk_tokens": summarizer.chunk_tokens,
+        # What the scheduler reserves for a full chunk: prompt, chunk and expected reply
+        "call_tokens": estimate_tokens(SUMMARY_TEMPLATE) + summarizer.chunk_tokens + SUMMARY_TOKENS_ESTIMATE,
+        "tokens_per_minute": scheduler.budget(model_name).tokens_per_minute,
+        "failed": summary == SUMMARY_FAILED,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summaries lost to rate limits with and without the scheduler")
+    parser.add_argument("--calls", type=int, default=40, help="Summaries requested at once")
+    parser.add_argument("--rpm", type=int, default=10, help="Fake requests per window, per model")
+    parser.add_argument("--window", type=float, default=3.0, help="Seconds in a rate-limit window")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per fake LLM call")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    texts = [f"Story {i}: " + " ".join(WORDS[(i + j) % len(WORDS)] for j in range(120))
+             for i in range(args.calls)]
+    print(f"{args.calls} summaries, {args.rpm} requests per {args.window:g}s window per model\n")
+    print(f"{'setup':<14}{'failed':>8}{'wall s':>9}{'retries':>9}{'waited s':>10}  models")
+    setups = (
+        ("unscheduled", {}),
+        ("scheduled", {"scheduled": True}),
+        ("optimistic", {"scheduled": True, "assumed_rpm": args.rpm * 2}),
+        ("overflow", {"scheduled": True, "overflow": True}),
+    )
+    for label, options in setups:
+        result = run(label, args, texts, **options)
+        print(f"{label:<14}{result['failed']:>8}{result['seconds']:>9.2f}{result['retries']:>9}"
+              f"{result['waited']:>10.2f}  {', '.join(result['models'])}")
+
+    failures = []
+    print(f"\n{'model':<22}{'chunk':>8}{'call':>8}{'tpm':>8}  summary")
+    for model_name in MODEL_CONTEXT_TOKENS:
+        result = chunk_fits(model_name, args)
+        print(f"{model_name:<22}{result['chunk_tokens']:>8}{result['call_tokens']:>8}"
+              f"{result['tokens_per_minute']:>8}  {'FAILED' if result['failed'] else 'ok'}")
+        if result["failed"] or result["call_tokens"] > result["tokens_per_minute"]:
+            failures.append(f"{model_name}: a {result['chunk_tokens']}-token chunk does not fit "
+                            f"{result['tokens_per_minute']} tokens/minute")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
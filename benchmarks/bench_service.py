@@ -0,0 +1,184 @@
+"""The digest service (`python -m src.service`) against stub backends.
+
+NewsAPI and the article sites are served by a local FixtureServer and Groq is
+replaced by BenchChatModel, so the service's HTTP API can be exercised
+without API keys. Three checks are printed:
+
+- cold vs warm: a fresh `main.main` interpreter per digest against jobs on
+  one long-running service, each for a topic not seen before;
+- coalescing: `--clients` identical POST /jobs requests sent at once must
+  share one job and one NewsAPI request;
+- backpressure: with one worker and one queue slot, extra jobs are refused
+  with 429 instead of piling up; once the scheduler has seen Groq's
+  headers for a spent token budget, new jobs get 429 with a Retry-After
+  until the budget resets.
+
+Run from the repository root:
+    python -m benchmarks.bench_service
+    python -m benchmarks.bench_service --num-articles 8 --llm-latency 0.2
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from benchmarks.fake_services import FixtureServer, BenchChatModel
+from src.cache import ContentCache
+from src.digest_store import DigestStore
+from src.http_client import HttpClient
+from src.llm_scheduler import LLMScheduler
+from src.news_fetcher import NewsFetcher
+from src.service import DEFAULT_MODEL, SENTIMENT_MODEL, DigestService
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def call(base_url: str, method: str, path: str, body: dict = None) -> tuple[int, dict, dict]:
+    """(status, JSON body, headers) of one API request"""
+    data = json.dumps(body).encode() if body is not None else None
+    request = Request(base_url + path, data=data, method=method, headers={"Content-Type": "application/json"})
+    try:
+        with urlopen(request, timeout=60) as response:
+            return response.status, json.loads(response.read()), dict(response.headers)
+    except HTTPError as e:
+        return e.code, json.loads(e.read()), dict(e.headers)
+
+
+def wait_for(base_url: str, job_id: str, timeout: float = 300) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        _, job, _ = call(base_url, "GET", f"/jobs/{job_id}")
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.05)
+    raise TimeoutError(f"job {job_id} did not finish")
+
+
+def start_service(tmp: str, name: str, args, scheduler: LLMScheduler = None, **options) -> tuple[DigestService, str]:
+    # Unless a check needs a budget, the fake models are as unlimited as the CLI's
+    scheduler = scheduler or LLMScheduler(limits={DEFAULT_MODEL: (10 ** 6, 10 ** 9), SENTIMENT_MODEL: (10 ** 6, 10 ** 9)})
+    cache = ContentCache(os.path.join(tmp, f"{name}-cache.sqlite"))
+    client = HttpClient(cache=cache)
+    service = DigestService(
+        NewsFetcher(client=client), cache=cache, client=client,
+        store=DigestStore(os.path.join(tmp, f"{name}-digests.sqlite")),
+        llm=BenchChatModel(latency=args.llm_latency, jitter=0.0), scheduler=scheduler, tick_seconds=0.2, **options
+    )
+    server = service.start(port=0)
+    return service, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def cold_cli_seconds(topic: str, args, env: dict, tmp: str) -> float:
+    """Wall time of one digest in a fresh interpreter, including imports and client setup"""
+    argv = ["--topics", topic, "--num-articles", str(args.num_articles), "--output-dir", tmp, "--no-store"]
+    code = (
+        "import contextlib, io, main\n"
+        "from benchmarks.fake_services import BenchChatModel\n"
+        f"with contextlib.redirect_stdout(io.StringIO()): "
+        f"main.main({argv!r}, llm=BenchChatModel(latency={args.llm_latency}, jitter=0.0))"
+    )
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=dict(env, NEWS_DIGEST_CACHE=os.path.join(
+        tmp, f"cold-{topic}.sqlite")), capture_output=True, check=True)
+    return time.perf_counter() - start
+
+
+def cold_vs_warm(args, env: dict, tmp: str):
+    topics = [f"Service Topic {i}" for i in range(args.jobs)]
+    cold = [cold_cli_seconds(topic + " cold", args, env, tmp) for topic in topics]
+
+    service, base_url = start_service(tmp, "warm", args)
+    warm = []
+    try:
+        for topic in topics:
+            start = time.perf_counter()
+            _, job, _ = call(base_url, "POST", "/jobs", {"topic": topic, "num_articles": args.num_articles})
+            job = wait_for(base_url, job["id"])
+            assert job["status"] == "done", job["error"]
+            warm.append(time.perf_counter() - start)
+    finally:
+        service.close()
+
+    print(f"{'digest':<10}{'cold CLI s':>12}{'service s':>12}")
+    for i, (cold_s, warm_s) in enumerate(zip(cold, warm), 1):
+        print(f"{i:<10}{cold_s:>12.2f}{warm_s:>12.2f}")
+    print(f"{'mean':<10}{sum(cold) / len(cold):>12.2f}{sum(warm) / len(warm):>12.2f}\n")
+
+
+def coalescing(args, server: FixtureServer, tmp: str):
+    service, base_url = start_service(tmp, "coalesce", args)
+    try:
+        before = server.newsapi_requests
+        request = {"topic": "Coalesced Topic", "num_articles": args.num_articles}
+        with ThreadPoolExecutor(max_workers=args.clients) as executor:
+            responses = list(executor.map(lambda _: call(base_url, "POST", "/jobs", request), range(args.clients)))
+        job_ids = {body["id"] for _, body, _ in responses}
+        for job_id in job_ids:
+            wait_for(base_url, job_id)
+        statuses = [status for status, _, _ in responses]
+        print(f"coalescing: {args.clients} identical requests -> {len(job_ids)} job(s) "
+              f"({statuses.count(202)} started, {statuses.count(200)} joined), "
+              f"{server.newsapi_requests - before} NewsAPI request(s)")
+    finally:
+        service.close()
+
+
+def backpressure(args, tmp: str):
+    service, base_url = start_service(tmp, "backpressure", args, max_workers=1, max_queued=1, max_budget_wait=1.0)
+    try:
+        print("backpressure: 1 worker, 1 queue slot")
+        accepted = []
+        for i in range(4):
+            status, body, _ = call(base_url, "POST", "/jobs",
+                                   {"topic": f"Burst Topic {i}", "num_articles": args.num_articles})
+            print(f"  burst job {i}: {status} {body.get('error') or body['status']}")
+            if status == 202:
+                accepted.append(body["id"])
+        for job_id in accepted:
+            wait_for(base_url, job_id)
+
+        # What Groq reports once the model's token budget is used up until the window resets
+        service.scheduler.observe(DEFAULT_MODEL, {"x-ratelimit-remaining-tokens": "0",
+                                                  "x-ratelimit-reset-tokens": f"{args.window:g}s"})
+        request = {"topic": "After Burst", "num_articles": args.num_articles}
+        status, body, headers = call(base_url, "POST", "/jobs", request)
+        print(f"  token budget spent for {args.window:g}s: {status} {body.get('error') or body['status']}"
+              + (f" (Retry-After {headers.get('Retry-After')}s)" if status == 429 else ""))
+        if status == 429:
+            time.sleep(float(headers["Retry-After"]))
+            status, body, _ = call(base_url, "POST", "/jobs", request)
+            print(f"  after Retry-After: {status} {body.get('error') or body['status']}")
+        if status == 202:
+            wait_for(base_url, body["id"])
+        _, health, _ = call(base_url, "GET", "/health")
+        print(f"  /health: {json.dumps(health)}")
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Digest service: cold vs warm, coalescing and backpressure")
+    parser.add_argument("--jobs", type=int, default=3, help="Digests in the cold vs warm comparison")
+    parser.add_argument("--num-articles", type=int, default=4)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per fake LLM call")
+    parser.add_argument("--clients", type=int, default=12, help="Identical requests sent at once")
+    parser.add_argument("--window", type=float, default=3.0,
+                        help="Seconds until the spent token budget resets in the backpressure check")
+    args = parser.parse_args(argv)
+
+    with FixtureServer() as server, tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, NEWSAPI_KEY="bench", GROQ_API_KEY="bench", NEWSAPI_BASE_URL=server.newsapi_url)
+        os.environ.update(NEWSAPI_KEY="bench", NEWSAPI_BASE_URL=server.newsapi_url)
+        cold_vs_warm(args, env, tmp)
+        coalescing(args, server, tmp)
+        backpressure(args, tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Import time of the CLI, and which heavy dependencies a run actually loads.
+
+`python -X importtime -c "import main"` is run in fresh interpreters and the
+best cumulative time is compared with a budget. The CLI is then run against a
+local FixtureServer, once with `--dry-run` and once fully served from a warm
+cache; neither those runs nor plain `import main` may load the LLM stack,
+NLTK, BeautifulSoup or NumPy. Exits non-zero if the budget is exceeded or a
+heavy module was loaded.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --budget-ms 250 --repeat 10
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+from benchmarks.fake_services import FixtureServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that only the summarize/classify paths (or optional features) should load
+HEAVY_MODULES = ("langchain", "langchain_core", "langchain_groq", "langsmith", "nltk", "bs4", "numpy")
+# Also deferred, but loaded by any run that parses a page (a dry run does), so only `import main` is checked
+PARSER_MODULES = ("lxml",)
+
+IMPORTTIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+LOADED_HEAVY = "import sys; print(sorted(m for m in {!r} if m in sys.modules))"
+
+
+def import_time(module: str = "main") -> tuple[float, list[tuple[str, float]]]:
+    """(cumulative ms of `import module`, slowest top-level imports as (name, ms))"""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stderr
+    total, children = 0.0, []
+    for line in output.splitlines():
+        found = IMPORTTIME_RE.match(line)
+        if not found:
+            continue
+        cumulative_ms = int(found.group(2)) / 1000
+        name = found.group(4)
+        if name == module:
+            total = cumulative_ms
+        elif len(found.group(3)) == 3:
+            # Direct imports of `module` are indented by two spaces after the bar
+            children.append((name, cumulative_ms))
+    return total, sorted(children, key=lambda child: -child[1])
+
+
+def loaded_heavy_modules(code: str, env: dict = None, modules: tuple = HEAVY_MODULES) -> list[str]:
+    """Heavy modules (of `modules`) present in sys.modules after running `code` in a fresh interpreter"""
+    output = subprocess.run(
+        [sys.executable, "-c", f"{code}\n{LOADED_HEAVY.format(modules)}"],
+        cwd=ROOT, capture_output=True, text=True, check=True, env=env
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1].replace("'", '"'))
+
+
+def cli_run_modules() -> dict[str, list[str]]:
+    """Heavy modules loaded by a `--dry-run` and by a fully cached run, against the fixture server"""
+    with FixtureServer() as server, tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, NEWSAPI_KEY="bench", GROQ_API_KEY="bench",
+                   NEWSAPI_BASE_URL=server.newsapi_url,
+                   NEWS_DIGEST_CACHE=os.path.join(tmp, "cache.sqlite"),
+                   NEWS_DIGEST_STORE=os.path.join(tmp, "digests.sqlite"))
+        argv = ["--topics", "AI Startups", "--num-articles", "4", "--output-dir", tmp]
+
+        def run_cli(cli_argv, llm="None"):
+            code = "import contextlib, io, main\n"
+            if llm != "None":
+                code += "from benchmarks.fake_services import BenchChatModel\n"
+            return code + f"with contextlib.redirect_stdout(io.StringIO()): main.main({cli_argv!r}, llm={llm})"
+
+        modules = {"main.py --dry-run": loaded_heavy_modules(run_cli(argv + ["--dry-run"]), env=env)}
+        # Warm the cache with the fake model, then repeat the run against the real client setup
+        subprocess.run([sys.executable, "-c", run_cli(argv, llm="BenchChatModel(latency=0.01)")],
+                       cwd=ROOT, capture_output=True, check=True, env=env)
+        modules["main.py (cached)"] = loaded_heavy_modules(run_cli(argv), env=env)
+        return modules
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CLI import time and lazy-import checks")
+    parser.add_argument("--budget-ms", type=float, default=300,
+                        help="Maximum cumulative import time of main.py (best of --repeat)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    runs = [import_time() for _ in range(args.repeat)]
+    best, children = min(runs, key=lambda run: run[0])
+    print(f"import main: best {best:.0f} ms of {args.repeat} (budget {args.budget_ms:.0f} ms)")
+    for name, ms in children[:8]:
+        print(f"  {name:<32}{ms:>8.1f} ms")
+
+    failures = []
+    if best > args.budget_ms:
+        failures.append(f"import main took {best:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+    checks = {"import main": loaded_heavy_modules("import main", modules=HEAVY_MODULES + PARSER_MODULES),
+              **cli_run_modules()}
+    for label, modules in checks.items():
+        print(f"{label}: heavy modules loaded: {', '.join(modules) or 'none'}")
+        if modules:
+            failures.append(f"{label} loaded {', '.join(modules)}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
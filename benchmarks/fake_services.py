@@ -0,0 +1,320 @@
+"""Local stand-ins for NewsAPI, article sites and Groq, so the whole pipeline
+can be benchmarked without API keys or network access.
+
+- `FixtureServer` serves NewsAPI `/v2/everything` responses and article HTML
+  from one or more local "sites" (separate ports, so the HTTP client's
+  per-host rate limits apply as they would across real publishers).
+- `BenchChatModel` is a LangChain chat model with configurable latency and a
+  requests-per-minute limit that answers summary, sentiment and batched
+  sentiment prompts with plausible text and reports token usage.
+
+Recorded NewsAPI responses saved as `benchmarks/fixtures/newsapi/<topic_slug>.json`
+are replayed instead of the generated ones; record one with
+    python -m benchmarks.fake_services record "AI Startups"
+Article URLs in recorded responses are rewritten to local fixture pages.
+"""
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import random
+import asyncio
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.callbacks import Callbacks
+from pydantic import Field, PrivateAttr
+
+from benchmarks.fixtures import WORDS, FIXTURES, build_page
+from src.batch_runner import topic_slug
+from src.model_limits import estimate_tokens
+from src.llm_callbacks import token_usage_callback
+
+NEWSAPI_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "newsapi")
+
+
+def _title(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 11))).capitalize()
+
+
+def synthetic_newsapi_articles(topic: str, count: int = 100) -> list[dict]:
+    """NewsAPI-shaped articles for a topic; URLs are filled in by the server"""
+    rng = random.Random(topic)
+    now = datetime.now(timezone.utc)
+    articles = []
+    for i in range(count):
+        description = " ".join(rng.choice(WORDS) for _ in range(30)).capitalize() + "."
+        articles.append({
+            "source": {"id": None, "name": f"Bench Source {i % 7}"},
+            "author": None,
+            "title": f"{topic}: {_title(rng)}",
+            "description": description,
+            "url": f"https://example.com/{topic_slug(topic)}/{i}",
+            "publishedAt": (now - timedelta(minutes=17 * i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "content": description[:200] + " [+2400 chars]",
+        })
+    return articles
+
+
+def load_newsapi_articles(topic: str) -> list[dict]:
+    path = os.path.join(NEWSAPI_DIR, f"{topic_slug(topic)}.json")
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["articles"]
+    return synthetic_newsapi_articles(topic)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "NewsDigestFixtures/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        fixtures = self.server.fixtures
+        parts = urlsplit(self.path)
+        if parts.path == "/v2/everything":
+            fixtures.newsapi_requests += 1
+            query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+            self._send(200, "application/json", json.dumps(fixtures.newsapi_page(query)).encode())
+        elif parts.path.startswith("/articles/"):
+            fixtures.page_requests += 1
+            page = fixtures.page(parts.path.rsplit("/", 1)[-1])
+            self._send(200, "text/html; charset=utf-8", page)
+        else:
+            self._send(404, "text/plain", b"not found")
+
+    def _send(self, status: int, content_type: str, body: bytes):
+        if self.server.fixtures.response_delay:
+            time.sleep(self.server.fixtures.response_delay)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FixtureServer:
+    """Serves NewsAPI responses and article pages on localhost.
+
+    The NewsAPI endpoint lives on the first site; article URLs are spread
+    round-robin over `sites` ports. Use as a context manager; `newsapi_url`
+    is what NEWSAPI_BASE_URL should be set to.
+    """
+    def __init__(self, sites: int = 4, response_delay: float = 0.0):
+        self.response_delay = response_delay
+        self.newsapi_requests = 0
+        self.page_requests = 0
+        self._pages = {}
+        self._pages_lock = threading.Lock()
+        self._servers = []
+        for _ in range(sites):
+            server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+            server.daemon_threads = True
+            server.fixtures = self
+            self._servers.append(server)
+        self._threads = []
+
+    @property
+    def newsapi_url(self) -> str:
+        return f"{self._base(0)}/v2/everything"
+
+    def _base(self, site: int) -> str:
+        host, port = self._servers[site].server_address[:2]
+        return f"http://{host}:{port}"
+
+    def newsapi_page(self, query: dict) -> dict:
+        articles = load_newsapi_articles(query.get("q", ""))
+        if "T" in query.get("from", ""):
+            # Only time-precise windows filter, so date-only fixture queries keep every article
+            articles = [article for article in articles if article["publishedAt"].rstrip("Z") >= query["from"]]
+        page_size = int(query.get("pageSize", 20))
+        page = int(query.get("page", 1))
+        selected = articles[(page - 1) * page_size:page * page_size]
+        offset = (page - 1) * page_size
+        return {
+            "status": "ok",
+            "totalResults": len(articles),
+            "articles": [
+                dict(article, url=self._article_url(topic_slug(query.get("q", "")), offset + i))
+                for i, article in enumerate(selected)
+            ],
+        }
+
+    def _article_url(self, slug: str, index: int) -> str:
+        # Every fourth story is common to all topics, as overlapping real queries share stories
+        story = f"shared-{index}" if index % 4 == 0 else f"{slug}-{index}"
+        return f"{self._base(index % len(self._servers))}/articles/{story}"
+
+    def page(self, story: str) -> bytes:
+        """A distinct generated page per story, so summaries are never shared by accident"""
+        with self._pages_lock:
+            page = self._pages.get(story)
+            if page is None:
+                seed = zlib.crc32(story.encode())
+                shapes = list(FIXTURES.values())
+                params = dict(shapes[seed % len(shapes)], seed=seed)
+                page = self._pages[story] = build_page(**params).encode()
+            return page
+
+    def set_page(self, story: str, page: bytes):
+        """Serve `page` for `story` from now on, e.g. an edited version of it"""
+        with self._pages_lock:
+            self._pages[story] = page
+
+    def start(self):
+        for server in self._servers:
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class RateLimitExceeded(RuntimeError):
+    """Raised like Groq's 429, with the seconds until a request slot frees up"""
+    status_code = 429
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class BenchChatModel(BaseChatModel):
+    """Chat model stand-in with Groq-like latency, rate limits and usage reporting.
+
+    Each call sleeps `latency` (+/- `jitter`) plus `seconds_per_1k_tokens` per
+    thousand prompt tokens. With `requests_per_minute`, calls beyond the limit
+    either wait for a free slot (`block_on_limit`, like a client honoring
+    Retry-After) or raise RateLimitExceeded.
+    """
+    model_name: str = "llama3-70b-8192"
+    latency: float = 0.4
+    jitter: float = 0.1
+    seconds_per_1k_tokens: float = 0.05
+    requests_per_minute: int = 0
+    # Length of the rate-limit "minute"; shortened by benchmarks that exercise throttling
+    window_seconds: float = 60.0
+    block_on_limit: bool = True
+    seed: int = 0
+    # Report usage to the run recorder, as the ChatGroq models do
+    callbacks: Callbacks = Field(default_factory=lambda: [token_usage_callback], exclude=True)
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _calls: deque = PrivateAttr(default_factory=deque)
+    _rng: random.Random = PrivateAttr(default=None)
+    _throttled_seconds: float = PrivateAttr(default=0.0)
+
+    @property
+    def _llm_type(self) -> str:
+        return "bench-fake"
+
+    @property
+    def throttled_seconds(self) -> float:
+        return self._throttled_seconds
+
+    def _delay(self, prompt_tokens: int) -> float:
+        """Seconds to wait for a rate-limit slot plus the simulated inference time"""
+        with self._lock:
+            if self._rng is None:
+                self._rng = random.Random(self.seed)
+            now = time.monotonic()
+            wait = 0.0
+            if self.requests_per_minute:
+                while self._calls and self._calls[0] <= now - self.window_seconds:
+                    self._calls.popleft()
+                if len(self._calls) >= self.requests_per_minute:
+                    wait = self._calls[-self.requests_per_minute] + self.window_seconds - now
+                    if not self.block_on_limit:
+                        raise RateLimitExceeded(f"{self.requests_per_minute} requests/minute exceeded", wait)
+                    self._throttled_seconds += wait
+                self._calls.append(now + wait)
+            latency = self.latency + self._rng.uniform(-self.jitter, self.jitter)
+        return wait + max(0.0, latency) + prompt_tokens / 1000 * self.seconds_per_1k_tokens
+
+    @staticmethod
+    def respond(prompt: str) -> str:
+        """Plausible output for the summary, sentiment and batched sentiment prompts"""
+        batch = re.search(r"numbered 1 to (\d+)", prompt)
+        if batch:
+            labels = ("POSITIVE", "NEUTRAL", "NEGATIVE")
+            return "\n".join(f"{i}: {labels[i % 3]}" for i in range(1, int(batch.group(1)) + 1))
+        if "Classify the sentiment" in prompt:
+            return ("POSITIVE", "NEUTRAL", "NEGATIVE")[len(prompt) % 3]
+        rng = random.Random(len(prompt))
+        paragraphs = [
+            " ".join(rng.choice(WORDS) for _ in range(60)).capitalize() + "."
+            for _ in range(2)
+        ]
+        return "\n\n".join(paragraphs)
+
+    def _result(self, prompt: str, prompt_tokens: int) -> ChatResult:
+        text = self.respond(prompt)
+        completion_tokens = estimate_tokens(text)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        message = AIMessage(content=text, usage_metadata={
+            "input_tokens": prompt_tokens, "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        })
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={"token_usage": usage, "model_name": self.model_name},
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        prompt_tokens = estimate_tokens(prompt)
+        time.sleep(self._delay(prompt_tokens))
+        return self._result(prompt, prompt_tokens)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        prompt_tokens = estimate_tokens(prompt)
+        await asyncio.sleep(self._delay(prompt_tokens))
+        return self._result(prompt, prompt_tokens)
+
+
+def record_newsapi(topic: str, page_size: int = 100):
+    """Save a live NewsAPI response for `topic` so benchmarks can replay it"""
+    from dotenv import load_dotenv
+    from src.news_fetcher import NewsFetcher
+
+    load_dotenv()
+    fetcher = NewsFetcher(base_url="https://newsapi.org/v2/everything")
+    response = fetcher.client.get(fetcher.base_url, params={
+        "q": topic, "pageSize": page_size, "language": "en", "sortBy": "relevancy",
+        "apiKey": fetcher.api_key,
+    })
+    response.raise_for_status()
+    os.makedirs(NEWSAPI_DIR, exist_ok=True)
+    path = os.path.join(NEWSAPI_DIR, f"{topic_slug(topic)}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(response.json(), f, indent=2)
+    print(f"Saved {path}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "record":
+        for topic in sys.argv[2:]:
+            record_newsapi(topic)
+    else:
+        print('usage: python -m benchmarks.fake_services record "<topic>" [...]')
@@ -0,0 +1,84 @@
+"""Deterministic stand-ins for saved article pages used by the benchmarks.
+
+Real pages saved from a browser can be dropped into `benchmarks/fixtures/html/`
+as well; every `*.html` file in that directory is benchmarked.
+"""
+import os
+import random
+
+HTML_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "html")
+
+WORDS = (
+    "startup funding model inference company investors growth market revenue "
+    "platform launch agents compute chips regulators data customers enterprise "
+    "product research team billion million quarter analysts valuation cloud"
+).split()
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 22))]
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng: random.Random) -> str:
+    return " ".join(_sentence(rng) for _ in range(rng.randint(3, 7)))
+
+
+def _chrome(rng: random.Random, scripts: int, nav_links: int) -> tuple[str, str]:
+    """Head and navigation boilerplate typical of commercial news sites"""
+    script = "var x = {};" + "x['k%d'] = %d;" * 40
+    head = "".join(
+        f"<script>{script % tuple(v for i in range(40) for v in (i, i))}</script>"
+        for _ in range(scripts)
+    )
+    head += "<style>" + ".c{color:red}" * 500 + "</style>"
+    nav = "<nav><ul>" + "".join(
+        f"<li><a href='/s/{i}'>{rng.choice(WORDS)}</a></li>" for i in range(nav_links)
+    ) + "</ul></nav>"
+    return head, nav
+
+
+def build_page(seed: int, paragraphs: int, scripts: int = 20, nav_links: int = 200,
+               container: str = "article") -> str:
+    rng = random.Random(seed)
+    head, nav = _chrome(rng, scripts, nav_links)
+    body = [f"<h1>{_sentence(rng)}</h1>"]
+    for i in range(paragraphs):
+        if i and i % 12 == 0:
+            body.append(f"<h2>{_sentence(rng)}</h2>")
+        if i and i % 17 == 0:
+            body.append(f"<blockquote>{_sentence(rng)}</blockquote>")
+        if i and i % 9 == 0:
+            body.append("<figure><img src='x.jpg'><figcaption>Photo</figcaption></figure>")
+        body.append(f"<p>{_paragraph(rng)}</p>")
+    if container == "article":
+        main = "<article>" + "".join(body) + "</article>"
+    else:
+        main = f"<div class='wrapper {container}'>" + "".join(body) + "</div>"
+    related = "<aside>" + "".join(f"<p>{_sentence(rng)}</p>" for _ in range(30)) + "</aside>"
+    footer = "<footer>" + "".join(f"<p>{_sentence(rng)}</p>" for _ in range(20)) + "</footer>"
+    return (
+        f"<!DOCTYPE html><html><head><meta charset='utf-8'>{head}</head>"
+        f"<body><header>{nav}</header><main>{main}{related}</main>{footer}</body></html>"
+    )
+
+
+FIXTURES = {
+    "short_article.html": dict(seed=1, paragraphs=8),
+    "typical_article.html": dict(seed=2, paragraphs=30, container="article-body"),
+    "long_article.html": dict(seed=3, paragraphs=250, container="entry-content"),
+    "heavy_page.html": dict(seed=4, paragraphs=60, scripts=300, nav_links=3000, container="post-body"),
+}
+
+
+def ensure_html_fixtures() -> list[str]:
+    """Write the generated pages if missing and return every fixture path"""
+    os.makedirs(HTML_DIR, exist_ok=True)
+    for name, params in FIXTURES.items():
+        path = os.path.join(HTML_DIR, name)
+        if not os.path.exists(path):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(build_page(**params))
+    return sorted(
+        os.path.join(HTML_DIR, name) for name in os.listdir(HTML_DIR) if name.endswith(".html")
+    )
@@ -1,45 +1,174 @@
 # 5
 
+import os
+import logging
+import argparse
 from datetime import datetime, timezone
-from src.news_fetcher import NewsFetcher 
-from src.text_extract_summarizer import ArticleSummarizer 
+from src.news_fetcher import NewsFetcher
+from src.text_extract_summarizer import ArticleSummarizer
 from src.analyze_sentiment import SentimentAnalyzer
-from src.digest_generator import DailyDigestGenerator 
-from dotenv import load_dotenv 
+from src.pipeline import ArticlePipeline
+from src.batch_runner import BatchDigestRunner, topic_slug
+from src.ranking import RelevanceRanker
+from src.cache import ContentCache
+from src.http_client import HttpClient
+from src.parse_pool import ParsePool, default_parse_workers
+from src.seen_index import SeenArticleIndex
+from src.digest_store import DigestStore
+from src.digest_generator import FORMATS, DailyDigestGenerator
+from src import instrumentation
+from dotenv import load_dotenv
 
-load_dotenv()
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate AI news digests for one or more topics")
+    parser.add_argument("--topics", nargs="+", default=["AI Startups"],
+                        help="Topics to build digests for")
+    parser.add_argument("--topics-file", help="File with one topic per line (replaces --topics)")
+    parser.add_argument("--num-articles", type=int, default=5)
+    parser.add_argument("--days-back", type=int, default=1)
+    parser.add_argument("--model", default="llama3-70b-8192", help="Groq model for summarization")
+    parser.add_argument("--overflow-model", default=os.getenv("GROQ_OVERFLOW_MODEL"),
+                        help="Groq model that takes summaries while --model is rate limited")
+    parser.add_argument("--output-dir", default=".", help="Where digests and run stats are written")
+    parser.add_argument("--format", nargs="+", default=["txt"], choices=list(FORMATS),
+                        help="Digest file formats to write")
+    parser.add_argument("--store", help="Digest history database (default: NEWS_DIGEST_STORE or .cache/digests.sqlite)")
+    parser.add_argument("--no-store", action="store_true", help="Do not record this run in the digest history")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only process articles not seen by earlier runs of the same topic")
+    parser.add_argument("--overfetch", type=int, default=3,
+                        help="Fetch this many candidates per requested article, rank them locally by relevance, "
+                             "source diversity and headline quality, and summarize only the best (1 = NewsAPI's order)")
+    parser.add_argument("--extractive-budget", type=int, default=0,
+                        help="Keep only the most central sentences, up to this many tokens, before summarizing (0 = off)")
+    parser.add_argument("--parse-workers", type=int, default=default_parse_workers(),
+                        help="Processes that parse article HTML (default: NEWS_PARSE_WORKERS, "
+                             "else one per core up to 4; 0 = parse in the fetch threads)")
+    parser.add_argument("--parse-timeout", type=float, default=10.0,
+                        help="Seconds before a page's parse is killed and the article falls back to its snippet")
+    parser.add_argument("--change-threshold", type=float,
+                        help="Re-check pages of articles summarized before; keep their summary unless this share "
+                             "of the text changed (e.g. 0.2), else update it from the changed paragraphs")
+    parser.add_argument("--local-sentiment", action="store_true",
+                        help="Label clear-cut summaries with the local classifier and send only uncertain ones to the LLM")
+    parser.add_argument("--sentiment-threshold", type=float, default=0.75,
+                        help="Local classifier confidence needed to skip the LLM (see python -m src.local_sentiment)")
+    parser.add_argument("--report", help="Path of the JSON run report (default: output dir)")
+    parser.add_argument("--prometheus-textfile", help="Also write run metrics in Prometheus text format")
+    parser.add_argument("--otel", action="store_true",
+                        help="Also record run metrics on the configured OpenTelemetry meter provider")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Fetch and extract articles, then print the estimated LLM calls, tokens and cost "
+                             "without summarizing or writing digests")
+    args = parser.parse_args(argv)
+    if args.no_store and set(args.format) - {"txt"}:
+        parser.error("--format md/html/json is rendered from the digest store; drop --no-store")
+
+    topics = list(args.topics)
+    if args.topics_file:
+        with open(args.topics_file, encoding="utf-8") as f:
+            topics = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    # Keep order, drop repeated topics
+    args.topics = list(dict.fromkeys(topics))
+    return args
+
+def print_plan(plan: dict):
+    """Per-article and total LLM estimates for --dry-run"""
+    print(f"{'tokens':>8}{'calls':>7}  article")
+    for article in plan["articles"]:
+        print(f"{article['input_tokens']:>8}{article['llm_calls']:>7}  {article['title'][:70]}")
+    for model_name, usage in plan["models"].items():
+        print(f"{model_name}: {usage['llm_calls']} calls, {usage['prompt_tokens']} prompt + "
+              f"{usage['completion_tokens']} completion tokens")
+    print(f"Estimated cost: ${plan['estimated_cost_usd']:.4f} for {plan['llm_calls']} LLM calls "
+          f"(sentiment assumes no cache or local classifier hits)")
+
+def main(argv=None, llm=None):
+    """Run the CLI and return its run report (the plan with --dry-run);
+    `llm` replaces the Groq chat models (used by the offline benchmarks)"""
     load_dotenv()
-    topic = "AI Startups"
-
-    fetcher = NewsFetcher()
-    summarizer = ArticleSummarizer()
-    sentiment_analyzer = SentimentAnalyzer(model_name="llama3-8b-8192")
-    digest_generator = DailyDigestGenerator(topic)
-
-    # Get and process articles
-    raw_articles = fetcher.fetch_articles(query=topic, num_articles=5, days_back=1)
-    processed_articles = []
-
-    for article in raw_articles:
-        summary = summarizer.summarize(article)
-        sentiment = sentiment_analyzer.analyze(summary)
-        processed_articles.append({
-            "title": article['title'],
-            "source": article['source'],
-            "url": article['url'],
-            "summary": summary,
-            "sentiment": sentiment
-        })
-
-    # Generate and save digest
-    digest = digest_generator.generate(processed_articles)
-    print(digest)
-    filename = f"news_digest_{datetime.now(timezone.utc).strftime('%Y%m%d')}.txt"
-    # Open file with utf-8 encoding to support emojis
-    with open(filename, "w", encoding="utf-8") as f:
-        f.write(digest)
-    print(f"\nDigest saved to {filename}")
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s -%(levelname)s - %(message)s')
+    args = parse_args(argv)
+    recorder = instrumentation.start_run()
+
+    cache = ContentCache()
+    client = HttpClient(host_rates={"newsapi.org": 1.0}, cache=cache)
+    fetcher = NewsFetcher(client=client)
+    compressor = None
+    if args.extractive_budget:
+        # NumPy is only loaded when a pre-pass is requested
+        from src.extractive import ExtractiveCompressor
+        compressor = ExtractiveCompressor(max_tokens=args.extractive_budget)
+    local_classifier = None
+    if args.local_sentiment:
+        from src.local_sentiment import LexiconSentimentClassifier
+        local_classifier = LexiconSentimentClassifier()
+    parse_pool = ParsePool(args.parse_workers, timeout=args.parse_timeout) if args.parse_workers > 0 else None
+    summarizer = ArticleSummarizer(model_name=args.model, cache=cache, client=client, llm=llm,
+                                   compressor=compressor, overflow_model=args.overflow_model, parser=parse_pool,
+                                   change_threshold=args.change_threshold)
+    sentiment_analyzer = SentimentAnalyzer(
+        model_name="llama3-8b-8192", cache=cache, llm=llm,
+        local_classifier=local_classifier,
+        escalation_threshold=args.sentiment_threshold
+    )
+    pipeline = ArticlePipeline(summarizer, sentiment_analyzer, sentiment_batch_size=5)
+
+    # Fetch every topic, then process each unique article once
+    seen_index = SeenArticleIndex() if args.incremental and not args.dry_run else None
+    store = None if (args.no_store or args.dry_run) else DigestStore(args.store)
+    ranker = RelevanceRanker(args.overfetch) if args.overfetch > 1 else None
+    runner = BatchDigestRunner(fetcher, pipeline, seen_index=seen_index, store=store, ranker=ranker)
+    if args.dry_run:
+        plan = runner.plan(args.topics, num_articles=args.num_articles, days_back=args.days_back)
+        print_plan(plan)
+        if parse_pool:
+            parse_pool.close()
+        client.close()
+        cache.close()
+        return plan
+    digests = runner.run(args.topics, num_articles=args.num_articles, days_back=args.days_back)
+
+    # Save digests
+    date_str = datetime.now(timezone.utc).strftime('%Y%m%d')
+    os.makedirs(args.output_dir, exist_ok=True)
+    for topic, digest in digests.items():
+        print(digest)
+        for fmt in args.format:
+            if len(digests) == 1:
+                filename = f"news_digest_{date_str}.{FORMATS[fmt]}"
+            else:
+                filename = f"news_digest_{topic_slug(topic)}_{date_str}.{FORMATS[fmt]}"
+            filename = os.path.join(args.output_dir, filename)
+            content = digest
+            if fmt != "txt":
+                content = DailyDigestGenerator.from_store(store, digest_id=runner.digest_ids[topic], fmt=fmt)
+            # Open file with utf-8 encoding to support emojis
+            with open(filename, "w", encoding="utf-8") as f:
+                f.write(content)
+            print(f"\nDigest saved to {filename}")
+
+    stats_file = os.path.join(args.output_dir, f"digest_stats_{date_str}.json")
+    runner.write_stats(stats_file)
+    print(f"Run stats saved to {stats_file}")
+
+    report_file = args.report or os.path.join(args.output_dir, f"run_report_{date_str}.json")
+    report = recorder.write_report(report_file)
+    print(f"Run report saved to {report_file}")
+    if args.prometheus_textfile:
+        instrumentation.export_prometheus(report, path=args.prometheus_textfile)
+    if args.otel:
+        instrumentation.export_opentelemetry(report)
+    cache.log_stats()
+    if seen_index:
+        seen_index.close()
+    if store:
+        store.close()
+    if parse_pool:
+        parse_pool.close()
+    client.close()
+    cache.close()
+    return report
 
 if __name__ == "__main__":
     main()
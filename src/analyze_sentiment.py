@@ -1,24 +1,19 @@
 # 3 
 import os 
-from langchain_groq import ChatGroq
-from langchain.prompts import PromptTemplate
-from langchain_core.runnables import RunnablePassthrough
-from langchain.schema import StrOutputParser
+import re
+import json
+import math
+import functools
+from src.cache import content_hash
+from src.instrumentation import span
+from src.model_limits import estimate_tokens
 
+# LangChain and the Groq client are imported on first use of the chains
 
-class SentimentAnalyzer:
-    def __init__(self, model_name="llama3-70b-8192"):
-        self.groq_api_key = os.getenv("GROQ_API_KEY")
-        if not self.groq_api_key:
-            raise ValueError("GROQ_API_KEY not found in .env file")
-        
-        self.model = ChatGroq(
-            temperature=0.1,  # Lower temperature for classification
-            model_name=model_name,
-            api_key=self.groq_api_key
-        )
-        self.sentiment_prompt = PromptTemplate.from_template(
-            """Classify the sentiment of the following news summary as POSITIVE, NEGATIVE, or NEUTRAL.
+# Bump when sentiment_prompt or batch_prompt changes so cached labels are not reused
+SENTIMENT_PROMPT_VERSION = "1"
+
+SENTIMENT_TEMPLATE = """Classify the sentiment of the following news summary as POSITIVE, NEGATIVE, or NEUTRAL.
             Consider these guidelines:
             1. POSITIVE: Describes growth, success, breakthroughs, or favorable outcomes
             2. NEGATIVE: Describes failures, controversies, losses, or unfavorable outcomes
@@ -29,29 +24,259 @@ class SentimentAnalyzer:
             News Summary:
             {summary}
             Sentiment:"""
-        )
-        self.sentiment_chain = (
+
+BATCH_TEMPLATE = """Classify the sentiment of each numbered news summary below as POSITIVE, NEGATIVE, or NEUTRAL.
+            Consider these guidelines:
+            1. POSITIVE: Describes growth, success, breakthroughs, or favorable outcomes
+            2. NEGATIVE: Describes failures, controversies, losses, or unfavorable outcomes
+            3. NEUTRAL: Balanced reporting, announcements without clear positive/negative slant
+            
+            Respond ONLY with one line per summary, numbered 1 to {count}, in the form:
+            1: POSITIVE
+            
+            News Summaries:
+            {summaries}
+            Sentiments:"""
+
+class SentimentAnalyzer:
+    def __init__(self, model_name="llama3-70b-8192", max_concurrency: int = 4, cache=None, llm=None,
+                 local_classifier=None, escalation_threshold: float = 0.75, scheduler=None):
+        self.model_name = model_name
+        # Calls go through an LLMScheduler (the shared one unless `llm` is supplied)
+        self.scheduler = scheduler
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        # Optional CPU tier (e.g. LexiconSentimentClassifier); only summaries it
+        # labels with confidence below escalation_threshold reach the LLM
+        self.local_classifier = local_classifier
+        self.escalation_threshold = escalation_threshold
+        self.groq_api_key = os.getenv("GROQ_API_KEY")
+        # Caller-supplied chat model (e.g. the offline benchmark stand-in)
+        self._llm = llm
+        if llm is None and not self.groq_api_key:
+            raise ValueError("GROQ_API_KEY not found in .env file")
+
+    @functools.cached_property
+    def model(self):
+        if self._llm is not None and self.scheduler is None:
+            return self._llm
+        from src.llm_scheduler import get_llm_scheduler
+        from src.scheduled_model import ScheduledChatModel, groq_chat_model
+
+        scheduler = self.scheduler or get_llm_scheduler()
+        # Lower temperature for classification
+        model = self._llm or groq_chat_model(self.model_name, self.groq_api_key, temperature=0.1, scheduler=scheduler)
+        return ScheduledChatModel({self.model_name: model}, self.model_name, scheduler, completion_tokens=16)
+
+    @functools.cached_property
+    def sentiment_prompt(self):
+        from langchain_core.prompts import PromptTemplate
+
+        return PromptTemplate.from_template(SENTIMENT_TEMPLATE)
+
+    @functools.cached_property
+    def sentiment_chain(self):
+        from langchain_core.output_parsers import StrOutputParser
+        from langchain_core.runnables import RunnablePassthrough
+
+        return (
             {"summary": RunnablePassthrough()} 
             | self.sentiment_prompt
             | self.model
             | StrOutputParser()
         )
 
+    @functools.cached_property
+    def batch_prompt(self):
+        from langchain_core.prompts import PromptTemplate
+
+        return PromptTemplate.from_template(BATCH_TEMPLATE)
+
+    @functools.cached_property
+    def batch_chain(self):
+        from langchain_core.output_parsers import StrOutputParser
+
+        return self.batch_prompt | self.model | StrOutputParser()
+
+    def plan(self, summary_tokens: list[int], batch_size: int = 1) -> dict:
+        """Estimate the LLM calls and tokens needed to classify summaries of the given sizes.
+
+        Cached and locally classified labels cannot be known before the
+        summaries exist, so this is an upper bound.
+        """
+        if not summary_tokens:
+            return {"llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        if batch_size > 1:
+            calls = math.ceil(len(summary_tokens) / batch_size)
+            template_tokens = estimate_tokens(BATCH_TEMPLATE)
+        else:
+            calls = len(summary_tokens)
+            template_tokens = estimate_tokens(SENTIMENT_TEMPLATE)
+        return {"llm_calls": calls, "prompt_tokens": calls * template_tokens + sum(summary_tokens),
+                "completion_tokens": 4 * len(summary_tokens)}
+
     def analyze(self, summary: str) -> str:
         """Analyze sentiment of a news summary"""
-        if "unavailable" in summary.lower() or len(summary) < 20:
-            return "NEUTRAL"
+        results, pending = self._resolve_known([summary])
+        if not pending:
+            return results[0]
         
         try:
-            sentiment = self.sentiment_chain.invoke(summary)
-            # Clean and standardize the output
-            sentiment = sentiment.strip().upper()
-            if "POSITIVE" in sentiment:
-                return "POSITIVE"
-            elif "NEGATIVE" in sentiment:
-                return "NEGATIVE"
+            with span("analyze", items=1):
+                sentiment = self.sentiment_chain.invoke(summary)
+            return self._store(summary, self._normalize(sentiment))
+        except Exception as e:
+            print(f"Sentiment analysis failed: {str(e)}")
             return "NEUTRAL"
+
+    def analyze_batch(self, summaries: list[str], batch_size: int = 10) -> list[str]:
+        """Classify many summaries with one LLM call per batch of `batch_size`.
+
+        Items missing or malformed in the batch response are re-run one at a time.
+        """
+        results, pending = self._resolve_known(summaries)
+
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            if len(batch) == 1:
+                results[batch[0]] = self.analyze(summaries[batch[0]])
+                continue
+
+            numbered = "\n\n".join(
+                f"[{slot}] {summaries[i].strip()}" for slot, i in enumerate(batch, 1)
+            )
+            try:
+                with span("analyze", items=len(batch)):
+                    response = self.batch_chain.invoke({"count": len(batch), "summaries": numbered})
+                labels = self._parse_batch(response)
+            except Exception as e:
+                print(f"Batch sentiment analysis failed: {str(e)}")
+                labels = {}
+
+            for slot, i in enumerate(batch, 1):
+                if slot in labels:
+                    results[i] = self._store(summaries[i], labels[slot])
+                else:
+                    results[i] = self.analyze(summaries[i])
+        return results
+
+    @staticmethod
+    def _parse_batch(response: str) -> dict[int, str]:
+        """Parse a batch response given as JSON or as numbered lines"""
+        labels = {}
+        match = re.search(r"[\[{].*[\]}]", response, re.DOTALL)
+        if match:
+            try:
+                data = json.loads(match.group(0))
+                if isinstance(data, dict):
+                    data = data.items()
+                elif isinstance(data, list):
+                    data = enumerate(data, 1)
+                for key, value in data:
+                    label = str(value).strip().upper()
+                    if label in ("POSITIVE", "NEGATIVE", "NEUTRAL"):
+                        labels[int(key)] = label
+            except (ValueError, TypeError):
+                labels = {}
+            if labels:
+                return labels
+
+        for line in response.splitlines():
+            found = re.match(
+                r"\s*\[?(\d+)\]?\s*[:.)\-]?\s*\**(POSITIVE|NEGATIVE|NEUTRAL)\b",
+                line,
+                re.IGNORECASE
+            )
+            if found:
+                labels.setdefault(int(found.group(1)), found.group(2).upper())
+        return labels
+
+    async def aanalyze(self, summary: str) -> str:
+        """Async variant of analyze"""
+        results, pending = self._resolve_known([summary])
+        if not pending:
+            return results[0]
+
+        try:
+            with span("analyze", items=1):
+                sentiment = await self.sentiment_chain.ainvoke(summary)
+            return self._store(summary, self._normalize(sentiment))
         except Exception as e:
             print(f"Sentiment analysis failed: {str(e)}")
             return "NEUTRAL"
 
+    async def aanalyze_many(self, summaries: list[str]) -> list[str]:
+        """Classify several summaries concurrently, bounded by max_concurrency"""
+        results, pending = self._resolve_known(summaries)
+        if not pending:
+            return results
+
+        with span("analyze", items=len(pending)):
+            outputs = await self.sentiment_chain.abatch(
+                [summaries[i] for i in pending],
+                config={"max_concurrency": self.max_concurrency},
+                return_exceptions=True
+            )
+        for i, output in zip(pending, outputs):
+            if isinstance(output, Exception):
+                print(f"Sentiment analysis failed: {str(output)}")
+                continue
+            results[i] = self._store(summaries[i], self._normalize(output))
+        return results
+
+    def _resolve_known(self, summaries: list[str]):
+        """Fill in skipped, cached and confident local labels; return (results, indices still to classify)"""
+        results = ["NEUTRAL"] * len(summaries)
+        pending = []
+        for i, summary in enumerate(summaries):
+            if self._skip(summary):
+                continue
+            cached = self._cached(summary)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append(i)
+        if self.local_classifier and pending:
+            pending = self._classify_locally(summaries, results, pending)
+        return results, pending
+
+    def _classify_locally(self, summaries: list[str], results: list[str], pending: list[int]) -> list[int]:
+        """Keep confident local labels in `results`; return the indices to escalate to the LLM"""
+        with span("classify_local", items=len(pending)) as local_span:
+            predictions = self.local_classifier.classify_batch([summaries[i] for i in pending])
+            escalate = []
+            for i, (label, confidence) in zip(pending, predictions):
+                if confidence >= self.escalation_threshold:
+                    results[i] = label
+                else:
+                    escalate.append(i)
+            local_span.add("escalated", len(escalate))
+        return escalate
+
+    def _cache_key(self, summary: str) -> str:
+        return content_hash(summary, self.model_name, SENTIMENT_PROMPT_VERSION)
+
+    def _cached(self, summary: str):
+        if not self.cache:
+            return None
+        return self.cache.get("sentiment", self._cache_key(summary))
+
+    def _store(self, summary: str, sentiment: str) -> str:
+        if self.cache:
+            self.cache.set("sentiment", self._cache_key(summary), sentiment)
+        return sentiment
+
+    @staticmethod
+    def _skip(summary: str) -> bool:
+        """Summaries that are placeholders or too short are treated as neutral"""
+        return "unavailable" in summary.lower() or len(summary) < 20
+
+    @staticmethod
+    def _normalize(sentiment: str) -> str:
+        # Clean and standardize the output
+        sentiment = sentiment.strip().upper()
+        if "POSITIVE" in sentiment:
+            return "POSITIVE"
+        elif "NEGATIVE" in sentiment:
+            return "NEGATIVE"
+        return "NEUTRAL"
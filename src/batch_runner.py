@@ -0,0 +1,180 @@
+import re
+import json
+import time
+import logging
+
+from src.dedup import deduplicate
+from src.instrumentation import get_recorder
+from src.digest_generator import DailyDigestGenerator
+from src.model_limits import SUMMARY_TOKENS_ESTIMATE, estimate_cost
+
+
+def topic_slug(topic: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", topic.lower()).strip("_") or "topic"
+
+
+class BatchDigestRunner:
+    """Build digests for many topics while doing each article's work once.
+
+    Every topic gets its own NewsAPI query, but articles are merged by URL
+    across topics so each unique article is extracted, summarized and
+    classified a single time before the per-topic digests are rendered.
+    With a `seen_index`, topics are fetched incrementally: only articles not
+    processed by an earlier run are pulled, and topics with nothing new get
+    no digest; each topic searches only from its previous run's request time,
+    newest first. With a `store` (DigestStore), every digest and its articles are
+    saved, and their ids are left in self.digest_ids. With a `ranker`
+    (RelevanceRanker), each topic over-fetches candidates and only the best
+    `num_articles` of them are processed. Each topic's stats count the LLM
+    calls its own articles caused, and the calls it avoided by sharing
+    articles processed for an earlier topic.
+    """
+    def __init__(self, fetcher, pipeline, seen_index=None, store=None, ranker=None):
+        self.fetcher = fetcher
+        self.pipeline = pipeline
+        self.seen_index = seen_index
+        self.store = store
+        self.ranker = ranker
+        self.stats = {}
+        self.digest_ids = {}
+        # Per topic, the (from, to, narrowed) window of this run's incremental search; `to` is the next watermark
+        self._windows = {}
+
+    def run(self, topics: list[str], num_articles: int = 5, days_back: int = 1) -> dict[str, str]:
+        """Return {topic: digest}; per-topic statistics are left in self.stats"""
+        started = time.perf_counter()
+        self.digest_ids = {}
+        topic_urls, unique = self.fetch(topics, num_articles, days_back)
+
+        # Process each unique article once, across all topics concurrently
+        process_start = time.perf_counter()
+        urls = list(unique)
+        processed = dict(zip(urls, self.pipeline.run([unique[url] for url in urls])))
+        self.stats["unique_articles"] = len(urls)
+        self.stats["process_seconds"] = round(time.perf_counter() - process_start, 3)
+
+        # LLM calls per article, as attributed by the pipeline, charged to the topic that processed it
+        recorder = get_recorder()
+        calls = {url: recorder.usage(url)["calls"] for url in urls}
+        owner = {}
+        for topic in topics:
+            for url in topic_urls[topic]:
+                owner.setdefault(url, topic)
+        for topic in topics:
+            own = [url for url in topic_urls[topic] if owner[url] == topic]
+            shared = [url for url in topic_urls[topic] if owner[url] != topic]
+            self.stats["topics"][topic]["llm_calls"] = round(sum(calls[url] for url in own), 2)
+            self.stats["topics"][topic]["llm_calls_avoided"] = round(sum(calls[url] for url in shared), 2)
+
+        # Render one digest per topic from the shared results
+        digests = {}
+        for topic in topics:
+            if self.seen_index and not topic_urls[topic]:
+                logging.info(f"No new articles for '{topic}'")
+                continue
+            render_start = time.perf_counter()
+            articles = [processed[url] for url in topic_urls[topic]]
+            digests[topic] = DailyDigestGenerator(topic).generate(articles)
+            self.stats["topics"][topic]["render_seconds"] = round(time.perf_counter() - render_start, 4)
+            if self.store:
+                self.digest_ids[topic] = self.store.save_digest(topic, articles, run_id=get_recorder().run_id)
+
+        # Only a completed run moves the seen index forward
+        if self.seen_index:
+            for topic in digests:
+                seen = []
+                for url in topic_urls[topic]:
+                    seen.append(unique[url])
+                    seen.extend(unique[url].get('also_reported_by') or [])
+                self.seen_index.record_run(topic, seen, until=self._windows[topic][1])
+
+        self.stats["total_seconds"] = round(time.perf_counter() - started, 3)
+        logging.info(
+            f"Built {len(digests)} digests from {len(urls)} unique articles "
+            f"in {self.stats['total_seconds']}s"
+        )
+        return digests
+
+    def fetch(self, topics: list[str], num_articles: int = 5, days_back: int = 1):
+        """Fetch every topic, merging articles by URL.
+
+        Returns ({topic: [url, ...]}, {url: article}) and resets self.stats.
+        """
+        topic_urls = {}
+        unique = {}
+        self.stats = {"topics": {}}
+
+        # Fetch every topic, merging articles by URL
+        for topic in topics:
+            fetch_start = time.perf_counter()
+            requests_before = self.fetcher.request_count
+            articles = deduplicate(self._fetch(topic, num_articles, days_back))
+            candidates = len(articles)
+            if self.ranker:
+                articles = self.ranker.rank(topic, articles, num_articles)
+            owned = 0
+            for article in articles:
+                if article['url'] not in unique:
+                    unique[article['url']] = article
+                    owned += 1
+            topic_urls[topic] = [article['url'] for article in articles]
+            self.stats["topics"][topic] = {
+                "newsapi_calls": self.fetcher.request_count - requests_before,
+                "fetch_seconds": round(time.perf_counter() - fetch_start, 3),
+                "candidates": candidates,
+                "articles": len(articles),
+                "processed": owned,
+                "shared_with_earlier_topics": len(articles) - owned,
+            }
+        return topic_urls, unique
+
+    def plan(self, topics: list[str], num_articles: int = 5, days_back: int = 1) -> dict:
+        """Fetch and extract like `run`, but only estimate the LLM calls, tokens and cost.
+
+        No digest is rendered and the seen index is left untouched.
+        """
+        topic_urls, unique = self.fetch(topics, num_articles, days_back)
+        articles = self.pipeline.plan(list(unique.values()))
+
+        summarizer = self.pipeline.summarizer
+        sentiment_analyzer = self.pipeline.sentiment_analyzer
+        summary_tokens = [SUMMARY_TOKENS_ESTIMATE] * len(articles)
+        models = {}
+        for model_name, estimate in (
+            (summarizer.model_name, {key: sum(article[key] for article in articles)
+                                     for key in ("llm_calls", "prompt_tokens", "completion_tokens")}),
+            (sentiment_analyzer.model_name,
+             sentiment_analyzer.plan(summary_tokens, batch_size=self.pipeline.sentiment_batch_size)),
+        ):
+            usage = models.setdefault(model_name, {"llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+            for key, value in estimate.items():
+                usage[key] += value
+        cost = 0.0
+        for model_name, usage in models.items():
+            model_cost = estimate_cost(model_name, usage["prompt_tokens"], usage["completion_tokens"])
+            if model_cost is not None:
+                usage["cost_usd"] = round(model_cost, 6)
+                cost += usage["cost_usd"]
+
+        return {
+            "topics": {topic: len(urls) for topic, urls in topic_urls.items()},
+            "articles": articles,
+            "models": models,
+            "llm_calls": sum(usage["llm_calls"] for usage in models.values()),
+            "estimated_cost_usd": round(cost, 6),
+        }
+
+    def _fetch(self, topic: str, num_articles: int, days_back: int) -> list[dict]:
+        if self.ranker:
+            num_articles = self.ranker.candidates(num_articles)
+        if self.seen_index:
+            window = self._windows[topic] = self.fetcher.window(days_back, self.seen_index.watermark(topic))
+            return list(self.fetcher.iter_articles(
+                query=topic, num_articles=num_articles, days_back=days_back,
+                seen_index=self.seen_index, incremental=True, window=window
+            ))
+        return self.fetcher.fetch_articles(query=topic, num_articles=num_articles, days_back=days_back)
+
+    def write_stats(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.stats, f, indent=2)
@@ -0,0 +1,115 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+
+def content_hash(*parts) -> str:
+    """Stable SHA-256 key over one or more string parts"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class ContentCache:
+    """On-disk SQLite cache for extracted text, summaries and sentiments.
+
+    Entries are grouped by namespace ("extract", "summary", "sentiment", ...), expire
+    after `ttl_seconds`, and the least recently used entries are evicted once
+    the store holds more than `max_entries`.
+    """
+    def __init__(self, path: str = None, ttl_seconds: int = 7 * 24 * 3600, max_entries: int = 20000):
+        self.path = path or os.getenv("NEWS_DIGEST_CACHE", os.path.join(".cache", "news_digest.sqlite"))
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = {}
+        self.misses = {}
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+        self._conn.commit()
+
+    def get(self, namespace: str, key: str):
+        """Return the cached value, or None on a miss or expired entry"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM cache WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses[namespace] = self.misses.get(namespace, 0) + 1
+                return None
+            self._conn.execute(
+                "UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, namespace, key)
+            )
+            self._conn.commit()
+            self.hits[namespace] = self.hits.get(namespace, 0) + 1
+            return row[0]
+
+    def set(self, namespace: str, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, value, now, now)
+            )
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._evict(now)
+            self._conn.commit()
+
+    def evict(self):
+        """Drop expired entries and trim the store down to max_entries"""
+        with self._lock:
+            self._evict(time.time())
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        self._conn.execute("DELETE FROM cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM cache WHERE rowid IN "
+                "(SELECT rowid FROM cache ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def stats(self) -> dict:
+        """Hit/miss counters per namespace"""
+        namespaces = sorted(set(self.hits) | set(self.misses))
+        return {
+            ns: {"hits": self.hits.get(ns, 0), "misses": self.misses.get(ns, 0)}
+            for ns in namespaces
+        }
+
+    def log_stats(self):
+        for ns, counts in self.stats().items():
+            logging.info(f"Cache {ns}: {counts['hits']} hits, {counts['misses']} misses")
+
+    def close(self):
+        with self._lock:
+            self._evict(time.time())
+            self._conn.commit()
+            self._conn.close()
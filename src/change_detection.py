@@ -0,0 +1,95 @@
+import re
+import json
+from difflib import SequenceMatcher
+from dataclasses import dataclass, field
+
+from src.cache import content_hash
+
+# Paragraphs are separated by blank lines, as FullTextExtractor.parse_html emits them
+PARAGRAPH_RE = re.compile(r"\n\s*\n")
+# Hex digits kept from each paragraph's SHA-256
+FINGERPRINT_CHARS = 16
+
+
+def paragraphs(text: str) -> list[str]:
+    return [paragraph.strip() for paragraph in PARAGRAPH_RE.split(text) if paragraph.strip()]
+
+
+def fingerprint(paragraph: str) -> str:
+    """Hash of a paragraph that ignores case and whitespace, so reflowed text is not a change"""
+    return content_hash(" ".join(paragraph.lower().split()))[:FINGERPRINT_CHARS]
+
+
+@dataclass
+class ContentChange:
+    """How an article's text differs from the version it was last summarized from"""
+    # Share of characters in inserted, replaced or deleted paragraphs (0 = unchanged, 1 = rewritten)
+    share: float
+    # New or rewritten paragraphs of the current text, in order
+    changed: list[str] = field(default_factory=list)
+    removed: int = 0
+
+
+@dataclass
+class ArticleVersion:
+    """The paragraph fingerprints of a summarized text and the summary written from it"""
+    fingerprints: list[str]
+    lengths: list[int]
+    summary: str
+
+    @classmethod
+    def of(cls, text: str, summary: str) -> "ArticleVersion":
+        parts = paragraphs(text)
+        return cls([fingerprint(part) for part in parts], [len(part) for part in parts], summary)
+
+    @classmethod
+    def loads(cls, value: str) -> "ArticleVersion":
+        data = json.loads(value)
+        return cls(data["fingerprints"], data["lengths"], data["summary"])
+
+    def dumps(self) -> str:
+        return json.dumps({"fingerprints": self.fingerprints, "lengths": self.lengths, "summary": self.summary})
+
+    def diff(self, text: str) -> ContentChange:
+        """Compare `text` against this version paragraph by paragraph"""
+        parts = paragraphs(text)
+        fingerprints = [fingerprint(part) for part in parts]
+        matcher = SequenceMatcher(None, self.fingerprints, fingerprints, autojunk=False)
+        changed, changed_chars, removed = [], 0, 0
+        for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+            if tag == "equal":
+                continue
+            changed.extend(parts[new_start:new_end])
+            changed_chars += sum(self.lengths[old_start:old_end])
+            changed_chars += sum(len(part) for part in parts[new_start:new_end])
+            removed += old_end - old_start
+        total = sum(self.lengths) + sum(len(part) for part in parts)
+        return ContentChange(changed_chars / total if total else 0.0, changed, removed)
+
+
+class ChangeTracker:
+    """Remembers, per URL and model, which text the last summary was written from.
+
+    When a URL comes back, its text is compared paragraph by paragraph with
+    that version. Edits below `threshold` (a share of characters) keep the
+    old summary; larger ones call for an update. Versions are stored in the
+    ContentCache under the "version" namespace.
+    """
+    def __init__(self, cache, threshold: float = 0.2):
+        self.cache = cache
+        self.threshold = threshold
+
+    @staticmethod
+    def _key(url: str, model_name: str, prompt_version: str) -> str:
+        return content_hash(url, model_name, prompt_version)
+
+    def get(self, url: str, model_name: str, prompt_version: str):
+        value = self.cache.get("version", self._key(url, model_name, prompt_version))
+        return ArticleVersion.loads(value) if value is not None else None
+
+    def record(self, url: str, model_name: str, prompt_version: str, text: str, summary: str):
+        version = ArticleVersion.of(text, summary)
+        self.cache.set("version", self._key(url, model_name, prompt_version), version.dumps())
+
+    def is_material(self, change: ContentChange) -> bool:
+        return bool(change.changed or change.removed) and change.share >= self.threshold
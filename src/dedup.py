@@ -0,0 +1,110 @@
+import re
+import hashlib
+import logging
+
+from src.text_cleaning import TITLE_SUFFIX_RE, TRUNCATION_RE
+
+# 61-bit Mersenne prime for the MinHash permutations
+_PRIME = (1 << 61) - 1
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class MinHasher:
+    """MinHash signatures over word shingles, for estimating Jaccard similarity"""
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 1):
+        self.shingle_size = shingle_size
+        self.permutations = []
+        for i in range(num_perm):
+            digest = hashlib.blake2b(f"{seed}:{i}".encode(), digest_size=16).digest()
+            a = int.from_bytes(digest[:8], "big") % _PRIME or 1
+            b = int.from_bytes(digest[8:], "big") % _PRIME
+            self.permutations.append((a, b))
+
+    def shingles(self, text: str) -> set[int]:
+        words = _WORD_RE.findall(text.lower())
+        if len(words) < self.shingle_size:
+            grams = [" ".join(words)] if words else []
+        else:
+            grams = [" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)]
+        return {
+            int.from_bytes(hashlib.blake2b(gram.encode(), digest_size=8).digest(), "big")
+            for gram in grams
+        }
+
+    def signature(self, text: str) -> tuple:
+        shingles = self.shingles(text)
+        if not shingles:
+            return ()
+        return tuple(
+            min((a * h + b) % _PRIME for h in shingles)
+            for a, b in self.permutations
+        )
+
+    @staticmethod
+    def similarity(left: tuple, right: tuple) -> float:
+        if not left or not right:
+            return 0.0
+        return sum(x == y for x, y in zip(left, right)) / len(left)
+
+
+def _fingerprint_text(article: dict) -> str:
+    """Title plus NewsAPI snippet, with the truncation marker removed"""
+    content = TRUNCATION_RE.sub("", article.get("content") or "")
+    return f"{article.get('title') or ''} {content}"
+
+
+def _normalized_title(article: dict) -> str:
+    # Drop a trailing " - Source Name" suffix that syndicators append
+    title = TITLE_SUFFIX_RE.sub("", article.get("title") or "")
+    return " ".join(_WORD_RE.findall(title.lower()))
+
+
+def cluster_articles(articles: list[dict], threshold: float = 0.6, hasher: MinHasher = None) -> list[list[int]]:
+    """Group indices of near-duplicate articles; clusters keep the input order"""
+    hasher = hasher or MinHasher()
+    signatures = [hasher.signature(_fingerprint_text(article)) for article in articles]
+    titles = [_normalized_title(article) for article in articles]
+
+    parent = list(range(len(articles)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i in range(len(articles)):
+        for j in range(i + 1, len(articles)):
+            same_title = titles[i] and titles[i] == titles[j]
+            if same_title or MinHasher.similarity(signatures[i], signatures[j]) >= threshold:
+                root_i, root_j = find(i), find(j)
+                if root_i != root_j:
+                    # The earlier (more relevant) article stays the representative
+                    parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    clusters = {}
+    for i in range(len(articles)):
+        clusters.setdefault(find(i), []).append(i)
+    return [clusters[root] for root in sorted(clusters)]
+
+
+def deduplicate(articles: list[dict], threshold: float = 0.6) -> list[dict]:
+    """Keep one representative per near-duplicate cluster.
+
+    The representative is the first article of its cluster in NewsAPI's relevancy
+    order; the others are listed under its `also_reported_by` key.
+    """
+    clusters = cluster_articles(articles, threshold)
+    unique = []
+    for cluster in clusters:
+        representative = dict(articles[cluster[0]])
+        duplicates = [articles[i] for i in cluster[1:]]
+        if duplicates:
+            representative["also_reported_by"] = [
+                {"source": duplicate["source"], "url": duplicate["url"]} for duplicate in duplicates
+            ]
+        unique.append(representative)
+
+    if len(unique) < len(articles):
+        logging.info(f"Collapsed {len(articles)} articles into {len(unique)} unique stories")
+    return unique
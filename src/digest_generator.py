@@ -1,58 +1,187 @@
-# 4 
+# 4
 
+import html
+import json
+import bisect
 from datetime import datetime, timezone
+from src.instrumentation import span
 
-class DailyDigestGenerator:
-    def __init__(self, topic: str):
+SENTIMENT_EMOJI = {"POSITIVE": "🔥", "NEGATIVE": "⚡"}
+
+# Output formats and their file extensions
+FORMATS = {"txt": "txt", "md": "md", "html": "html", "json": "json"}
+
+
+class DigestBuilder:
+    """Build a digest one article at a time.
+
+    Each added article is rendered into its takeaway and source lines right
+    away and the sentiment counts are updated in place, so `render()` can
+    produce a partial digest at any point. Articles may arrive in any order;
+    `position` keeps them in their original order in the output. `render`
+    produces the plain-text digest, or Markdown, HTML or JSON with `fmt`.
+    """
+    def __init__(self, topic: str, date_str: str = None):
         self.topic = topic
+        self.date_str = date_str or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        self.sentiment_counts = {"POSITIVE": 0, "NEGATIVE": 0, "NEUTRAL": 0}
+        self._entries = []
+
+    def __len__(self):
+        return len(self._entries)
 
-    def generate(self, articles: list[dict]) -> str:
-        date_str = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-
-        # Count sentiment distribution
-        sentiment_counts = {"POSITIVE": 0, "NEGATIVE": 0, "NEUTRAL": 0}
-        for article in articles:
-            sentiment = article.get('sentiment', 'NEUTRAL')
-            sentiment_counts.setdefault(sentiment, 0)
-            sentiment_counts[sentiment] += 1
-
-        # Create sentiment summary
-        sentiment_summary = (
-            f"🔥 {sentiment_counts['POSITIVE']} Positive | "
-            f"⚠️ {sentiment_counts['NEUTRAL']} Neutral | "
-            f"⚡ {sentiment_counts['NEGATIVE']} Negative"
+    def add(self, article: dict, position: int = None):
+        sentiment = article.get('sentiment', 'NEUTRAL')
+        self.sentiment_counts.setdefault(sentiment, 0)
+        self.sentiment_counts[sentiment] += 1
+
+        position = len(self._entries) if position is None else position
+        bisect.insort(
+            self._entries, (position, self.takeaway(article), self.source_lines(article), article),
+            key=lambda entry: entry[0]
         )
 
-        # Create key takeaways
-        takeaways = []
-        for article in articles:
-            emoji = (
-                "🔥" if article['sentiment'] == "POSITIVE" else
-                "⚡" if article['sentiment'] == "NEGATIVE" else
-                "⚠️"
-            )
-            takeaways.append(
-                f"{emoji} {article['title']} ({article['sentiment']})\n"
-                f"   - {article['summary']}\n"
-                f"   - Source: {article['source']}"
-            )
-        # Generate digest
+    @staticmethod
+    def takeaway(article: dict) -> str:
+        emoji = SENTIMENT_EMOJI.get(article['sentiment'], "⚠️")
+        takeaway = (
+            f"{emoji} {article['title']} ({article['sentiment']})\n"
+            f"   - {article['summary']}\n"
+            f"   - Source: {article['source']}"
+        )
+        also = article.get('also_reported_by') or []
+        if also:
+            takeaway += "\n   - Also reported by: " + ", ".join(other['source'] for other in also)
+        return takeaway
+
+    @staticmethod
+    def source_lines(article: dict) -> list[str]:
+        """SOURCES lines after the [n] prefix: the article URL, then its syndicated copies"""
+        return [article['url']] + [f"    also: {other['url']}" for other in article.get('also_reported_by') or []]
+
+    @property
+    def articles(self) -> list[dict]:
+        return [article for *_, article in self._entries]
+
+    def render(self, fmt: str = "txt") -> str:
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown digest format: {fmt}")
+        if fmt == "md":
+            return self.render_markdown()
+        if fmt == "html":
+            return self.render_html()
+        if fmt == "json":
+            return self.render_json()
+        return self.render_text()
+
+    def counts_line(self) -> str:
+        counts = self.sentiment_counts
+        return (
+            f"🔥 {counts['POSITIVE']} Positive | "
+            f"⚠️ {counts['NEUTRAL']} Neutral | "
+            f"⚡ {counts['NEGATIVE']} Negative"
+        )
+
+    def render_text(self) -> str:
         lines = [
             f"DAILY NEWS DIGEST: {self.topic.upper()}",
-            f"Date: {date_str}",
-            f"Articles: {len(articles)}", 
-            sentiment_summary,
+            f"Date: {self.date_str}",
+            f"Articles: {len(self._entries)}",
+            self.counts_line(),
             "",
             "KEY TAKEAWAYS:"
         ]
-        for tk in takeaways:
-            lines.append(f"• {tk}")
+        for _, takeaway, _, _ in self._entries:
+            lines.append(f"• {takeaway}")
         lines.append("")
         lines.append("SOURCES:")
-        for i, article in enumerate(articles, 1):
-            lines.append(f"[{i}] {article['url']}")
+        for i, (_, _, sources, _) in enumerate(self._entries, 1):
+            lines.append(f"[{i}] {sources[0]}")
+            lines.extend(sources[1:])
 
         return "\n".join(lines)
 
+    def render_markdown(self) -> str:
+        lines = [
+            f"# Daily News Digest: {self.topic}",
+            "",
+            f"**Date:** {self.date_str} · **Articles:** {len(self._entries)} · {self.counts_line()}",
+            "",
+            "## Key Takeaways",
+        ]
+        for article in self.articles:
+            emoji = SENTIMENT_EMOJI.get(article['sentiment'], "⚠️")
+            lines += [
+                "",
+                f"### {emoji} [{article['title']}]({article['url']}) ({article['sentiment']})",
+                "",
+                article['summary'],
+                "",
+                f"*Source: {article['source']}*",
+            ]
+            also = article.get('also_reported_by') or []
+            if also:
+                lines.append("*Also reported by:* " + ", ".join(
+                    f"[{other['source']}]({other['url']})" for other in also
+                ))
+        return "\n".join(lines) + "\n"
+
+    def render_html(self) -> str:
+        escape = html.escape
+        parts = [
+            "<!DOCTYPE html>",
+            '<html lang="en">',
+            f"<head><meta charset=\"utf-8\"><title>Daily News Digest: {escape(self.topic)}</title></head>",
+            "<body>",
+            f"<h1>Daily News Digest: {escape(self.topic)}</h1>",
+            f"<p>Date: {escape(self.date_str)} &middot; Articles: {len(self._entries)} &middot; "
+            f"{escape(self.counts_line())}</p>",
+            "<h2>Key Takeaways</h2>",
+        ]
+        for article in self.articles:
+            emoji = SENTIMENT_EMOJI.get(article['sentiment'], "⚠️")
+            parts.append(f"<article class=\"{escape(article['sentiment'].lower())}\">")
+            parts.append(
+                f"<h3>{emoji} <a href=\"{escape(article['url'])}\">{escape(article['title'])}</a> "
+                f"({escape(article['sentiment'])})</h3>"
+            )
+            parts += [f"<p>{escape(paragraph)}</p>" for paragraph in article['summary'].split("\n\n") if paragraph.strip()]
+            source = f"<p><em>Source: {escape(article['source'])}</em>"
+            also = article.get('also_reported_by') or []
+            if also:
+                source += " &middot; Also reported by: " + ", ".join(
+                    f"<a href=\"{escape(other['url'])}\">{escape(other['source'])}</a>" for other in also
+                )
+            parts += [source + "</p>", "</article>"]
+        parts += ["</body>", "</html>"]
+        return "\n".join(parts) + "\n"
+
+    def render_json(self) -> str:
+        return json.dumps({
+            "topic": self.topic,
+            "date": self.date_str,
+            "sentiment_counts": self.sentiment_counts,
+            "articles": self.articles,
+        }, indent=2, ensure_ascii=False)
+
+
+class DailyDigestGenerator:
+    def __init__(self, topic: str, date_str: str = None):
+        self.topic = topic
+        self.date_str = date_str
+
+    def generate(self, articles: list[dict], fmt: str = "txt") -> str:
+        with span("generate", items=len(articles)):
+            builder = DigestBuilder(self.topic, date_str=self.date_str)
+            for article in articles:
+                builder.add(article)
+            return builder.render(fmt)
 
-        
\ No newline at end of file
+    @classmethod
+    def from_store(cls, store, topic: str = None, digest_id: int = None, day: str = None,
+                   fmt: str = "txt") -> str:
+        """Re-render a saved digest (by id, or the latest for a topic and day) without any LLM calls"""
+        digest = store.get_digest(digest_id) if digest_id is not None else store.latest_digest(topic, day=day)
+        if digest is None:
+            raise LookupError(f"No stored digest for {topic or digest_id}" + (f" on {day}" if day else ""))
+        return cls(digest["topic"], date_str=digest["day"]).generate(digest["articles"], fmt)
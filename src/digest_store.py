@@ -0,0 +1,268 @@
+import os
+import sys
+import json
+import time
+import argparse
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+from src.cache import content_hash
+
+LABELS = ("POSITIVE", "NEUTRAL", "NEGATIVE")
+
+
+class DigestStore:
+    """Persistent history of every processed article and generated digest.
+
+    Articles are stored once per distinct (url, summary, sentiment), and each
+    digest keeps its topic, UTC day and ordered article list, so any past
+    digest can be re-rendered in any format and trends queried without
+    re-running the pipeline. Indexed by topic, day and sentiment.
+    """
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv("NEWS_DIGEST_STORE", os.path.join(".cache", "digests.sqlite"))
+        self._lock = threading.Lock()
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY,
+                key TEXT NOT NULL UNIQUE,
+                url TEXT NOT NULL,
+                title TEXT NOT NULL,
+                source TEXT,
+                published TEXT,
+                summary TEXT NOT NULL,
+                sentiment TEXT NOT NULL,
+                also_reported_by TEXT,
+                stored_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS digests (
+                id INTEGER PRIMARY KEY,
+                topic TEXT NOT NULL,
+                topic_key TEXT NOT NULL,
+                day TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                run_id TEXT
+            );
+            CREATE TABLE IF NOT EXISTS digest_articles (
+                digest_id INTEGER NOT NULL REFERENCES digests(id),
+                position INTEGER NOT NULL,
+                article_id INTEGER NOT NULL REFERENCES articles(id),
+                PRIMARY KEY (digest_id, position)
+            );
+            CREATE INDEX IF NOT EXISTS articles_url ON articles (url);
+            CREATE INDEX IF NOT EXISTS articles_sentiment ON articles (sentiment);
+            CREATE INDEX IF NOT EXISTS digests_topic_day ON digests (topic_key, day);
+            CREATE INDEX IF NOT EXISTS digests_day ON digests (day);
+            CREATE INDEX IF NOT EXISTS digest_articles_article ON digest_articles (article_id);"""
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _key(topic: str) -> str:
+        return " ".join(topic.lower().split())
+
+    def save_digest(self, topic: str, articles: list[dict], run_id: str = None, created_at: float = None) -> int:
+        """Store a digest and its processed articles, in order; returns the digest id"""
+        created_at = created_at or time.time()
+        day = datetime.fromtimestamp(created_at, timezone.utc).strftime("%Y-%m-%d")
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO digests (topic, topic_key, day, created_at, run_id) VALUES (?, ?, ?, ?, ?)",
+                (topic, self._key(topic), day, created_at, run_id)
+            )
+            digest_id = cursor.lastrowid
+            rows = []
+            for position, article in enumerate(articles):
+                rows.append((digest_id, position, self._article_id(article, created_at)))
+            self._conn.executemany(
+                "INSERT INTO digest_articles (digest_id, position, article_id) VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+        return digest_id
+
+    def _article_id(self, article: dict, stored_at: float) -> int:
+        key = content_hash(article['url'], article['summary'], article['sentiment'])
+        row = self._conn.execute("SELECT id FROM articles WHERE key = ?", (key,)).fetchone()
+        if row:
+            return row[0]
+        also = article.get('also_reported_by')
+        return self._conn.execute(
+            "INSERT INTO articles (key, url, title, source, published, summary, sentiment, also_reported_by, "
+            "stored_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, article['url'], article['title'], article.get('source'), article.get('published'),
+             article['summary'], article['sentiment'], json.dumps(also) if also else None, stored_at)
+        ).lastrowid
+
+    def get_digest(self, digest_id: int):
+        """{id, topic, day, created_at, run_id, articles} for a stored digest, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, topic, day, created_at, run_id FROM digests WHERE id = ?", (digest_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            articles = self._conn.execute(
+                "SELECT a.url, a.title, a.source, a.published, a.summary, a.sentiment, a.also_reported_by "
+                "FROM digest_articles d JOIN articles a ON a.id = d.article_id "
+                "WHERE d.digest_id = ? ORDER BY d.position", (digest_id,)
+            ).fetchall()
+        return {
+            "id": row[0], "topic": row[1], "day": row[2], "created_at": row[3], "run_id": row[4],
+            "articles": [self._article(article) for article in articles],
+        }
+
+    def latest_digest(self, topic: str, day: str = None):
+        """Most recent digest for a topic (on `day`, YYYY-MM-DD, if given), or None"""
+        query = "SELECT id FROM digests WHERE topic_key = ?"
+        params = [self._key(topic)]
+        if day:
+            query += " AND day = ?"
+            params.append(day)
+        with self._lock:
+            row = self._conn.execute(query + " ORDER BY created_at DESC LIMIT 1", params).fetchone()
+        return self.get_digest(row[0]) if row else None
+
+    def digests(self, topic: str = None, since: str = None, until: str = None) -> list[dict]:
+        """Metadata of stored digests, newest first, optionally filtered by topic and day range"""
+        where, params = self._filters(topic, since, until)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT d.id, d.topic, d.day, d.created_at, COUNT(da.article_id) FROM digests d "
+                "LEFT JOIN digest_articles da ON da.digest_id = d.id"
+                f"{where} GROUP BY d.id ORDER BY d.created_at DESC", params
+            ).fetchall()
+        return [{"id": r[0], "topic": r[1], "day": r[2], "created_at": r[3], "articles": r[4]} for r in rows]
+
+    def articles(self, topic: str = None, since: str = None, until: str = None, sentiment: str = None,
+                 limit: int = None) -> list[dict]:
+        """Distinct stored articles, newest digest first, filtered by topic, day range and sentiment"""
+        where, params = self._filters(topic, since, until)
+        if sentiment:
+            where += (" AND" if where else " WHERE") + " a.sentiment = ?"
+            params.append(sentiment.upper())
+        query = (
+            "SELECT a.url, a.title, a.source, a.published, a.summary, a.sentiment, a.also_reported_by, "
+            "MAX(d.day) FROM articles a JOIN digest_articles da ON da.article_id = a.id "
+            f"JOIN digests d ON d.id = da.digest_id{where} GROUP BY a.id ORDER BY MAX(d.created_at) DESC"
+        )
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [dict(self._article(row[:7]), day=row[7]) for row in rows]
+
+    def sentiment_trend(self, topic: str = None, days: int = 7, until: str = None) -> list[dict]:
+        """Per-day article counts by sentiment over the last `days` days up to `until` (default today).
+
+        Each article counts once per day even if several digests that day
+        included it. Days without digests are filled with zeros.
+        """
+        end = datetime.strptime(until, "%Y-%m-%d").date() if until else datetime.now(timezone.utc).date()
+        start = end - timedelta(days=days - 1)
+        where, params = self._filters(topic, start.isoformat(), end.isoformat())
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT day, sentiment, COUNT(*) FROM ("
+                "SELECT DISTINCT d.day AS day, a.id, a.sentiment AS sentiment FROM digests d "
+                "JOIN digest_articles da ON da.digest_id = d.id JOIN articles a ON a.id = da.article_id"
+                f"{where}) GROUP BY day, sentiment", params
+            ).fetchall()
+
+        trend = {
+            (start + timedelta(days=offset)).isoformat(): dict.fromkeys(LABELS, 0)
+            for offset in range(days)
+        }
+        for day, sentiment, count in rows:
+            trend[day][sentiment] = trend[day].get(sentiment, 0) + count
+        return [{"day": day, **counts, "articles": sum(counts.values())} for day, counts in trend.items()]
+
+    def topics(self) -> list[str]:
+        """Stored topics, most recently digested first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT topic FROM digests d WHERE created_at = "
+                "(SELECT MAX(created_at) FROM digests WHERE topic_key = d.topic_key) ORDER BY created_at DESC"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _filters(self, topic: str, since: str, until: str) -> tuple[str, list]:
+        clauses, params = [], []
+        if topic:
+            clauses.append("d.topic_key = ?")
+            params.append(self._key(topic))
+        if since:
+            clauses.append("d.day >= ?")
+            params.append(since)
+        if until:
+            clauses.append("d.day <= ?")
+            params.append(until)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    @staticmethod
+    def _article(row) -> dict:
+        article = {
+            "title": row[1], "source": row[2], "url": row[0], "summary": row[4], "sentiment": row[5],
+        }
+        if row[3]:
+            article["published"] = row[3]
+        if row[6]:
+            article["also_reported_by"] = json.loads(row[6])
+        return article
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-render stored digests and query sentiment trends")
+    parser.add_argument("--store", help="Store path (default: NEWS_DIGEST_STORE or .cache/digests.sqlite)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    render = commands.add_parser("render", help="Print a stored digest")
+    render.add_argument("topic", nargs="?", help="Topic of the latest digest to render")
+    render.add_argument("--id", type=int, help="Digest id (instead of a topic)")
+    render.add_argument("--day", help="Latest digest of this day (YYYY-MM-DD)")
+    render.add_argument("--format", default="txt", choices=("txt", "md", "html", "json"))
+
+    trend = commands.add_parser("trend", help="Daily sentiment counts")
+    trend.add_argument("topic", nargs="?", help="Limit to one topic (default: all)")
+    trend.add_argument("--days", type=int, default=7)
+
+    commands.add_parser("list", help="List stored digests")
+    args = parser.parse_args(argv)
+
+    from src.digest_generator import DailyDigestGenerator
+
+    store = DigestStore(args.store)
+    try:
+        if args.command == "render":
+            if args.topic is None and args.id is None:
+                parser.error("render needs a topic or --id")
+            print(DailyDigestGenerator.from_store(store, topic=args.topic, digest_id=args.id, day=args.day,
+                                                  fmt=args.format))
+        elif args.command == "trend":
+            print(f"{'day':<12}{'positive':>10}{'neutral':>10}{'negative':>10}{'articles':>10}")
+            for row in store.sentiment_trend(args.topic, days=args.days):
+                print(f"{row['day']:<12}{row['POSITIVE']:>10}{row['NEUTRAL']:>10}{row['NEGATIVE']:>10}"
+                      f"{row['articles']:>10}")
+        else:
+            for digest in store.digests():
+                print(f"{digest['id']:>5}  {digest['day']}  {digest['articles']:>3} articles  {digest['topic']}")
+    except LookupError as e:
+        print(e)
+        return 1
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
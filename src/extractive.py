@@ -0,0 +1,135 @@
+import re
+import logging
+
+import numpy as np
+
+from src.model_limits import estimate_tokens
+
+# Sentence ends followed by whitespace and an uppercase letter, digit or quote;
+# used when the NLTK punkt data is not installed
+SENTENCE_END_RE = re.compile(r"(?:(?<=[.!?])|(?<=[.!?][\"')\]]))\s+(?=[A-Z0-9\"'(\[])")
+WORD_RE = re.compile(r"[a-z0-9]+(?:['.-][a-z0-9]+)*")
+
+STOPWORDS = frozenset(
+    "a an and are as at be been but by for from has have he her his i in is it its of on or our she "
+    "that the their them they this to was we were which who will with would you your than then there "
+    "these those also after before over about into more most other some such can could may might "
+    "said says not no so if while during".split()
+)
+
+_punkt_available = None
+
+
+def split_sentences(text: str) -> list[str]:
+    """Sentence-split one paragraph with NLTK punkt when available, else a regex"""
+    global _punkt_available
+    if _punkt_available is None:
+        try:
+            import nltk
+            nltk.data.find("tokenizers/punkt_tab")
+            _punkt_available = True
+        except (ImportError, LookupError):
+            logging.info("NLTK punkt data not installed; using the regex sentence splitter")
+            _punkt_available = False
+    if _punkt_available:
+        from nltk.tokenize import sent_tokenize
+        return sent_tokenize(text)
+    return [sentence for sentence in SENTENCE_END_RE.split(text) if sentence.strip()]
+
+
+class ExtractiveCompressor:
+    """Shrink article text to the sentences that matter before it reaches the LLM.
+
+    Sentences are scored by centrality, either TextRank over TF-IDF cosine
+    similarity (`method="textrank"`) or similarity to the whole document
+    (`method="tfidf"`), blended with a lead-position prior for the inverted
+    pyramid of news writing. The best sentences are kept within `max_tokens`
+    and returned in their original order, paragraph breaks included.
+    """
+    def __init__(self, max_tokens: int = 1200, position_weight: float = 0.3, method: str = "textrank",
+                 damping: float = 0.85):
+        if method not in ("textrank", "tfidf"):
+            raise ValueError(f"Unknown extractive method: {method}")
+        self.max_tokens = max_tokens
+        self.position_weight = position_weight
+        self.method = method
+        self.damping = damping
+
+    def compress(self, text: str) -> str:
+        """Return `text` unchanged if it fits the budget, else its top sentences"""
+        if estimate_tokens(text) <= self.max_tokens:
+            return text
+
+        sentences, paragraphs = [], []
+        for paragraph_id, paragraph in enumerate(p for p in text.split("\n\n") if p.strip()):
+            for sentence in split_sentences(paragraph.strip()):
+                sentences.append(sentence.strip())
+                paragraphs.append(paragraph_id)
+        if len(sentences) < 2:
+            return text
+
+        scores = self.score(sentences)
+        keep, used = [], 0
+        for i in np.argsort(-scores, kind="stable"):
+            tokens = estimate_tokens(sentences[i]) + 1
+            if used + tokens > self.max_tokens:
+                continue
+            keep.append(i)
+            used += tokens
+        keep.sort()
+
+        parts = []
+        for n, i in enumerate(keep):
+            if n:
+                parts.append("\n\n" if paragraphs[i] != paragraphs[keep[n - 1]] else " ")
+            parts.append(sentences[i])
+        return "".join(parts)
+
+    def score(self, sentences: list[str]) -> np.ndarray:
+        """Blended centrality/position score per sentence, in [0, 1]"""
+        centrality = self._centrality(self._tfidf(sentences))
+        spread = centrality.max() - centrality.min()
+        centrality = (centrality - centrality.min()) / spread if spread > 0 else np.zeros_like(centrality)
+        # Lead sentences carry the who/what/when in news copy
+        position = 1.0 / (1.0 + np.arange(len(sentences)) / 5.0)
+        return (1 - self.position_weight) * centrality + self.position_weight * position
+
+    @staticmethod
+    def _tfidf(sentences: list[str]) -> np.ndarray:
+        """L2-normalized TF-IDF rows over the terms shared by at least two sentences"""
+        vocabulary, rows, cols = {}, [], []
+        for row, sentence in enumerate(sentences):
+            for word in WORD_RE.findall(sentence.lower()):
+                if word in STOPWORDS or len(word) < 2:
+                    continue
+                rows.append(row)
+                cols.append(vocabulary.setdefault(word, len(vocabulary)))
+        matrix = np.zeros((len(sentences), max(len(vocabulary), 1)), dtype=np.float32)
+        if rows:
+            np.add.at(matrix, (np.array(rows), np.array(cols)), 1.0)
+        document_frequency = (matrix > 0).sum(axis=0)
+        idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+        matrix *= idf
+        # Norms include every term, but terms unique to one sentence add no similarity
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix[:, document_frequency >= 2]
+        return matrix / np.where(norms > 0, norms, 1)
+
+    def _centrality(self, vectors: np.ndarray) -> np.ndarray:
+        if self.method == "tfidf":
+            centroid = vectors.sum(axis=0)
+            return vectors @ centroid
+
+        similarity = vectors @ vectors.T
+        np.fill_diagonal(similarity, 0)
+        row_sums = similarity.sum(axis=1, keepdims=True)
+        n = len(vectors)
+        # Sentences similar to nothing link uniformly, as in PageRank's dangling nodes
+        transition = np.where(row_sums > 0, similarity / np.where(row_sums > 0, row_sums, 1), 1.0 / n)
+        rank = np.full(n, 1.0 / n)
+        for _ in range(50):
+            updated = (1 - self.damping) / n + self.damping * (transition.T @ rank)
+            if np.abs(updated - rank).sum() < 1e-6:
+                return updated
+            rank = updated
+        return rank
@@ -0,0 +1,262 @@
+import re
+import json
+import codecs
+import time
+import random
+import logging
+import threading
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+HTML_TYPES = ("text/html", "application/xhtml+xml", "application/xml", "text/xml")
+META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
+
+
+class ContentTypeError(ValueError):
+    """Raised when a page is not HTML and was not downloaded"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second with bursts up to `capacity`"""
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+@dataclass
+class Page:
+    """A fetched page as raw bytes in `encoding`; on a 304 revalidation `not_modified` is set and `content` is empty"""
+    url: str
+    status_code: int
+    content: bytes
+    headers: dict = field(default_factory=dict)
+    not_modified: bool = False
+    size_bytes: int = 0
+    encoding: str = "utf-8"
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get("Content-Type", "")
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+
+class HttpClient:
+    """Shared HTTP transport for NewsAPI and article scraping.
+
+    Keeps one pooled keep-alive session per host, rate limits each host with a
+    token bucket, retries 429/5xx and connection errors with exponential backoff
+    that honors Retry-After, and revalidates article pages with ETag /
+    Last-Modified when `get_page(..., conditional=True)` is used. Only the
+    validators are kept, never the page itself: callers revalidate what they
+    derived from a page (e.g. its extracted text) and keep that themselves.
+    """
+    def __init__(self, timeout: float = 15, max_retries: int = 3, backoff_factor: float = 1.0,
+                 max_backoff: float = 30.0, default_rate: float = 2.0, host_rates: dict = None,
+                 pool_size: int = 10, cache=None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.default_rate = default_rate
+        self.host_rates = host_rates or {}
+        self.pool_size = pool_size
+        self.cache = cache
+        self._sessions = {}
+        self._buckets = {}
+        self._validators = {}
+        self._lock = threading.Lock()
+
+    def _host(self, url: str) -> str:
+        return urlsplit(url).netloc.lower()
+
+    def session_for(self, url: str) -> requests.Session:
+        host = self._host(url)
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+            return session
+
+    def bucket_for(self, url: str) -> TokenBucket:
+        host = self._host(url)
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.host_rates.get(host, self.default_rate))
+                self._buckets[host] = bucket
+            return bucket
+
+    def get(self, url: str, params: dict = None, headers: dict = None, timeout: float = None,
+            stream: bool = False) -> requests.Response:
+        """GET with per-host rate limiting and retries; returns the final response"""
+        session = self.session_for(url)
+        bucket = self.bucket_for(url)
+        attempt = 0
+        while True:
+            bucket.acquire()
+            try:
+                response = session.get(url, params=params, headers=headers,
+                                       timeout=timeout or self.timeout, stream=stream)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logging.warning(f"Request to {self._host(url)} failed ({str(e)}), retrying in {delay:.1f}s")
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                delay = self._retry_after(response) or self._backoff(attempt)
+                logging.warning(f"{response.status_code} from {self._host(url)}, retrying in {delay:.1f}s")
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def get_page(self, url: str, headers: dict = None, conditional: bool = True,
+                 max_bytes: int = None, html_only: bool = False) -> Page:
+        """GET an article page, revalidating a previously seen copy when possible.
+
+        The body is streamed and truncated after `max_bytes`; with `html_only`
+        non-HTML responses are rejected before their body is read. With
+        `conditional`, the validators of the last response are sent, and a 304
+        comes back as a Page without text whose `not_modified` is set.
+        """
+        headers = dict(headers or {})
+        stored = self._stored_page(url) if conditional else None
+        if stored:
+            if stored.get("etag"):
+                headers["If-None-Match"] = stored["etag"]
+            if stored.get("last_modified"):
+                headers["If-Modified-Since"] = stored["last_modified"]
+
+        response = self.get(url, headers=headers, stream=True)
+        try:
+            if response.status_code == 304 and stored:
+                return Page(url, 200, b"", stored.get("headers", {}), not_modified=True)
+
+            response.raise_for_status()
+            content_type = response.headers.get("Content-Type", "")
+            if html_only and content_type and not content_type.lower().startswith(HTML_TYPES):
+                raise ContentTypeError(f"Not an HTML page ({content_type})")
+            body, encoding, size_bytes = self._read_body(response, max_bytes)
+        finally:
+            response.close()
+
+        page = Page(url, response.status_code, body, dict(response.headers), size_bytes=size_bytes,
+                    encoding=encoding)
+        if response.headers.get("ETag") or response.headers.get("Last-Modified"):
+            self._store_page(url, {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "headers": {"Content-Type": response.headers.get("Content-Type", "")},
+            })
+        return page
+
+    @staticmethod
+    def _read_body(response: requests.Response, max_bytes: int = None) -> tuple[bytes, str, int]:
+        """Read the body incrementally, stopping once max_bytes have arrived.
+
+        Returns the undecoded body, its encoding (from the Content-Type header,
+        else a <meta charset>, else UTF-8) and the number of bytes downloaded.
+        """
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if max_bytes and size >= max_bytes:
+                logging.info(f"Truncated {response.url} at {max_bytes} bytes")
+                break
+        body = b"".join(chunks)
+        if max_bytes:
+            body = body[:max_bytes]
+
+        encoding = None
+        if "charset=" in response.headers.get("Content-Type", "").lower():
+            encoding = response.encoding
+        if not encoding:
+            found = META_CHARSET.search(body[:4096])
+            encoding = found.group(1).decode("ascii") if found else "utf-8"
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            encoding = "utf-8"
+        return body, encoding, size
+
+    def _stored_page(self, url: str):
+        with self._lock:
+            stored = self._validators.get(url)
+        if stored is None and self.cache:
+            raw = self.cache.get("http", url)
+            stored = json.loads(raw) if raw else None
+        return stored
+
+    def _store_page(self, url: str, stored: dict):
+        with self._lock:
+            self._validators[url] = stored
+            if len(self._validators) > 1000:
+                self._validators.pop(next(iter(self._validators)))
+        if self.cache:
+            self.cache.set("http", url, json.dumps(stored))
+
+    def _backoff(self, attempt: int) -> float:
+        delay = self.backoff_factor * (2 ** attempt)
+        return min(self.max_backoff, delay + random.uniform(0, delay / 2))
+
+    def _retry_after(self, response: requests.Response):
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                delay = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        return min(self.max_backoff, max(0.0, delay))
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Process-wide shared client, so every caller reuses the same connection pools"""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HttpClient(host_rates={"newsapi.org": 1.0})
+        return _default_client
@@ -0,0 +1,229 @@
+import json
+import time
+import uuid
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from src.model_limits import estimate_cost
+
+# Numeric span attributes that are summed per stage in the run report
+COUNTED_ATTRIBUTES = ("bytes", "chunks", "items", "escalated", "throttled", "parse_timeouts", "reused", "updated", "off_topic", "mismatched", "prompt_tokens", "completion_tokens")
+
+_current_span = contextvars.ContextVar("news_digest_span", default=None)
+# Recorder of the run the current thread/task belongs to; concurrent runs
+# (e.g. background jobs in the web app) each get their own
+_active_recorder = contextvars.ContextVar("news_digest_recorder", default=None)
+# Keys (e.g. article URLs) that LLM usage in the current context is attributed to
+_usage_keys = contextvars.ContextVar("news_digest_usage_keys", default=())
+
+
+class Span:
+    def __init__(self, stage: str, attributes: dict):
+        self.stage = stage
+        self.attributes = dict(attributes)
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, key: str, value):
+        """Accumulate a numeric attribute (bytes, tokens, ...) on this span"""
+        # Batched LLM calls report usage from several threads into one span
+        with self._lock:
+            self.attributes[key] = self.attributes.get(key, 0) + value
+
+
+class RunRecorder:
+    """Collects timing spans and token usage for one digest run"""
+    def __init__(self):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started_at = datetime.now(timezone.utc)
+        self._started = time.perf_counter()
+        self._spans = []
+        self._tokens = {}
+        self._usage = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage: str, **attributes):
+        span = Span(stage, attributes)
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.seconds = time.perf_counter() - start
+            _current_span.reset(token)
+            with self._lock:
+                self._spans.append(span)
+
+    def record_tokens(self, model_name: str, prompt_tokens: int, completion_tokens: int):
+        with self._lock:
+            usage = self._tokens.setdefault(model_name, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+            usage["calls"] += 1
+            usage["prompt_tokens"] += prompt_tokens
+            usage["completion_tokens"] += completion_tokens
+            # A call made for several keys (a batched sentiment call) is split evenly between them
+            keys = _usage_keys.get()
+            for key in keys:
+                usage = self._usage.setdefault(key, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+                usage["calls"] += 1 / len(keys)
+                usage["prompt_tokens"] += prompt_tokens / len(keys)
+                usage["completion_tokens"] += completion_tokens / len(keys)
+
+    def usage(self, key) -> dict:
+        """LLM calls and tokens attributed to `key` (see usage_scope); shares of batched calls are fractions"""
+        with self._lock:
+            return dict(self._usage.get(key) or {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+
+    def report(self) -> dict:
+        """Machine-readable summary: per-stage latency percentiles, counters and token cost"""
+        with self._lock:
+            spans = list(self._spans)
+            tokens = {model: dict(usage) for model, usage in self._tokens.items()}
+
+        stages = {}
+        for span in spans:
+            stages.setdefault(span.stage, []).append(span)
+
+        stage_report = {}
+        for stage, stage_spans in stages.items():
+            durations = sorted(span.seconds for span in stage_spans)
+            entry = {
+                "count": len(durations),
+                "total_seconds": round(sum(durations), 4),
+                "mean_seconds": round(sum(durations) / len(durations), 4),
+                "p50_seconds": round(_percentile(durations, 50), 4),
+                "p95_seconds": round(_percentile(durations, 95), 4),
+                "max_seconds": round(durations[-1], 4),
+            }
+            for key in COUNTED_ATTRIBUTES:
+                values = [span.attributes[key] for span in stage_spans if key in span.attributes]
+                if values:
+                    entry[key] = sum(values)
+            stage_report[stage] = entry
+
+        cost = 0.0
+        for model, usage in tokens.items():
+            model_cost = estimate_cost(model, usage["prompt_tokens"], usage["completion_tokens"])
+            if model_cost is not None:
+                usage["cost_usd"] = round(model_cost, 6)
+                cost += usage["cost_usd"]
+
+        return {
+            "run_id": self.run_id,
+            "started_at": self.started_at.isoformat(),
+            "wall_seconds": round(time.perf_counter() - self._started, 3),
+            "stages": stage_report,
+            "tokens": tokens,
+            "total_cost_usd": round(cost, 6),
+        }
+
+    def write_report(self, path: str) -> dict:
+        report = self.report()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        return report
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    low = int(k)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (k - low)
+
+
+_recorder = RunRecorder()
+_recorder_lock = threading.Lock()
+
+
+def start_run() -> RunRecorder:
+    """Begin a fresh recorder for the current context.
+
+    Spans recorded in this context, and in threads or tasks started from it
+    with a copy of it, go to the new recorder; code outside any run falls
+    back to the most recently started one.
+    """
+    global _recorder
+    with _recorder_lock:
+        _recorder = RunRecorder()
+        _active_recorder.set(_recorder)
+        return _recorder
+
+
+def get_recorder() -> RunRecorder:
+    return _active_recorder.get() or _recorder
+
+
+def span(stage: str, **attributes):
+    """Time a pipeline stage on the current run's recorder"""
+    return get_recorder().span(stage, **attributes)
+
+
+def current_span():
+    return _current_span.get()
+
+
+@contextmanager
+def usage_scope(*keys):
+    """Attribute LLM calls made in this context (and contexts copied from it) to `keys`"""
+    token = _usage_keys.set(keys)
+    try:
+        yield
+    finally:
+        _usage_keys.reset(token)
+
+
+def export_prometheus(report: dict, path: str = None, registry=None):
+    """Expose a run report as Prometheus metrics (requires prometheus_client).
+
+    With `path`, the metrics are written in the text format read by the node
+    exporter's textfile collector.
+    """
+    try:
+        from prometheus_client import CollectorRegistry, Gauge, write_to_textfile
+    except ImportError as e:
+        raise ImportError("Prometheus export requires the prometheus_client package") from e
+
+    registry = registry or CollectorRegistry()
+    seconds = Gauge("news_digest_stage_seconds", "Stage latency", ["stage", "stat"], registry=registry)
+    counts = Gauge("news_digest_stage_total", "Stage counters", ["stage", "counter"], registry=registry)
+    tokens = Gauge("news_digest_tokens", "LLM tokens used", ["model", "kind"], registry=registry)
+    cost = Gauge("news_digest_cost_usd", "Estimated LLM cost of the run", registry=registry)
+
+    for stage, entry in report["stages"].items():
+        for stat in ("total", "p50", "p95", "max"):
+            seconds.labels(stage=stage, stat=stat).set(entry[f"{stat}_seconds"])
+        counts.labels(stage=stage, counter="spans").set(entry["count"])
+        for key in COUNTED_ATTRIBUTES:
+            if key in entry:
+                counts.labels(stage=stage, counter=key).set(entry[key])
+    for model, usage in report["tokens"].items():
+        tokens.labels(model=model, kind="prompt").set(usage["prompt_tokens"])
+        tokens.labels(model=model, kind="completion").set(usage["completion_tokens"])
+    cost.set(report["total_cost_usd"])
+
+    if path:
+        write_to_textfile(path, registry)
+    return registry
+
+
+def export_opentelemetry(report: dict, meter_name: str = "news_digest"):
+    """Record a run report on the globally configured OpenTelemetry meter provider"""
+    try:
+        from opentelemetry import metrics
+    except ImportError as e:
+        raise ImportError("OpenTelemetry export requires the opentelemetry-api package") from e
+
+    meter = metrics.get_meter(meter_name)
+    latency = meter.create_histogram("news_digest.stage.duration", unit="s")
+    token_counter = meter.create_counter("news_digest.tokens")
+    for stage, entry in report["stages"].items():
+        latency.record(entry["total_seconds"], {"stage": stage})
+    for model, usage in report["tokens"].items():
+        token_counter.add(usage["prompt_tokens"], {"model": model, "kind": "prompt"})
+        token_counter.add(usage["completion_tokens"], {"model": model, "kind": "completion"})
+    logging.info(f"Exported run {report['run_id']} to OpenTelemetry meter '{meter_name}'")
@@ -0,0 +1,135 @@
+import time
+import uuid
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Job:
+    """A background unit of work whose progress can be read from any thread.
+
+    The worker reports progress through `update`, `stream` and `add_item`;
+    readers (e.g. Streamlit reruns from any session) take a consistent copy
+    with `snapshot`.
+    """
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.status = "queued"
+        self.created_at = time.time()
+        self.finished_at = None
+        self.error = None
+        self.result = None
+        self._state = {}
+        self._streams = {}
+        self._items = {}
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def update(self, **values):
+        """Set progress fields such as a status message or counters"""
+        with self._lock:
+            self._state.update(values)
+
+    def stream(self, index: int, text: str):
+        """Append streamed text (e.g. summary tokens) for one item"""
+        with self._lock:
+            self._streams[index] = self._streams.get(index, "") + text
+
+    def add_item(self, index: int, item):
+        """Record a finished item"""
+        with self._lock:
+            self._items[index] = item
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "status": self.status,
+                "error": self.error,
+                "state": dict(self._state),
+                "streams": dict(self._streams),
+                "items": dict(self._items),
+            }
+
+
+class JobManager:
+    """Runs jobs on a small thread pool and reuses their results.
+
+    A job submitted under a `key` that is already running, or that finished
+    less than `ttl_seconds` ago, is returned instead of starting new work, so
+    identical requests from several users (or reruns of the same session)
+    share one job. Failed jobs are never reused, and with `fresh=True` only a
+    running or queued job is.
+    """
+    def __init__(self, max_workers: int = 2, ttl_seconds: float = 1800):
+        self.ttl_seconds = ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._by_key = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, func, *args, fresh: bool = False, **kwargs) -> Job:
+        """Return the live or fresh job for `key`, starting `func(job, *args, **kwargs)` if needed"""
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(self._by_key.get(key))
+            if job and (job.active or (job.status == "done" and not fresh)):
+                return job
+
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._by_key[key] = job.id
+        # Run in a fresh context so the job's run recorder is its own
+        self._executor.submit(contextvars.Context().run, self._run, job, func, args, kwargs)
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def find(self, key):
+        """The current job for `key` (running, queued or within its TTL), or None"""
+        with self._lock:
+            return self._jobs.get(self._by_key.get(key))
+
+    def jobs(self) -> list[Job]:
+        """Known jobs, newest first"""
+        with self._lock:
+            self._expire()
+            return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def counts(self) -> dict:
+        """Number of jobs by status"""
+        counts = {}
+        for job in self.jobs():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    def _run(self, job: Job, func, args, kwargs):
+        job.status = "running"
+        try:
+            job.result = func(job, *args, **kwargs)
+            job.status = "done"
+        except Exception as e:
+            logging.exception(f"Job {job.id} failed")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+
+    def _expire(self):
+        """Forget finished jobs older than the TTL"""
+        cutoff = time.time() - self.ttl_seconds
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and job.finished_at < cutoff:
+                del self._jobs[job_id]
+                if self._by_key.get(job.key) == job_id:
+                    del self._by_key[job.key]
+
+    def shutdown(self, wait: bool = False):
+        """Drop queued jobs; with `wait`, block until running ones finish"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,32 @@
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.instrumentation import current_span, get_recorder
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """Attributes Groq prompt/completion token counts to the enclosing span and model"""
+    def on_llm_end(self, response, **kwargs):
+        llm_output = response.llm_output or {}
+        usage = llm_output.get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens")
+        completion_tokens = usage.get("completion_tokens")
+        if prompt_tokens is None:
+            # Fall back to the message's usage metadata
+            for generations in response.generations:
+                for generation in generations:
+                    metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                    if metadata:
+                        prompt_tokens = (prompt_tokens or 0) + metadata.get("input_tokens", 0)
+                        completion_tokens = (completion_tokens or 0) + metadata.get("output_tokens", 0)
+        if prompt_tokens is None:
+            return
+
+        completion_tokens = completion_tokens or 0
+        current = current_span()
+        if current is not None:
+            current.add("prompt_tokens", prompt_tokens)
+            current.add("completion_tokens", completion_tokens)
+        get_recorder().record_tokens(llm_output.get("model_name", "unknown"), prompt_tokens, completion_tokens)
+
+
+token_usage_callback = TokenUsageCallback()
@@ -0,0 +1,257 @@
+import os
+import re
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import deque
+
+from src.instrumentation import current_span, span
+from src.model_limits import rate_limits
+
+# Groq reports resets as durations such as "7.66s", "2m59.56s" or "120ms"
+DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_duration(value) -> float:
+    """Seconds in a Groq reset header ('2m59.56s') or a plain number of seconds; None if unparsable"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    parts = DURATION_RE.findall(str(value))
+    if not parts:
+        return None
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts)
+
+
+class CallTooLarge(ValueError):
+    """A call estimated at more tokens than its model may use in a whole minute"""
+
+
+def rate_limit_delay(error: Exception):
+    """Seconds to wait before retrying `error` (0.0 if unknown), or None if it is not a rate limit"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status != 429:
+        return None
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    delay = parse_duration(headers.get("retry-after")) or getattr(error, "retry_after", None)
+    return delay or 0.0
+
+
+class ModelBudget:
+    """Request and token budget of one model, as seen by this process.
+
+    Requests are paced evenly at `requests_per_minute`, and tokens sent in
+    the last minute are kept under `tokens_per_minute`. Groq's
+    `x-ratelimit-*` response headers override both with what the API
+    actually has left, and a 429 blocks the model until its Retry-After.
+    """
+    def __init__(self, requests_per_minute: float, tokens_per_minute: int, window_seconds: float = 60.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window_seconds = window_seconds
+        self.next_request_at = 0.0
+        self.blocked_until = 0.0
+        self.remaining_requests = None
+        self.requests_reset_at = 0.0
+        self.remaining_tokens = None
+        self.tokens_reset_at = 0.0
+        self._sent = deque()
+
+    def wait(self, tokens: int, now: float) -> float:
+        """Seconds until a call of `tokens` fits the budget (0 if it fits now)"""
+        while self._sent and self._sent[0][0] <= now - self.window_seconds:
+            self._sent.popleft()
+        waits = [self.blocked_until - now, self.next_request_at - now]
+        if self.remaining_requests is not None and self.remaining_requests < 1:
+            waits.append(self.requests_reset_at - now)
+        if self.remaining_tokens is not None and self.remaining_tokens < tokens:
+            waits.append(self.tokens_reset_at - now)
+
+        # try_acquire refuses calls larger than the whole budget; for one here
+        # (a `delay` estimate) this is the wait until the window is empty
+        used = sum(sent for _, sent in self._sent)
+        for sent_at, sent in self._sent:
+            if used + tokens <= self.tokens_per_minute:
+                break
+            used -= sent
+            waits.append(sent_at + self.window_seconds - now)
+        return max(0.0, *waits)
+
+    def reserve(self, tokens: int, now: float):
+        self.next_request_at = max(now, self.next_request_at) + self.window_seconds / self.requests_per_minute
+        self._sent.append((now, tokens))
+        if self.remaining_requests is not None:
+            self.remaining_requests -= 1
+        if self.remaining_tokens is not None:
+            self.remaining_tokens -= tokens
+
+    def observe(self, headers, now: float):
+        """Take the API's view of the budget from x-ratelimit-* response headers"""
+        # Groq's request limit is per day; only the token limit is per minute
+        limit_tokens = headers.get("x-ratelimit-limit-tokens")
+        if limit_tokens:
+            self.tokens_per_minute = int(float(limit_tokens))
+        remaining = headers.get("x-ratelimit-remaining-requests")
+        if remaining is not None:
+            self.remaining_requests = float(remaining)
+            self.requests_reset_at = now + (parse_duration(headers.get("x-ratelimit-reset-requests")) or 0.0)
+        remaining = headers.get("x-ratelimit-remaining-tokens")
+        if remaining is not None:
+            self.remaining_tokens = float(remaining)
+            self.tokens_reset_at = now + (parse_duration(headers.get("x-ratelimit-reset-tokens")) or 0.0)
+
+
+class LLMScheduler:
+    """Shares Groq request and token budgets between every chain in the process.
+
+    Calls `acquire` a slot for their model before going out, waiting while
+    the model's budget is spent. With an `overflow` model, a call whose
+    primary model would make it wait longer than `overflow_after` seconds
+    goes to the overflow model instead when that one is free. A call larger
+    than its model's whole tokens/minute budget raises CallTooLarge, since
+    Groq rejects it without a retryable 429. Rate-limited
+    calls are retried up to `max_retries` times with exponential backoff
+    that honors Retry-After, instead of failing. Limits are per minute
+    unless `window_seconds` says otherwise (the benchmarks shorten it).
+    """
+    def __init__(self, limits: dict = None, max_retries: int = 4, backoff_factor: float = 2.0,
+                 max_backoff: float = 60.0, overflow_after: float = 5.0, window_seconds: float = 60.0):
+        # model -> (requests/minute, tokens/minute), overriding src.model_limits
+        self.limits = limits or {}
+        self.window_seconds = window_seconds
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.overflow_after = overflow_after
+        self._budgets = {}
+        self._lock = threading.Lock()
+
+    def budget(self, model_name: str) -> ModelBudget:
+        with self._lock:
+            return self._budget(model_name)
+
+    def _budget(self, model_name: str) -> ModelBudget:
+        budget = self._budgets.get(model_name)
+        if budget is None:
+            budget = ModelBudget(*self.limits.get(model_name, rate_limits(model_name)),
+                                 window_seconds=self.window_seconds)
+            self._budgets[model_name] = budget
+        return budget
+
+    def try_acquire(self, model_name: str, tokens: int, overflow: str = None) -> tuple[str, float]:
+        """Reserve a slot without blocking: (model to call, 0.0) or (None, seconds to wait)"""
+        with self._lock:
+            now = time.monotonic()
+            primary = self._budget(model_name)
+            if tokens > primary.tokens_per_minute:
+                raise CallTooLarge(
+                    f"A call of about {tokens} tokens exceeds {model_name}'s budget of "
+                    f"{primary.tokens_per_minute} tokens/minute; split it into smaller chunks"
+                )
+            wait = primary.wait(tokens, now)
+            if wait <= 0:
+                primary.reserve(tokens, now)
+                return model_name, 0.0
+            if overflow and wait > self.overflow_after and tokens <= self._budget(overflow).tokens_per_minute:
+                secondary = self._budget(overflow)
+                overflow_wait = secondary.wait(tokens, now)
+                if overflow_wait <= 0:
+                    secondary.reserve(tokens, now)
+                    logging.info(f"{model_name} is rate limited for {wait:.1f}s, sending the call to {overflow}")
+                    return overflow, 0.0
+                wait = min(wait, max(overflow_wait, self.overflow_after))
+            return None, wait
+
+    def delay(self, model_name: str, tokens: int = 0) -> float:
+        """Seconds a call of `tokens` to `model_name` would wait right now, without reserving it"""
+        with self._lock:
+            return self._budget(model_name).wait(tokens, time.monotonic())
+
+    def acquire(self, model_name: str, tokens: int, overflow: str = None) -> str:
+        """Block until a call of about `tokens` may go out; returns the model to call"""
+        chosen, wait = self.try_acquire(model_name, tokens, overflow)
+        if chosen:
+            return chosen
+        with span("rate_limit_wait", items=1):
+            while not chosen:
+                time.sleep(wait)
+                chosen, wait = self.try_acquire(model_name, tokens, overflow)
+        return chosen
+
+    async def aacquire(self, model_name: str, tokens: int, overflow: str = None) -> str:
+        """Async variant of acquire"""
+        chosen, wait = self.try_acquire(model_name, tokens, overflow)
+        if chosen:
+            return chosen
+        with span("rate_limit_wait", items=1):
+            while not chosen:
+                await asyncio.sleep(wait)
+                chosen, wait = self.try_acquire(model_name, tokens, overflow)
+        return chosen
+
+    def should_retry(self, model_name: str, error: Exception, attempt: int) -> bool:
+        """For a failed call: block the model for its backoff and return True if the call should be retried"""
+        delay = rate_limit_delay(error)
+        if delay is None or attempt >= self.max_retries:
+            return False
+        if not delay:
+            backoff = self.backoff_factor * (2 ** attempt)
+            delay = min(self.max_backoff, backoff + random.uniform(0, backoff / 2))
+        with self._lock:
+            budget = self._budget(model_name)
+            budget.blocked_until = max(budget.blocked_until, time.monotonic() + delay)
+        current = current_span()
+        if current is not None:
+            current.add("throttled", 1)
+        logging.warning(f"{model_name} rate limited, retrying in {delay:.1f}s (attempt {attempt + 1})")
+        return True
+
+    def observe(self, model_name: str, headers):
+        """Record a response's x-ratelimit-* headers; a 429's Retry-After is applied by should_retry"""
+        with self._lock:
+            self._budget(model_name).observe(headers, time.monotonic())
+
+    def response_hooks(self, model_name: str) -> tuple:
+        """(sync, async) httpx response hooks feeding `observe` for one model's client"""
+        def on_response(response):
+            self.observe(model_name, response.headers)
+
+        async def on_aresponse(response):
+            self.observe(model_name, response.headers)
+
+        return on_response, on_aresponse
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+def parse_limits(value: str) -> dict:
+    """Limits from GROQ_RATE_LIMITS, e.g. 'llama3-70b-8192=30/6000,llama3-8b-8192=30/30000'"""
+    limits = {}
+    for entry in filter(None, (part.strip() for part in (value or "").split(","))):
+        try:
+            model_name, budget = entry.split("=")
+            requests_per_minute, tokens_per_minute = budget.split("/")
+            limits[model_name.strip()] = (float(requests_per_minute), int(tokens_per_minute))
+        except ValueError:
+            logging.warning(f"Ignoring malformed GROQ_RATE_LIMITS entry '{entry}'")
+    return limits
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Process-wide scheduler, so every model client draws on the same budgets"""
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            # Higher Groq tiers set their requests/tokens per minute here
+            _default_scheduler = LLMScheduler(limits=parse_limits(os.getenv("GROQ_RATE_LIMITS")))
+        return _default_scheduler
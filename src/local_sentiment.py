@@ -0,0 +1,197 @@
+import re
+import sys
+import glob
+import argparse
+
+import numpy as np
+
+LABELS = ("POSITIVE", "NEUTRAL", "NEGATIVE")
+
+# Business/tech news polarity lexicon; weights are roughly -2..2
+POSITIVE_TERMS = {
+    2.0: "breakthrough record soars surges skyrocket triumph landmark thrives",
+    1.5: "growth grows raises raised funding profit profitable wins won success successful boost boosts "
+         "surge expands expansion milestone launches launched acquires partnership partners innovative "
+         "outperform outperforms gains rally rallies upgrade upgraded award awarded beats exceeds",
+    1.0: "launch new improves improved improvement efficient efficiency opportunity opportunities leading "
+         "strong stronger momentum adoption demand popular promising positive benefit benefits advance "
+         "advances advancing enable enables empower empowers revolutionize transform transforms secure "
+         "secured investment invests invested valuation unicorn approve approved approval accelerate "
+         "accelerates praised celebrate robust resilient recover recovery rebound",
+}
+NEGATIVE_TERMS = {
+    2.0: "bankruptcy bankrupt collapse collapses fraud scandal lawsuit sued crash plunges plummets layoffs",
+    1.5: "loss losses decline declines declined fall falls fell cut cuts cutting layoff fired fines fined "
+         "breach hacked vulnerability outage recall probe investigation penalty ban banned banning fails "
+         "failed failure shutdown shuts struggles struggling downgrade downgraded slump halt halted",
+    1.0: "risk risks concern concerns warning warns criticism criticized controversy controversial "
+         "delay delayed weak weaker slowdown uncertainty uncertain threat threats challenge "
+         "challenges pressure dispute tension tensions restriction restrictions restrict "
+         "tariff tariffs shortage deficit negative drop drops dropped miss missed setback backlash "
+         "reduction reducing volatile unprofitable accused allegations",
+}
+
+# Words that flip the polarity of the next few tokens
+NEGATORS = frozenset("not no never without hardly neither nor isn't wasn't aren't don't doesn't didn't won't".split())
+NEGATION_WINDOW = 3
+
+TOKEN_RE = re.compile(r"[a-z]+(?:['-][a-z]+)?")
+
+
+class LexiconSentimentClassifier:
+    """CPU-only sentiment tier: a lexicon-weighted linear score per summary.
+
+    Summaries are tokenized once and scored together with NumPy. The score is
+    turned into POSITIVE/NEUTRAL/NEGATIVE probabilities by a softmax with a
+    neutral prior, and the winning probability is reported as the confidence,
+    so callers can send only uncertain summaries to the LLM.
+    """
+    def __init__(self, scale: float = 1.2, neutral_bias: float = 1.0):
+        self.scale = scale
+        self.neutral_bias = neutral_bias
+        self.vocabulary = {}
+        weights = []
+        for terms, sign in ((POSITIVE_TERMS, 1.0), (NEGATIVE_TERMS, -1.0)):
+            for weight, words in terms.items():
+                for word in words.split():
+                    if word not in self.vocabulary:
+                        self.vocabulary[word] = len(weights)
+                        weights.append(sign * weight)
+        self.negator_id = len(weights)
+        # Unknown words map past the end, to a zero weight
+        self.weights = np.array(weights + [0.0, 0.0])
+        self.unknown_id = len(weights) + 1
+
+    def _token_ids(self, texts: list[str]):
+        """Concatenated token ids and the document index of each token"""
+        ids, doc_ids = [], []
+        vocabulary, negator_id, unknown_id = self.vocabulary, self.negator_id, self.unknown_id
+        for doc, text in enumerate(texts):
+            for token in TOKEN_RE.findall(text.lower()):
+                if token in NEGATORS:
+                    ids.append(negator_id)
+                else:
+                    ids.append(vocabulary.get(token, unknown_id))
+                doc_ids.append(doc)
+        return np.array(ids, dtype=np.int64), np.array(doc_ids, dtype=np.int64)
+
+    def scores(self, texts: list[str]) -> np.ndarray:
+        """Evidence-normalized polarity score per text (positive > 0 > negative)"""
+        ids, doc_ids = self._token_ids(texts)
+        token_weights = self.weights[ids]
+
+        # Flip the polarity of tokens shortly after a negator in the same text
+        negated = np.zeros(len(ids), dtype=bool)
+        is_negator = ids == self.negator_id
+        for k in range(1, NEGATION_WINDOW + 1):
+            negated[k:] |= is_negator[:-k] & (doc_ids[k:] == doc_ids[:-k])
+        token_weights = np.where(negated, -token_weights, token_weights)
+
+        totals = np.bincount(doc_ids, weights=token_weights, minlength=len(texts))
+        hits = np.bincount(doc_ids, weights=token_weights != 0, minlength=len(texts))
+        return totals / np.sqrt(hits + 1)
+
+    def probabilities(self, texts: list[str]) -> np.ndarray:
+        """(n, 3) probabilities in LABELS order"""
+        s = self.scores(texts) * self.scale
+        logits = np.stack([s, np.full_like(s, self.neutral_bias), -s], axis=1)
+        logits -= logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def classify_batch(self, texts: list[str]) -> list[tuple[str, float]]:
+        """(label, confidence) for each text"""
+        if not texts:
+            return []
+        probs = self.probabilities(texts)
+        best = probs.argmax(axis=1)
+        return [(LABELS[b], float(p)) for b, p in zip(best, probs[np.arange(len(texts)), best])]
+
+
+def load_labeled_digests(paths: list[str]) -> list[tuple[str, str]]:
+    """(summary, label) pairs from saved news_digest_*.txt files"""
+    pairs = []
+    header = re.compile(r"^• \S+\s+.*\((POSITIVE|NEGATIVE|NEUTRAL)\)\s*$")
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        label, summary = None, []
+        for line in lines:
+            found = header.match(line)
+            if found:
+                label, summary = found.group(1), []
+            elif label and line.startswith("   - Source:"):
+                text = "\n".join(summary).strip()
+                # Placeholders were labeled NEUTRAL without asking the model
+                if text and "unavailable" not in text.lower() and text != "Summary generation failed":
+                    pairs.append((text, label))
+                label = None
+            elif label:
+                summary.append(line[5:] if line.startswith("   - ") else line)
+    return pairs
+
+
+def calibrate(classifier, summaries: list[str], labels: list[str], target_agreement: float = 0.9) -> dict:
+    """Pick the lowest confidence threshold whose locally-kept items agree with
+    the reference labels at least `target_agreement` of the time.
+
+    Returns the threshold with the share of items it keeps local (coverage)
+    and their agreement, plus the whole coverage/agreement curve.
+    """
+    predictions = classifier.classify_batch(summaries)
+    confidence = np.array([c for _, c in predictions])
+    correct = np.array([p == label for (p, _), label in zip(predictions, labels)])
+
+    order = np.argsort(-confidence, kind="stable")
+    kept = np.arange(1, len(order) + 1)
+    agreement = np.cumsum(correct[order]) / kept
+    curve = [
+        # Thresholds are rounded down so the cut still keeps the item it was taken at
+        {"threshold": float(np.floor(confidence[order[k - 1]] * 1e4) / 1e4), "coverage": round(k / len(order), 4),
+         "agreement": round(float(agreement[k - 1]), 4)}
+        for k in kept
+        # Only the last item of a run of equal confidences is a valid cut
+        if k == len(order) or confidence[order[k]] < confidence[order[k - 1]]
+    ]
+    eligible = [point for point in curve if point["agreement"] >= target_agreement]
+    best = max(eligible, key=lambda point: point["coverage"]) if eligible else None
+    return {
+        "samples": len(summaries),
+        "overall_agreement": round(float(correct.mean()), 4) if len(correct) else 0.0,
+        "threshold": best["threshold"] if best else 1.0,
+        "coverage": best["coverage"] if best else 0.0,
+        "agreement": best["agreement"] if best else None,
+        "curve": curve,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Calibrate the local sentiment tier's escalation threshold against saved digests"
+    )
+    parser.add_argument("digests", nargs="*", default=["news_digest_*.txt"], help="Digest files or globs")
+    parser.add_argument("--target", type=float, default=0.9,
+                        help="Required agreement with the LLM labels for items kept local")
+    args = parser.parse_args(argv)
+
+    paths = sorted({path for pattern in args.digests for path in glob.glob(pattern)})
+    pairs = load_labeled_digests(paths)
+    if not pairs:
+        print("No labeled summaries found")
+        return 1
+    result = calibrate(LexiconSentimentClassifier(), [s for s, _ in pairs], [l for _, l in pairs], args.target)
+    print(f"{result['samples']} labeled summaries from {len(paths)} digests; "
+          f"local agreement without escalation: {result['overall_agreement']:.0%}")
+    print(f"{'threshold':>10}{'coverage':>10}{'agreement':>11}")
+    for point in result["curve"]:
+        print(f"{point['threshold']:>10.3f}{point['coverage']:>10.0%}{point['agreement']:>11.0%}")
+    if result["agreement"] is None:
+        print(f"\nNo threshold reaches {args.target:.0%} agreement; escalate everything (threshold 1.0)")
+    else:
+        print(f"\nRecommended threshold: {result['threshold']:.3f} "
+              f"(keeps {result['coverage']:.0%} local at {result['agreement']:.0%} agreement)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
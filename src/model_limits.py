@@ -0,0 +1,70 @@
+import re
+
+# Context windows (tokens) for the Groq models offered in app.py
+MODEL_CONTEXT_TOKENS = {
+    "llama3-70b-8192": 8192,
+    "llama3-8b-8192": 8192,
+    "mixtral-8x7b-32768": 32768,
+}
+DEFAULT_CONTEXT_TOKENS = 8192
+
+# Groq list prices in USD per million (input, output) tokens
+MODEL_PRICING = {
+    "llama3-70b-8192": (0.59, 0.79),
+    "llama3-8b-8192": (0.05, 0.08),
+    "mixtral-8x7b-32768": (0.24, 0.24),
+}
+
+# Groq free-tier (requests/minute, tokens/minute); the scheduler in
+# src/llm_scheduler.py replaces these with the x-ratelimit-* response headers
+MODEL_RATE_LIMITS = {
+    "llama3-70b-8192": (30, 6000),
+    "llama3-8b-8192": (30, 30000),
+    "mixtral-8x7b-32768": (30, 5000),
+}
+DEFAULT_RATE_LIMITS = (30, 6000)
+
+# Rough English average for Llama/Mixtral tokenizers; kept slightly low so
+# estimates err on the side of more tokens
+CHARS_PER_TOKEN = 3.8
+
+# Typical length of a two-paragraph summary, for estimates made without calling the model
+SUMMARY_TOKENS_ESTIMATE = 250
+
+
+def estimate_cost(model_name: str, prompt_tokens: int, completion_tokens: int):
+    """USD cost of a call at list price, or None for models without pricing"""
+    prices = MODEL_PRICING.get(model_name)
+    if not prices:
+        return None
+    return prompt_tokens * prices[0] / 1e6 + completion_tokens * prices[1] / 1e6
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate without loading a tokenizer"""
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+def context_window(model_name: str) -> int:
+    """Context size for a model, falling back to a trailing '-<tokens>' in its name"""
+    if model_name in MODEL_CONTEXT_TOKENS:
+        return MODEL_CONTEXT_TOKENS[model_name]
+    found = re.search(r"-(\d{4,6})$", model_name or "")
+    return int(found.group(1)) if found else DEFAULT_CONTEXT_TOKENS
+
+
+def rate_limits(model_name: str) -> tuple[int, int]:
+    """(requests/minute, tokens/minute) to assume for a model before Groq reports its own"""
+    return MODEL_RATE_LIMITS.get(model_name, DEFAULT_RATE_LIMITS)
+
+
+def input_token_budget(model_name: str, prompt_tokens: int, output_tokens: int = 1024,
+                       margin: float = 0.1, tokens_per_minute: int = None) -> int:
+    """Tokens of article text that fit in one call next to the prompt and the reply.
+
+    The call has to fit both the context window and one minute of the
+    model's token budget (`tokens_per_minute`, default: its free-tier limit),
+    since Groq rejects a request larger than the whole per-minute allowance.
+    """
+    limit = min(context_window(model_name), tokens_per_minute or rate_limits(model_name)[1])
+    return max(512, int(limit * (1 - margin)) - prompt_tokens - output_tokens)
@@ -1,17 +1,19 @@
 import requests 
 import os 
 from datetime import datetime, timedelta, timezone 
-from dotenv import load_dotenv 
-
-# load environment variables from .env file 
-load_dotenv()
+from src.http_client import get_http_client
+from src.instrumentation import span
 
 class NewsFetcher:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, client=None, base_url=None):
         self.api_key = api_key or os.getenv("NEWSAPI_KEY")
+        self.client = client or get_http_client()
         if not self.api_key:
             raise ValueError("NEWSAPI_KEY not found in environment variables or .env file")
-        self.base_url = "https://newsapi.org/v2/everything"
+        # NEWSAPI_BASE_URL points the fetcher at a stand-in server (see benchmarks/)
+        self.base_url = base_url or os.getenv("NEWSAPI_BASE_URL", "https://newsapi.org/v2/everything")
+        # NewsAPI requests made by this fetcher, for quota accounting
+        self.request_count = 0
 
     def fetch_articles(self, query: str, num_articles: int = 5, days_back: int = 1, sources: str="", language: str = "en") -> list:
         """ 
@@ -35,14 +37,73 @@ class NewsFetcher:
         if sources:
             params["sources"] = sources 
 
+        articles, _ = self._fetch_page(params)
+        return articles
+
+    @staticmethod
+    def window(days_back: int, watermark: str = None) -> tuple[str, str, bool]:
+        """(from, to, narrowed) of a query reaching `days_back` days back, or only to `watermark` if that is later"""
+        to_date = datetime.now(timezone.utc)
+        start = (to_date - timedelta(days=days_back)).strftime("%Y-%m-%d")
+        if watermark and watermark > start:
+            return watermark.rstrip("Z"), to_date.strftime("%Y-%m-%dT%H:%M:%S"), True
+        return start, to_date.strftime("%Y-%m-%dT%H:%M:%S"), False
+
+    def iter_articles(self, query: str, num_articles: int = 5, days_back: int = 1, sources: str = "",
+                      language: str = "en", seen_index=None, incremental: bool = False,
+                      page_size: int = 20, max_pages: int = 5, window: tuple = None):
+        """
+        Stream articles page by page until `num_articles` new ones were yielded,
+        results run out, or `max_pages` requests were spent.
+        Articles already in `seen_index` for this query are skipped; with
+        `incremental`, only articles published since the query's last recorded
+        run are searched, newest first. `window` is a precomputed
+        NewsFetcher.window(); its `to` is what the caller records as the next watermark.
+        """
+        if window is None:
+            watermark = seen_index.watermark(query) if (incremental and seen_index) else None
+            window = self.window(days_back, watermark)
+        from_date, to_date, narrowed = window
+        params = {
+            "q": query,
+            "pageSize": page_size,
+            "from": from_date,
+            "to": to_date,
+            "language": language,
+            # Past the watermark everything is new, so the newest come first
+            "sortBy": "publishedAt" if narrowed else "relevancy",
+            "apiKey": self.api_key
+        }
+        if sources:
+            params["sources"] = sources
+
+        found = 0
+        for page in range(1, max_pages + 1):
+            params["page"] = page
+            articles, total_results = self._fetch_page(params)
+            for article in articles:
+                if seen_index and seen_index.is_seen(query, article["url"]):
+                    continue
+                yield article
+                found += 1
+                if found >= num_articles:
+                    return
+            if not articles or page * page_size >= total_results:
+                return
+
+    def _fetch_page(self, params: dict) -> tuple[list, int]:
+        """Run one NewsAPI request; returns (articles, totalResults)"""
+        self.request_count += 1
         try:
-            response = requests.get(self.base_url, params=params)
+            with span("fetch_articles", page=params.get("page", 1)) as fetch_span:
+                response = self.client.get(self.base_url, params=params)
+                fetch_span.add("bytes", len(response.content))
             # Check for 401 specifically 
             if response.status_code == 401:
                 print("401 Unauthorized: Check your API key")
                 print(f"Key key: {self.api_key[:3]}...{self.api_key[-3:]}")
                 print("Verify your key at https://newsapi_org/account")
-                return []
+                return [], 0
             
             response.raise_for_status()
             data = response.json()
@@ -57,13 +118,13 @@ class NewsFetcher:
                         "published": article["publishedAt"]
                     }
                     for article in data["articles"]
-                ]
+                ], data.get("totalResults", 0)
 
             else:
                 print(f"API Error: {data.get('message', 'Unknown error')}")
-                return []
+                return [], 0
 
 
         except requests.exceptions.RequestException as e:
             print(f"Request failed: {str(e)}")
-            return [] 
+            return [], 0
@@ -0,0 +1,169 @@
+import os
+import queue
+import logging
+import threading
+import multiprocessing
+
+from src.instrumentation import current_span
+
+# Seconds a new worker may take to start before it is given up on
+WORKER_START_TIMEOUT = 60.0
+
+
+class ParseTimeout(TimeoutError):
+    """Raised when a page takes longer than the pool's timeout to parse"""
+
+
+def default_parse_workers() -> int:
+    """NEWS_PARSE_WORKERS, else one worker per core up to 4 (0, parse in-process, on one core)"""
+    value = os.getenv("NEWS_PARSE_WORKERS")
+    if value is not None:
+        return max(0, int(value))
+    cores = os.cpu_count() or 1
+    return min(4, cores) if cores > 1 else 0
+
+
+def _serve(conn):
+    """Worker process: parse each page received as (encoding, raw bytes) and send back its text"""
+    from src.text_extract_summarizer import FullTextExtractor
+
+    conn.send(("ready", None))
+    while True:
+        try:
+            encoding = conn.recv_bytes().decode()
+            html = conn.recv_bytes()
+        except (EOFError, OSError):
+            return
+        try:
+            conn.send(("ok", FullTextExtractor.parse_html(html, encoding)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {str(e)}"))
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.pages = 0
+        self.ready = False
+
+    def wait_ready(self):
+        """Block until the worker has imported the parser, so start-up is not counted as parse time"""
+        if self.ready:
+            return
+        if not self.conn.poll(WORKER_START_TIMEOUT):
+            raise RuntimeError(f"Parse worker did not start within {WORKER_START_TIMEOUT:g}s")
+        self.conn.recv()
+        self.ready = True
+
+    def stop(self, kill: bool = False):
+        if kill:
+            self.process.kill()
+        self.conn.close()
+        self.process.join(1.0)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+
+class ParsePool:
+    """Parses article HTML in worker processes, off the fetch threads and the GIL.
+
+    Fetch threads hand a page over as its raw bytes and encoding, for lxml
+    in the worker to decode, and wait, without holding the GIL, for the
+    extracted text to come back, so downloads keep overlapping while pages
+    are parsed on every core. At most `workers`
+    pages are parsed at once. A page that takes longer than `timeout`
+    seconds has its worker killed and replaced, and raises ParseTimeout.
+    Workers start on first use and are replaced after
+    `max_pages_per_worker` pages to bound libxml2's memory growth.
+    """
+    def __init__(self, workers: int = None, timeout: float = 10.0, max_pages_per_worker: int = 500,
+                 start_method: str = None):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.timeout = timeout
+        self.max_pages_per_worker = max_pages_per_worker
+        if start_method is None:
+            # Forking a process that runs fetch threads is unsafe; a fork server
+            # with the parser preloaded starts (and replaces) workers quickly
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._context = multiprocessing.get_context(start_method)
+        if start_method == "forkserver":
+            self._context.set_forkserver_preload(["src.text_extract_summarizer", "lxml.html"])
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._idle = queue.LifoQueue()
+        self._started = set()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def parse_html(self, html, encoding: str = 'utf-8') -> str:
+        """Article text of `html` (str, or bytes in `encoding`), parsed by a worker process"""
+        if isinstance(html, str):
+            html, encoding = html.encode('utf-8', errors='replace'), 'utf-8'
+        with self._slots:
+            worker = self._checkout()
+            try:
+                worker.wait_ready()
+                worker.conn.send_bytes(encoding.encode())
+                worker.conn.send_bytes(html)
+                if not worker.conn.poll(self.timeout):
+                    current = current_span()
+                    if current is not None:
+                        current.add("parse_timeouts", 1)
+                    raise ParseTimeout(f"Parsing {len(html)} bytes took over {self.timeout:g}s")
+                status, result = worker.conn.recv()
+            except BaseException:
+                # A timed-out or crashed worker is killed rather than reused
+                self._retire(worker, kill=True)
+                raise
+            worker.pages += 1
+            if worker.pages >= self.max_pages_per_worker:
+                self._retire(worker)
+            else:
+                self._idle.put(worker)
+        if status != "ok":
+            raise ValueError(result)
+        return result
+
+    def _checkout(self) -> _Worker:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("ParsePool is closed")
+            worker = _Worker(self._context)
+            self._started.add(worker)
+        return worker
+
+    def _retire(self, worker: _Worker, kill: bool = False):
+        with self._lock:
+            self._started.discard(worker)
+        try:
+            worker.stop(kill=kill)
+        except Exception as e:
+            logging.warning(f"Could not stop parse worker {worker.process.pid}: {str(e)}")
+
+    def close(self):
+        """Stop every worker; parses still running are killed"""
+        with self._lock:
+            self._closed = True
+            workers = list(self._started)
+            self._started.clear()
+        idle = set()
+        while True:
+            try:
+                idle.add(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for worker in workers:
+            worker.stop(kill=worker not in idle)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,239 @@
+import asyncio
+import logging
+import functools
+import contextvars
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from src.model_limits import estimate_tokens
+from src.instrumentation import span, usage_scope
+from src.ranking import title_mismatch
+from src.text_extract_summarizer import SUMMARY_FAILED
+
+
+class ArticlePipeline:
+    """Summarize and classify articles concurrently.
+
+    Scraping and LLM calls are bounded separately: `scrape_workers` limits how
+    many article pages are downloaded at once, `llm_workers` limits how many
+    Groq requests are in flight at once. With `sentiment_batch_size` > 1,
+    finished summaries are buffered and classified in one call per batch;
+    when results are streamed to a caller, a partial batch is classified once
+    no article has finished for `flush_seconds`, so progress keeps moving.
+    Summaries that share too few words with their headline (fewer than
+    `title_overlap` of them) get `title_mismatch` set on their result.
+    """
+    def __init__(self, summarizer, sentiment_analyzer, scrape_workers: int = 8, llm_workers: int = 4,
+                 sentiment_batch_size: int = 1, title_overlap: float = 0.2, flush_seconds: float = 1.0):
+        self.summarizer = summarizer
+        self.sentiment_analyzer = sentiment_analyzer
+        self.scrape_workers = max(1, scrape_workers)
+        self.llm_workers = max(1, llm_workers)
+        self.sentiment_batch_size = max(1, sentiment_batch_size)
+        self.title_overlap = title_overlap
+        self.flush_seconds = flush_seconds
+        self._scrape_slots = threading.BoundedSemaphore(self.scrape_workers)
+        self._llm_slots = threading.BoundedSemaphore(self.llm_workers)
+
+    def process_article(self, article: dict, classify: bool = True, on_token=None) -> dict:
+        """Run one article through extraction, summarization and sentiment.
+
+        With `on_token(text)`, the summary is streamed and each piece is passed
+        on as the model produces it. LLM usage is attributed to the article's
+        URL on the run recorder.
+        """
+        with self._scrape_slots:
+            clean_text = self.summarizer.get_content(article)
+
+        with usage_scope(article['url']):
+            if clean_text is None:
+                summary = "Summary unavailable: Could not retrieve content"
+            elif on_token:
+                with self._llm_slots:
+                    parts = []
+                    for part in self.summarizer.stream_text(clean_text, url=article['url']):
+                        parts.append(part)
+                        on_token(part)
+                    summary = "".join(parts)
+            else:
+                with self._llm_slots:
+                    summary = self.summarizer.summarize_text(clean_text, url=article['url'])
+
+            sentiment = None
+            if classify:
+                with self._llm_slots:
+                    sentiment = self.sentiment_analyzer.analyze(summary)
+
+        return self._check_title(self._result(article, summary, sentiment), clean_text is not None)
+
+    async def aprocess_article(self, article: dict, scrape_slots, llm_slots) -> dict:
+        """Async variant of process_article using the chains' ainvoke path"""
+        async with scrape_slots:
+            clean_text = await asyncio.to_thread(self.summarizer.get_content, article)
+
+        with usage_scope(article['url']):
+            if clean_text is None:
+                summary = "Summary unavailable: Could not retrieve content"
+            else:
+                async with llm_slots:
+                    summary = await self.summarizer.asummarize_text(clean_text, url=article['url'])
+
+            async with llm_slots:
+                sentiment = await self.sentiment_analyzer.aanalyze(summary)
+
+        return self._check_title(self._result(article, summary, sentiment), clean_text is not None)
+
+    def plan(self, raw_articles: list) -> list[dict]:
+        """Extract every article and estimate its LLM work without calling a model.
+
+        Returns one dict per article with its title, url, extracted `input_tokens`
+        and the summarizer's `llm_calls`, `prompt_tokens` and `completion_tokens`.
+        """
+        def plan_article(article):
+            with self._scrape_slots:
+                clean_text = self.summarizer.get_content(article)
+            estimate = {"title": article['title'], "url": article['url'],
+                        "input_tokens": estimate_tokens(clean_text) if clean_text else 0}
+            if clean_text is None:
+                estimate.update(llm_calls=0, prompt_tokens=0, completion_tokens=0)
+            else:
+                estimate.update(self.summarizer.plan(clean_text, url=article['url']))
+            return estimate
+
+        if not raw_articles:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(raw_articles), self.scrape_workers),
+                                thread_name_prefix="article") as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, plan_article, article)
+                for article in raw_articles
+            ]
+            return [future.result() for future in futures]
+
+    def iter_results(self, raw_articles: list, on_token=None, streaming: bool = False):
+        """Yield (index, processed_article) pairs as soon as each one finishes.
+
+        With `streaming`, buffered summaries are classified after `flush_seconds`
+        without another article finishing, instead of waiting for a full batch.
+
+        `on_token(index, text)` receives summary pieces as they stream in, from worker threads.
+        """
+        if not raw_articles:
+            return
+        batched = self.sentiment_batch_size > 1
+        max_workers = min(len(raw_articles), self.scrape_workers + self.llm_workers)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="article") as executor:
+            # Each task runs in a copy of the caller's context, so spans reach the caller's run recorder
+            futures = {
+                executor.submit(
+                    contextvars.copy_context().run, self.process_article, article, not batched,
+                    functools.partial(on_token, i) if on_token else None
+                ): i
+                for i, article in enumerate(raw_articles)
+            }
+            pending = []
+            remaining = set(futures)
+            while remaining:
+                timeout = self.flush_seconds if (streaming and pending) else None
+                finished, remaining = wait(remaining, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not finished:
+                    # Nothing finished for a while: classify what is buffered so it can be shown
+                    yield from self._classify_batch(pending)
+                    pending = []
+                    continue
+                for future in finished:
+                    i = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        article = raw_articles[i]
+                        logging.error(f"Processing failed for {article.get('url')}: {str(e)}")
+                        result = self._failed(article)
+
+                    if not batched or result["sentiment"] is not None:
+                        yield i, result
+                        continue
+
+                    pending.append((i, result))
+                    if len(pending) >= self.sentiment_batch_size:
+                        yield from self._classify_batch(pending)
+                        pending = []
+            # Whatever is still buffered once every article has finished
+            if pending:
+                yield from self._classify_batch(pending)
+
+    def _classify_batch(self, pending: list):
+        """Fill in sentiments for buffered results with one batched LLM call"""
+        with self._llm_slots, usage_scope(*(result["url"] for _, result in pending)):
+            sentiments = self.sentiment_analyzer.analyze_batch(
+                [result["summary"] for _, result in pending],
+                batch_size=self.sentiment_batch_size
+            )
+        for (i, result), sentiment in zip(pending, sentiments):
+            result["sentiment"] = sentiment
+            yield i, result
+
+    def run(self, raw_articles: list, on_result=None, on_token=None) -> list[dict]:
+        """Process all articles and return them in their original order.
+
+        `on_result(done, total, index, article)` is called as each article completes;
+        `on_token(index, text)` streams summaries as in iter_results.
+        """
+        processed = [None] * len(raw_articles)
+        streaming = bool(on_result or on_token)
+        for done, (i, result) in enumerate(self.iter_results(raw_articles, on_token=on_token, streaming=streaming), 1):
+            processed[i] = result
+            if on_result:
+                on_result(done, len(raw_articles), i, result)
+        return processed
+
+    async def arun(self, raw_articles: list, on_result=None) -> list[dict]:
+        """Async variant of run, for callers that already own an event loop"""
+        scrape_slots = asyncio.Semaphore(self.scrape_workers)
+        llm_slots = asyncio.Semaphore(self.llm_workers)
+
+        async def process(i, article):
+            try:
+                return i, await self.aprocess_article(article, scrape_slots, llm_slots)
+            except Exception as e:
+                logging.error(f"Processing failed for {article.get('url')}: {str(e)}")
+                return i, self._failed(article)
+
+        processed = [None] * len(raw_articles)
+        tasks = [process(i, article) for i, article in enumerate(raw_articles)]
+        for done, task in enumerate(asyncio.as_completed(tasks), 1):
+            i, result = await task
+            processed[i] = result
+            if on_result:
+                on_result(done, len(raw_articles), i, result)
+        return processed
+
+    def _check_title(self, result: dict, summarized: bool) -> dict:
+        """Flag a summary that does not look like it is about its headline, e.g. the wrong page was scraped"""
+        if not summarized or not self.title_overlap or result["summary"] == SUMMARY_FAILED:
+            return result
+        with span("title_check") as check_span:
+            if title_mismatch(result["title"], result["summary"], self.title_overlap):
+                check_span.add("mismatched", 1)
+                result["title_mismatch"] = True
+                logging.warning(f"Summary of {result['url']} does not match its title '{result['title']}'")
+        return result
+
+    @staticmethod
+    def _result(article: dict, summary: str, sentiment) -> dict:
+        result = {
+            "title": article['title'],
+            "source": article['source'],
+            "url": article['url'],
+            "summary": summary,
+            "sentiment": sentiment
+        }
+        if article.get('published'):
+            result["published"] = article['published']
+        if article.get('also_reported_by'):
+            result["also_reported_by"] = article['also_reported_by']
+        return result
+
+    @classmethod
+    def _failed(cls, article: dict) -> dict:
+        return cls._result(article, SUMMARY_FAILED, "NEUTRAL")
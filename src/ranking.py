@@ -0,0 +1,156 @@
+import re
+import math
+import logging
+
+from src.instrumentation import span
+from src.text_cleaning import TITLE_SUFFIX_RE, TRUNCATION_RE
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# NewsAPI query operators, which are not search terms
+_OPERATORS = {"and", "or", "not"}
+STOPWORDS = frozenset("""
+    a an the and or not of in on at to for from by with about as into over after before
+    is are was were be been being has have had do does did will would can could should may might
+    it its this that these those their there they them he she his her we our you your i
+    new news says said how why what who when where which than then also just more most
+""".split())
+
+
+def _stem(word: str) -> str:
+    """Crude plural folding, so 'startups' matches 'startup'"""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def terms(text: str) -> list[str]:
+    """Lowercased, plural-folded words of `text` without stopwords"""
+    return [_stem(word) for word in _WORD_RE.findall((text or "").lower()) if word not in STOPWORDS]
+
+
+def query_terms(query: str) -> list[str]:
+    """Search terms of a NewsAPI query: operators and excluded (-term) words are dropped"""
+    kept = [
+        word for word in query.split()
+        if not word.startswith("-") and word.strip('"()').lower() not in _OPERATORS
+    ]
+    return list(dict.fromkeys(terms(" ".join(kept))))
+
+
+def _title(article: dict) -> str:
+    return TITLE_SUFFIX_RE.sub("", article.get("title") or "")
+
+
+def title_mismatch(title: str, summary: str, min_overlap: float = 0.2) -> bool:
+    """True when a summary shares too few of its headline's words to be about the same story.
+
+    Headlines with fewer than three content words are not judged.
+    """
+    title_terms = set(terms(TITLE_SUFFIX_RE.sub("", title or "")))
+    if len(title_terms) < 3:
+        return False
+    overlap = len(title_terms & set(terms(summary))) / len(title_terms)
+    return overlap < min_overlap
+
+
+class RelevanceRanker:
+    """Pick the best `top_n` of an over-fetched candidate list before anything is scraped.
+
+    Candidates are scored locally against the query with BM25 over the title
+    (counted twice) and NewsAPI snippet, weighted by how many query terms
+    they contain and by title/snippet quality. NewsAPI's relevancy order is
+    kept as a small tie-breaker. Candidates containing no query term are
+    dropped as off-topic, unless none contains one. Picks are made greedily,
+    and each further article from an already picked source has its score
+    multiplied by `diversity`.
+    """
+    def __init__(self, overfetch: int = 3, diversity: float = 0.7, k1: float = 1.2, b: float = 0.75):
+        self.overfetch = max(1, overfetch)
+        self.diversity = diversity
+        self.k1 = k1
+        self.b = b
+
+    def candidates(self, num_articles: int) -> int:
+        """How many articles to request for `num_articles` picks (NewsAPI pages hold at most 100)"""
+        return min(100, max(num_articles, num_articles * self.overfetch))
+
+    @staticmethod
+    def quality(article: dict) -> float:
+        """1.0 for a usable headline and snippet, less for thin ones, 0 for removed articles"""
+        title = _title(article).strip()
+        if not title or title == "[Removed]":
+            return 0.0
+        score = 1.0
+        if len(title.split()) < 4:
+            score *= 0.8
+        letters = [c for c in title if c.isalpha()]
+        if letters and sum(c.isupper() for c in letters) / len(letters) > 0.7:
+            score *= 0.8
+        if len(TRUNCATION_RE.sub("", article.get("content") or "").strip()) < 80:
+            score *= 0.7
+        return score
+
+    def scores(self, query: str, articles: list[dict]) -> list[tuple[float, float]]:
+        """(score, share of query terms matched) per article"""
+        wanted = query_terms(query)
+        documents = [
+            terms(_title(article)) * 2 + terms(TRUNCATION_RE.sub("", article.get("content") or ""))
+            for article in articles
+        ]
+        if not wanted or not documents:
+            return [(self.quality(article), 1.0) for article in articles]
+
+        average_length = sum(map(len, documents)) / len(documents) or 1.0
+        frequencies = []
+        for document in documents:
+            counts = {}
+            for term in document:
+                counts[term] = counts.get(term, 0) + 1
+            frequencies.append(counts)
+        idf = {
+            term: math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+            for term in wanted
+            for df in [sum(1 for counts in frequencies if term in counts)]
+        }
+
+        bm25 = []
+        for document, counts in zip(documents, frequencies):
+            norm = self.k1 * (1 - self.b + self.b * len(document) / average_length)
+            bm25.append(sum(
+                idf[term] * counts[term] * (self.k1 + 1) / (counts[term] + norm)
+                for term in wanted if term in counts
+            ))
+        best = max(bm25) or 1.0
+
+        results = []
+        for i, (article, counts) in enumerate(zip(articles, frequencies)):
+            coverage = sum(1 for term in wanted if term in counts) / len(wanted)
+            prior = 0.05 * (1 - i / len(articles))
+            score = (bm25[i] / best * (0.5 + 0.5 * coverage) + prior) * self.quality(article)
+            results.append((score, coverage))
+        return results
+
+    def rank(self, query: str, articles: list[dict], top_n: int) -> list[dict]:
+        """The `top_n` best candidates for `query`, best first"""
+        with span("rank", items=len(articles)) as rank_span:
+            scored = self.scores(query, articles)
+            candidates = [i for i, (score, _) in enumerate(scored) if score > 0]
+            on_topic = [i for i in candidates if scored[i][1] > 0]
+            if on_topic:
+                rank_span.add("off_topic", len(candidates) - len(on_topic))
+                candidates = on_topic
+
+            picked, per_source = [], {}
+            while candidates and len(picked) < top_n:
+                best = max(candidates, key=lambda i: scored[i][0] * self.diversity ** per_source.get(
+                    articles[i].get("source"), 0))
+                candidates.remove(best)
+                picked.append(best)
+                source = articles[best].get("source")
+                per_source[source] = per_source.get(source, 0) + 1
+
+        if len(picked) < len(articles):
+            logging.info(f"Ranked {len(articles)} candidates for '{query}', keeping {len(picked)}")
+        return [articles[i] for i in picked]
@@ -0,0 +1,111 @@
+from langchain_core.runnables import Runnable
+from langchain_core.language_models import LanguageModelInput
+from langchain_core.messages import BaseMessage
+
+from src.model_limits import estimate_tokens
+
+
+def groq_chat_model(model_name: str, api_key: str, temperature: float, scheduler=None):
+    """ChatGroq client whose rate-limit headers feed `scheduler`.
+
+    The Groq SDK's own retries are turned off when a scheduler is given, so
+    429s reach the scheduler, which spaces out and retries calls itself.
+    """
+    from langchain_groq import ChatGroq
+    from src.llm_callbacks import token_usage_callback
+
+    options = {}
+    if scheduler is not None:
+        import groq
+
+        on_response, on_aresponse = scheduler.response_hooks(model_name)
+        options = {
+            "max_retries": 0,
+            "http_client": groq.DefaultHttpxClient(event_hooks={"response": [on_response]}),
+            "http_async_client": groq.DefaultAsyncHttpxClient(event_hooks={"response": [on_aresponse]}),
+        }
+    return ChatGroq(
+        temperature=temperature,
+        model_name=model_name,
+        api_key=api_key,
+        callbacks=[token_usage_callback],
+        **options
+    )
+
+
+class ScheduledChatModel(Runnable[LanguageModelInput, BaseMessage]):
+    """Chat model wrapper that sends every call through an LLMScheduler.
+
+    `models` maps model names to chat models: `model_name` is the primary
+    one and `overflow`, if given, takes calls while the primary is rate
+    limited. Each call reserves its estimated prompt tokens plus
+    `completion_tokens` from the chosen model's budget, and rate-limited
+    calls are retried. A stream is only retried before its first chunk.
+    """
+    def __init__(self, models: dict, model_name: str, scheduler, overflow: str = None,
+                 completion_tokens: int = 256):
+        self.models = models
+        self.model_name = model_name
+        self.scheduler = scheduler
+        self.overflow = overflow if overflow in models and overflow != model_name else None
+        self.completion_tokens = completion_tokens
+
+    def _tokens(self, input) -> int:
+        text = input.to_string() if hasattr(input, "to_string") else str(input)
+        return estimate_tokens(text) + self.completion_tokens
+
+    def invoke(self, input, config=None, **kwargs):
+        tokens = self._tokens(input)
+        attempt = 0
+        while True:
+            chosen = self.scheduler.acquire(self.model_name, tokens, self.overflow)
+            try:
+                return self.models[chosen].invoke(input, config, **kwargs)
+            except Exception as e:
+                if not self.scheduler.should_retry(chosen, e, attempt):
+                    raise
+            attempt += 1
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        tokens = self._tokens(input)
+        attempt = 0
+        while True:
+            chosen = await self.scheduler.aacquire(self.model_name, tokens, self.overflow)
+            try:
+                return await self.models[chosen].ainvoke(input, config, **kwargs)
+            except Exception as e:
+                if not self.scheduler.should_retry(chosen, e, attempt):
+                    raise
+            attempt += 1
+
+    def stream(self, input, config=None, **kwargs):
+        tokens = self._tokens(input)
+        attempt = 0
+        while True:
+            chosen = self.scheduler.acquire(self.model_name, tokens, self.overflow)
+            started = False
+            try:
+                for chunk in self.models[chosen].stream(input, config, **kwargs):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started or not self.scheduler.should_retry(chosen, e, attempt):
+                    raise
+            attempt += 1
+
+    async def astream(self, input, config=None, **kwargs):
+        tokens = self._tokens(input)
+        attempt = 0
+        while True:
+            chosen = await self.scheduler.aacquire(self.model_name, tokens, self.overflow)
+            started = False
+            try:
+                async for chunk in self.models[chosen].astream(input, config, **kwargs):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started or not self.scheduler.should_retry(chosen, e, attempt):
+                    raise
+            attempt += 1
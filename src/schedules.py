@@ -0,0 +1,124 @@
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+# "@every 30m", "@every 6h", "@every 1d"
+EVERY_RE = re.compile(r"@every\s+(\d+)\s*([mhd])$")
+EVERY_UNITS = {"m": 60, "h": 3600, "d": 86400}
+ALIASES = {"@hourly": "0 * * * *", "@daily": "0 0 * * *", "@weekly": "0 0 * * 0"}
+# (name, lowest, highest) of the five cron fields
+CRON_FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 6))
+
+
+# One item of a cron field list: '*', '5' or '1-5', with an optional '/step'
+CRON_PART_RE = re.compile(r"(\*|(\d+)(?:-(\d+))?)(?:/(\d+))?$")
+
+
+def _cron_field(value: str, name: str, low: int, high: int) -> frozenset:
+    """Values matched by one cron field: '*', '5', '1-5', '*/15', '0-30/10' or comma lists of these"""
+    values = set()
+    for part in value.split(","):
+        match = CRON_PART_RE.match(part)
+        if not match:
+            raise ValueError(f"cron {name} '{value}' is not '*', a number or a range, with an optional /step")
+        whole, first, last, step = match.groups()
+        if step is not None and int(step) == 0:
+            raise ValueError(f"cron {name} '{value}' has a zero step")
+        if whole == "*":
+            start, end = low, high
+        elif last is not None:
+            start, end = int(first), int(last)
+        else:
+            start = end = int(first)
+            if step:
+                # '5/15' runs from 5 to the field's highest value
+                end = high
+        if not (low <= start <= end <= high):
+            raise ValueError(f"cron {name} '{value}' is outside {low}-{high}")
+        values.update(range(start, end + 1, int(step or 1)))
+    return frozenset(values)
+
+
+class CronSchedule:
+    """When a schedule fires: a 5-field cron expression (minute hour day month weekday),
+    @hourly/@daily/@weekly, or '@every <n>m|h|d'.
+
+    Cron fields accept '*', numbers, ranges, steps and lists; weekday 0 is
+    Sunday. Like cron, a schedule that restricts both day and weekday fires
+    when either matches. Times are local, with minute resolution.
+    """
+    def __init__(self, spec: str):
+        self.spec = " ".join(spec.split())
+        self.interval = None
+        every = EVERY_RE.match(self.spec)
+        if every:
+            self.interval = timedelta(seconds=int(every.group(1)) * EVERY_UNITS[every.group(2)])
+            if not self.interval:
+                raise ValueError(f"Schedule '{spec}' has a zero interval")
+            return
+        fields = ALIASES.get(self.spec, self.spec).split()
+        if len(fields) != 5:
+            raise ValueError(f"Schedule '{spec}' is not a 5-field cron expression, an @alias or '@every <n>m|h|d'")
+        # Sunday may also be written as 7
+        fields[4] = ",".join("0" if part == "7" else part for part in fields[4].split(","))
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            _cron_field(value, *field) for value, field in zip(fields, CRON_FIELDS)
+        )
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = (moment.isoweekday() % 7) in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_run(self, after: datetime) -> datetime:
+        """First time strictly after `after` that the schedule fires"""
+        if self.interval is not None:
+            return after + self.interval
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Skip whole days and hours that cannot match; four years covers every valid expression
+        limit = moment + timedelta(days=366 * 4)
+        while moment < limit:
+            if moment.month not in self.months or not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Schedule '{self.spec}' never fires")
+
+    def __repr__(self):
+        return f"CronSchedule({self.spec!r})"
+
+
+@dataclass
+class Schedule:
+    """A digest built whenever `when` fires"""
+    topic: str
+    when: CronSchedule
+    num_articles: int = 5
+    days_back: int = 1
+    model: str = "llama3-70b-8192"
+    next_run: datetime = None
+    last_job_id: str = None
+
+    @classmethod
+    def parse(cls, value: str, **defaults) -> "Schedule":
+        """Parse 'TOPIC=WHEN' (e.g. 'AI Startups=0 7 * * *' or 'Chip Industry=@every 6h')"""
+        topic, separator, when = value.partition("=")
+        if not separator or not topic.strip() or not when.strip():
+            raise ValueError(f"Schedule '{value}' should look like 'TOPIC=0 7 * * *' or 'TOPIC=@every 6h'")
+        return cls(topic.strip(), CronSchedule(when), **defaults)
+
+    def to_dict(self) -> dict:
+        return {
+            "topic": self.topic, "when": self.when.spec, "num_articles": self.num_articles,
+            "days_back": self.days_back, "model": self.model,
+            "next_run": self.next_run.isoformat(timespec="seconds") if self.next_run else None,
+            "last_job_id": self.last_job_id,
+        }
@@ -0,0 +1,84 @@
+import os
+import time
+import sqlite3
+import threading
+
+
+class SeenArticleIndex:
+    """Persistent record of which article URLs each query has already processed.
+
+    Alongside the URLs it keeps a per-query watermark: the time the last
+    successful run searched up to. Incremental runs search only from there
+    on, so a run with nothing new costs a single NewsAPI request. New
+    articles that a run fetched but did not pick (beyond `num_articles`, or
+    ranked out) are not offered again.
+    """
+    def __init__(self, path: str = None, retention_days: int = 30):
+        self.path = path or os.getenv("NEWS_DIGEST_SEEN_INDEX", os.path.join(".cache", "seen_articles.sqlite"))
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS seen (
+                query TEXT NOT NULL,
+                url TEXT NOT NULL,
+                published TEXT,
+                seen_at REAL NOT NULL,
+                PRIMARY KEY (query, url)
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS watermarks (
+                query TEXT PRIMARY KEY,
+                published TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _key(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def is_seen(self, query: str, url: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM seen WHERE query = ? AND url = ?", (self._key(query), url)
+            ).fetchone()
+        return row is not None
+
+    def watermark(self, query: str):
+        """End of the window searched by the query's last run, or None before the first run"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT published FROM watermarks WHERE query = ?", (self._key(query),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def record_run(self, query: str, articles: list[dict], until: str = None):
+        """Mark articles as processed and set the watermark to `until`, the run's `to`; call after a successful run"""
+        now = time.time()
+        key = self._key(query)
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO seen (query, url, published, seen_at) VALUES (?, ?, ?, ?)",
+                [(key, article["url"], article.get("published"), now) for article in articles]
+            )
+            if until:
+                self._conn.execute(
+                    "INSERT INTO watermarks (query, published, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(query) DO UPDATE SET "
+                    "published = excluded.published, updated_at = excluded.updated_at",
+                    (key, until, now)
+                )
+            self._conn.execute(
+                "DELETE FROM seen WHERE seen_at < ?", (now - self.retention_days * 86400,)
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,469 @@
+import json
+import signal
+import logging
+import argparse
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from dotenv import load_dotenv
+
+from src import instrumentation
+from src.cache import ContentCache
+from src.dedup import deduplicate
+from src.digest_generator import FORMATS, DigestBuilder, DailyDigestGenerator
+from src.digest_store import DigestStore
+from src.http_client import HttpClient
+from src.jobs import JobManager
+from src.llm_scheduler import get_llm_scheduler
+from src.model_limits import MODEL_CONTEXT_TOKENS, SUMMARY_TOKENS_ESTIMATE
+from src.news_fetcher import NewsFetcher
+from src.parse_pool import ParsePool, default_parse_workers
+from src.pipeline import ArticlePipeline
+from src.ranking import RelevanceRanker
+from src.schedules import CronSchedule, Schedule
+
+SENTIMENT_MODEL = "llama3-8b-8192"
+DEFAULT_MODEL = "llama3-70b-8192"
+# Summaries classified per sentiment call
+SENTIMENT_BATCH_SIZE = 5
+CONTENT_TYPES = {"txt": "text/plain", "md": "text/markdown", "html": "text/html", "json": "application/json"}
+
+
+class BackpressureError(RuntimeError):
+    """Raised when a digest job is refused because the service cannot take more work yet"""
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def run_digest(job, topic, num_articles, days_back, fetcher, summarizer, sentiment_analyzer, cache, store,
+               ranker=None):
+    """Background job: fetch, summarize and classify, publishing progress on the job.
+
+    With a `ranker` (RelevanceRanker), candidates are over-fetched and only
+    the best `num_articles` are processed.
+    """
+    recorder = instrumentation.start_run()
+
+    job.update(message=f"Fetching {num_articles} articles about '{topic}'...")
+    raw_articles = fetcher.fetch_articles(
+        query=topic, num_articles=ranker.candidates(num_articles) if ranker else num_articles, days_back=days_back
+    )
+    if not raw_articles:
+        raise ValueError("No articles found. Please try a different topic or check your API keys.")
+
+    # Summarize one representative per syndicated story
+    raw_articles = deduplicate(raw_articles)
+    if ranker:
+        raw_articles = ranker.rank(topic, raw_articles, num_articles)
+    job.update(
+        message=f"Processing {len(raw_articles)} articles...", total=len(raw_articles), done=0,
+        titles=[article['title'] for article in raw_articles]
+    )
+
+    builder = DigestBuilder(topic)
+
+    def on_result(done, total, i, article):
+        builder.add(article, position=i)
+        job.add_item(i, article)
+        job.update(
+            done=done, digest=builder.render(),
+            message=f"Processed article {done}/{total}: {article['title'][:50]}..."
+        )
+
+    pipeline = ArticlePipeline(summarizer, sentiment_analyzer, sentiment_batch_size=SENTIMENT_BATCH_SIZE)
+    processed_articles = pipeline.run(raw_articles, on_result=on_result, on_token=job.stream)
+
+    # Final digest, in the original article order
+    with instrumentation.span("generate", items=len(builder)):
+        digest = builder.render()
+    digest_id = store.save_digest(topic, builder.articles, run_id=recorder.run_id) if store else None
+    return {
+        "topic": topic,
+        "digest": digest,
+        "digest_id": digest_id,
+        "articles": processed_articles,
+        "report": recorder.report(),
+        "cache_stats": cache.stats() if cache else {},
+    }
+
+
+class DigestService:
+    """Long-running digest builder that keeps its clients warm between jobs.
+
+    One content cache, HTTP client, NewsAPI fetcher, parse pool, digest store
+    and set of model clients (one summarizer per model) serve every job.
+    Jobs run on `max_workers` threads. A request for a topic, article count,
+    timeframe and model that is already queued or running, or finished less
+    than `ttl_seconds` ago, gets that job back. New jobs are refused with
+    BackpressureError while `max_queued` jobs are waiting, or while the
+    LLMScheduler says the job's largest call to one of its models would
+    wait longer than `max_budget_wait` seconds. Schedules submit their digests when due and
+    retry after the backoff when refused. With `change_threshold`, articles
+    that come back in later digests are re-summarized only when materially
+    edited (see ArticleSummarizer.revise). With a `ranker` (RelevanceRanker),
+    jobs over-fetch and summarize only the most relevant articles. Jobs and
+    schedules may only ask for one of `models` (the Groq models in
+    src/model_limits.py by default).
+    """
+    def __init__(self, fetcher, cache=None, client=None, store=None, scheduler=None, llm=None, parser=None,
+                 local_sentiment: bool = False, max_workers: int = 2, ttl_seconds: float = 1800,
+                 max_queued: int = 8, max_budget_wait: float = 120.0, tick_seconds: float = 15.0,
+                 change_threshold: float = None, ranker=None, models=None):
+        self.fetcher = fetcher
+        self.models = set(models or MODEL_CONTEXT_TOKENS)
+        self.ranker = ranker
+        self.cache = cache
+        self.client = client
+        self.store = store
+        self.scheduler = scheduler or get_llm_scheduler()
+        # Stand-in chat model (see benchmarks/fake_services.py); its calls are still scheduled
+        self.llm = llm
+        self.parser = parser
+        self.change_threshold = change_threshold
+        self.max_queued = max_queued
+        self.max_budget_wait = max_budget_wait
+        self.tick_seconds = tick_seconds
+        self.jobs = JobManager(max_workers=max_workers, ttl_seconds=ttl_seconds)
+        self.schedules = []
+        self.local_sentiment = local_sentiment
+        self._summarizers = {}
+        self._sentiment_analyzer = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._schedule_thread = None
+        self._server = None
+
+    def summarizer(self, model_name: str):
+        """The warm ArticleSummarizer for `model_name`, created on first use"""
+        from src.text_extract_summarizer import ArticleSummarizer
+
+        with self._lock:
+            summarizer = self._summarizers.get(model_name)
+            if summarizer is None:
+                summarizer = ArticleSummarizer(model_name=model_name, cache=self.cache, client=self.client,
+                                               llm=self.llm, scheduler=self.scheduler, parser=self.parser,
+                                               change_threshold=self.change_threshold)
+                self._summarizers[model_name] = summarizer
+            return summarizer
+
+    @property
+    def sentiment_analyzer(self):
+        from src.analyze_sentiment import SentimentAnalyzer
+
+        with self._lock:
+            if self._sentiment_analyzer is None:
+                local_classifier = None
+                if self.local_sentiment:
+                    from src.local_sentiment import LexiconSentimentClassifier
+                    local_classifier = LexiconSentimentClassifier()
+                self._sentiment_analyzer = SentimentAnalyzer(
+                    model_name=SENTIMENT_MODEL, cache=self.cache, llm=self.llm, scheduler=self.scheduler,
+                    local_classifier=local_classifier
+                )
+            return self._sentiment_analyzer
+
+    @staticmethod
+    def job_key(topic: str, num_articles: int, days_back: int, model: str) -> tuple:
+        return (" ".join(topic.lower().split()), num_articles, days_back, model)
+
+    def submit(self, topic: str, num_articles: int = 5, days_back: int = 1, model: str = DEFAULT_MODEL,
+               fresh: bool = False) -> tuple:
+        """Start (or join) a digest job; returns (job, coalesced).
+
+        `fresh=True` only joins a job that is still queued or running, for
+        schedules that want a new digest rather than a recent one.
+        """
+        self.validate(topic, num_articles, days_back, model)
+        if self._stopped.is_set():
+            raise BackpressureError("The service is shutting down", retry_after=60.0)
+
+        key = self.job_key(topic, num_articles, days_back, model)
+        existing = self.jobs.find(key)
+        if existing and (existing.active or (existing.status == "done" and not fresh)):
+            return existing, True
+        self.check_capacity(model)
+
+        job = self.jobs.submit(
+            key, run_digest, topic.strip(), num_articles, days_back, self.fetcher, self.summarizer(model),
+            self.sentiment_analyzer, self.cache, self.store, ranker=self.ranker, fresh=fresh
+        )
+        coalesced = existing is not None and job is existing
+        if not coalesced:
+            job.update(request={"topic": topic.strip(), "num_articles": num_articles, "days_back": days_back,
+                                "model": model})
+        return job, coalesced
+
+    def validate(self, topic, num_articles, days_back, model):
+        """Raise ValueError unless the options describe a digest this service can build"""
+        if not isinstance(topic, str) or not topic.strip():
+            raise ValueError("topic must be a non-empty string")
+        # bool is an int subclass, but true/false are not article counts
+        if not isinstance(num_articles, int) or isinstance(num_articles, bool) or not 1 <= num_articles <= 100:
+            raise ValueError("num_articles must be an integer from 1 to 100")
+        if not isinstance(days_back, int) or isinstance(days_back, bool) or not 1 <= days_back <= 30:
+            raise ValueError("days_back must be an integer from 1 to 30")
+        if model not in self.models:
+            raise ValueError(f"model must be one of {', '.join(sorted(self.models))}")
+
+    def check_capacity(self, model: str):
+        """Raise BackpressureError if a new job for `model` should wait"""
+        queued = self.jobs.counts().get("queued", 0)
+        if queued >= self.max_queued:
+            raise BackpressureError(f"{queued} jobs are already waiting", retry_after=self.tick_seconds)
+        for model_name, tokens in self.call_tokens(model).items():
+            wait = self.scheduler.delay(model_name, tokens)
+            if wait > self.max_budget_wait:
+                raise BackpressureError(f"The {model_name} budget is spent for the next {wait:.0f}s",
+                                        retry_after=wait)
+
+    def call_tokens(self, model: str) -> dict:
+        """Tokens of the largest call a job makes to each of its models: a full summary chunk, a sentiment batch"""
+        return {
+            model: self.summarizer(model).chunk_tokens + SUMMARY_TOKENS_ESTIMATE,
+            SENTIMENT_MODEL: SENTIMENT_BATCH_SIZE * SUMMARY_TOKENS_ESTIMATE,
+        }
+
+    def add_schedule(self, schedule: Schedule, now: datetime = None) -> Schedule:
+        self.validate(schedule.topic, schedule.num_articles, schedule.days_back, schedule.model)
+        schedule.next_run = schedule.when.next_run(now or datetime.now())
+        with self._lock:
+            self.schedules.append(schedule)
+        logging.info(f"Scheduled '{schedule.topic}' ({schedule.when.spec}), next run {schedule.next_run}")
+        return schedule
+
+    def run_due(self, now: datetime = None) -> list:
+        """Submit every schedule due at `now`; returns the jobs started or joined"""
+        now = now or datetime.now()
+        with self._lock:
+            due = [schedule for schedule in self.schedules if schedule.next_run <= now]
+        started = []
+        for schedule in due:
+            try:
+                job, _ = self.submit(schedule.topic, schedule.num_articles, schedule.days_back, schedule.model,
+                                     fresh=True)
+            except BackpressureError as e:
+                schedule.next_run = now + timedelta(seconds=max(1.0, e.retry_after))
+                logging.warning(f"Schedule '{schedule.topic}' deferred to {schedule.next_run}: {str(e)}")
+                continue
+            except Exception as e:
+                # One broken schedule must not hold up the others; it is retried at its next time
+                schedule.next_run = schedule.when.next_run(now)
+                logging.error(f"Schedule '{schedule.topic}' failed, next run {schedule.next_run}: {str(e)}")
+                continue
+            schedule.last_job_id = job.id
+            schedule.next_run = schedule.when.next_run(now)
+            started.append(job)
+        return started
+
+    def _schedule_loop(self):
+        while not self._stopped.wait(self.tick_seconds):
+            try:
+                self.run_due()
+            except Exception:
+                logging.exception("Schedule check failed")
+
+    def status(self) -> dict:
+        # Models of the jobs run so far (the sentiment model always)
+        calls = {SENTIMENT_MODEL: SENTIMENT_BATCH_SIZE * SUMMARY_TOKENS_ESTIMATE}
+        for model in list(self._summarizers):
+            calls.update(self.call_tokens(model))
+        return {
+            "status": "stopping" if self._stopped.is_set() else "ok",
+            "jobs": self.jobs.counts(),
+            "max_queued": self.max_queued,
+            # Seconds a call to each model would currently wait for its rate-limit budget
+            "budget_wait_seconds": {
+                model: round(self.scheduler.delay(model, tokens), 1) for model, tokens in sorted(calls.items())
+            },
+            "schedules": len(self.schedules),
+        }
+
+    def start(self, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+        """Start the schedule thread and serve the HTTP API from a background thread"""
+        self._schedule_thread = threading.Thread(target=self._schedule_loop, name="schedules", daemon=True)
+        self._schedule_thread.start()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.service = self
+        threading.Thread(target=self._server.serve_forever, name="http", daemon=True).start()
+        logging.info(f"Digest service listening on http://{host}:{self._server.server_address[1]}")
+        return self._server
+
+    def close(self):
+        """Stop serving and scheduling, let running jobs finish, drop queued ones and release the warm clients"""
+        self._stopped.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+        self.jobs.shutdown(wait=True)
+        for resource in (self.parser, self.store, self.client, self.cache):
+            if resource is not None:
+                resource.close()
+
+
+def job_info(job, full: bool = False) -> dict:
+    """JSON view of a job; `full` adds the finished digest, articles and run report"""
+    snapshot = job.snapshot()
+    state = snapshot["state"]
+    info = {
+        "id": job.id,
+        "status": snapshot["status"],
+        "error": snapshot["error"],
+        "request": state.get("request"),
+        "message": state.get("message"),
+        "done": state.get("done", 0),
+        "total": state.get("total"),
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
+    if full and job.status == "done":
+        info["result"] = {key: value for key, value in job.result.items() if key != "cache_stats"}
+    return info
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """JSON API of DigestService:
+
+    POST /jobs {"topic", "num_articles", "days_back", "model"}  202 new job, 200 joined job, 429 backpressure
+    GET  /jobs, /jobs/<id>, /jobs/<id>/digest?format=md, /schedules, /health
+    POST /schedules {"topic", "when", "num_articles", "days_back", "model"}
+    """
+    def do_GET(self):
+        service = self.server.service
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        if parts == ["health"]:
+            return self._send(200, service.status())
+        if parts == ["jobs"]:
+            return self._send(200, [job_info(job) for job in service.jobs.jobs()])
+        if parts == ["schedules"]:
+            return self._send(200, [schedule.to_dict() for schedule in service.schedules])
+        if len(parts) in (2, 3) and parts[0] == "jobs":
+            job = service.jobs.get(parts[1])
+            if job is None:
+                return self._send(404, {"error": f"No job {parts[1]}"})
+            if len(parts) == 2:
+                return self._send(200, job_info(job, full=True))
+            if parts[2] == "digest":
+                return self._send_digest(service, job, parse_qs(url.query).get("format", ["txt"])[0])
+        self._send(404, {"error": f"No route for GET {url.path}"})
+
+    def do_POST(self):
+        service = self.server.service
+        path = urlsplit(self.path).path.rstrip("/")
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("the request body must be a JSON object")
+            options = {key: body[key] for key in ("num_articles", "days_back", "model") if key in body}
+            if path == "/jobs":
+                job, coalesced = service.submit(body.get("topic"), **options)
+                return self._send(200 if coalesced else 202, dict(job_info(job), coalesced=coalesced))
+            if path == "/schedules":
+                schedule = Schedule(body.get("topic") or "", CronSchedule(str(body.get("when") or "")), **options)
+                return self._send(201, service.add_schedule(schedule).to_dict())
+        except BackpressureError as e:
+            return self._send(429, {"error": str(e), "retry_after": round(e.retry_after, 1)},
+                              headers={"Retry-After": str(max(1, round(e.retry_after)))})
+        except (ValueError, TypeError) as e:
+            return self._send(400, {"error": str(e)})
+        self._send(404, {"error": f"No route for POST {path}"})
+
+    def _send_digest(self, service, job, fmt: str):
+        if fmt not in FORMATS:
+            return self._send(400, {"error": f"format must be one of {', '.join(FORMATS)}"})
+        if job.status != "done":
+            return self._send(409, {"error": f"Job {job.id} is {job.status}"})
+        if fmt == "txt" or service.store is None:
+            content = job.result["digest"]
+            fmt = "txt"
+        else:
+            content = DailyDigestGenerator.from_store(service.store, digest_id=job.result["digest_id"], fmt=fmt)
+        self._send(200, content, content_type=CONTENT_TYPES[fmt])
+
+    def _send(self, status: int, body, headers: dict = None, content_type: str = "application/json"):
+        data = (json.dumps(body) if content_type == "application/json" and not isinstance(body, str)
+                else body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} {format % args}")
+
+
+def main(argv=None, llm=None):
+    """Run the digest service until interrupted; `llm` replaces the Groq chat models (for local testing)"""
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s -%(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Serve digest jobs over HTTP and build scheduled digests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--schedule", action="append", default=[],
+                        help="'TOPIC=WHEN', e.g. 'AI Startups=0 7 * * *' or 'Chip Industry=@every 6h' (repeatable)")
+    parser.add_argument("--num-articles", type=int, default=5, help="Articles per scheduled digest")
+    parser.add_argument("--days-back", type=int, default=1, help="Timeframe of scheduled digests")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Groq model of scheduled digests")
+    parser.add_argument("--workers", type=int, default=2, help="Digests built at once")
+    parser.add_argument("--max-queued", type=int, default=8, help="Waiting jobs before new ones are refused")
+    parser.add_argument("--max-budget-wait", type=float, default=120.0,
+                        help="Refuse new jobs while a model's rate-limit budget is spent for longer than this")
+    parser.add_argument("--result-ttl", type=float, default=1800, help="Seconds a finished digest is reused")
+    parser.add_argument("--store", help="Digest history database (default: NEWS_DIGEST_STORE or .cache/digests.sqlite)")
+    parser.add_argument("--parse-workers", type=int, default=default_parse_workers(),
+                        help="Processes that parse article HTML (0 = parse in the fetch threads)")
+    parser.add_argument("--change-threshold", type=float,
+                        help="Keep the summaries of re-fetched articles unless this share of their text changed")
+    parser.add_argument("--overfetch", type=int, default=3,
+                        help="Fetch this many candidates per article and keep the most relevant (1 = NewsAPI's order)")
+    parser.add_argument("--local-sentiment", action="store_true",
+                        help="Label clear-cut summaries locally and send only uncertain ones to the LLM")
+    args = parser.parse_args(argv)
+    try:
+        schedules = [
+            Schedule.parse(value, num_articles=args.num_articles, days_back=args.days_back, model=args.model)
+            for value in args.schedule
+        ]
+    except ValueError as e:
+        parser.error(str(e))
+
+    cache = ContentCache()
+    client = HttpClient(host_rates={"newsapi.org": 1.0}, cache=cache)
+    service = DigestService(
+        NewsFetcher(client=client), cache=cache, client=client, store=DigestStore(args.store), llm=llm,
+        parser=ParsePool(args.parse_workers) if args.parse_workers > 0 else None,
+        local_sentiment=args.local_sentiment, max_workers=args.workers, ttl_seconds=args.result_ttl,
+        max_queued=args.max_queued, max_budget_wait=args.max_budget_wait,
+        change_threshold=args.change_threshold,
+        ranker=RelevanceRanker(args.overfetch) if args.overfetch > 1 else None,
+        models=set(MODEL_CONTEXT_TOKENS) | {args.model}
+    )
+    try:
+        for schedule in schedules:
+            service.add_schedule(schedule)
+    except ValueError as e:
+        service.close()
+        parser.error(str(e))
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    service.start(args.host, args.port)
+    try:
+        stop.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logging.info("Stopping the digest service")
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    main()
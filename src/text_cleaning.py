@@ -0,0 +1,65 @@
+import re
+
+# Common boilerplate removed from article text. Patterns are matched against a
+# lowercased copy of the text, so they are written in lowercase and must not use
+# uppercase escapes such as \S or \W.
+BOILERPLATE_PATTERNS = [
+    r"sign up for.*newsletters",
+    r"subscribe to.*channel",
+    r"follow us on.*",
+    r"download our.*app",
+    r"read more:.*",
+    r"continue reading.*",
+    r"advertisement",
+    r"recommended for you",
+    r"related:.*",
+    r"please enter your email",
+    r"already have an account\? log in",
+    r"create a free account",
+    r"© copyright.*"
+]
+
+# NewsAPI truncation markers such as "[+1234 chars]"
+TRUNCATION_PATTERN = r"\[\+[0-9,]+\s*chars?\]"
+HTML_TAG_PATTERN = r"<[^>]+>"
+# Trailing " - Source Name" suffix that NewsAPI titles often carry
+TITLE_SUFFIX_PATTERN = r"\s+[-|–]\s+[^-|–]+$"
+
+TRUNCATION_RE = re.compile(TRUNCATION_PATTERN)
+TITLE_SUFFIX_RE = re.compile(TITLE_SUFFIX_PATTERN)
+
+_CLEANUP_ALTERNATION = "|".join(
+    f"(?:{pattern})" for pattern in BOILERPLATE_PATTERNS + [TRUNCATION_PATTERN, HTML_TAG_PATTERN]
+)
+
+# Boilerplate, truncation markers and leftover HTML tags in one alternation.
+# Case-sensitive matching over lowercased text is several times faster than
+# re.IGNORECASE, which has to fold case at every position for every branch.
+CLEANUP_RE = re.compile(_CLEANUP_ALTERNATION)
+CLEANUP_RE_IGNORECASE = re.compile(_CLEANUP_ALTERNATION, re.IGNORECASE)
+
+# Runs of 3+ newlines collapse to a paragraph break; truncation markers are dropped
+BLOCKS_RE = re.compile(r"\n{3,}|" + TRUNCATION_PATTERN)
+
+
+def clean_text(text: str) -> str:
+    """Strip boilerplate, truncation markers and HTML tags in a single regex pass"""
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # A few characters change length when lowercased, so offsets would drift
+        return CLEANUP_RE_IGNORECASE.sub("", text).strip()
+
+    parts = []
+    position = 0
+    for match in CLEANUP_RE.finditer(lowered):
+        parts.append(text[position:match.start()])
+        position = match.end()
+    parts.append(text[position:])
+    return "".join(parts).strip()
+
+
+def join_blocks(parts: list[str]) -> str:
+    """Join extracted text blocks once and normalize paragraph breaks"""
+    text = "".join(parts)
+    text = BLOCKS_RE.sub(lambda m: "\n\n" if m.group(0)[0] == "\n" else "", text)
+    return text.strip()
@@ -1,217 +1,698 @@
 # 2
 import os 
-import requests 
-from langchain_groq import ChatGroq 
-from langchain.prompts import PromptTemplate 
-from langchain.schema import StrOutputParser 
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_core.runnables import RunnablePassthrough
-from dotenv import load_dotenv
-from bs4 import BeautifulSoup
+import json
+import math
+import asyncio
+import functools
+from src.cache import content_hash
+from src.change_detection import ChangeTracker
+from src.http_client import get_http_client
+from src import text_cleaning
+from src.model_limits import SUMMARY_TOKENS_ESTIMATE, estimate_tokens, input_token_budget
+from src.instrumentation import span
 #from newspaper import Article, ArticleException
 import re 
-import nltk 
 import logging 
-#from nltk.corpus import stopwords 
-#from nltk.tokenize import sent_tokenize 
 
-# Configure logging 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s -%(levelname)s - %(message)s')
+# LangChain, the Groq client and BeautifulSoup are imported on first use, so
+# runs served from the cache (and --dry-run) never load the LLM stack; lxml is
+# loaded by the first page parsed
 
-# download required NLTK data 
-#nltk.download('punkt')
-#nltk.download('stopwords')
+# Bump when summary_prompt changes so cached summaries are not reused
+SUMMARY_PROMPT_VERSION = "1"
+
+SUMMARY_TEMPLATE = """
+            Create a professional 2-paragraph news summary from the following article content.
+            Follow these guidelines:
+            1. Omit any introductory phrases like "Here is a summary"
+            2. First paragraph: Core innovation/event and key facts 
+            3. Second paragraph: Key entities and business implications 
+            4. Include specific numbers and metrics when available 
+            5. Maintain jouranlistic tone
+
+            Example structure:
+            [Company] has [achievement] using [technology]. The development [specific impact]... 
+            Key players include [names] from [organizations]. This could [business implication]...
+
+            Article Content:
+            {content}
+
+            Professional Summary: 
+
+            """ 
+
+UPDATE_TEMPLATE = """
+            Below is a professional 2-paragraph news summary of an article, followed by paragraphs
+            that were added to or rewritten in the article since the summary was written.
+            Update the summary to reflect the revised article:
+            1. Keep the structure, tone and any facts that still hold
+            2. Replace facts and figures that the new paragraphs correct
+            3. Add significant new developments; ignore minor wording changes
+            4. Omit any introductory phrases like "Here is the updated summary"
+
+            Current Summary:
+            {summary}
+
+            New or Revised Paragraphs:
+            {changes}
+
+            Updated Summary: 
+
+            """
+
+SUMMARY_FAILED = "Summary generation failed"
+
+UNWANTED_TAGS = ('script', 'style', 'nav', 'footer', 'aside', 'form', 'header',
+                 'iframe', 'button', 'svg', 'figure', 'noscript', 'img', 'link')
+
+# Main-content containers, in priority order: (tag, attribute, value)
+CONTENT_SELECTORS = [
+    ('article', None, None),
+    ('div', 'class', 'article-body'),
+    ('div', 'class', 'post-content'),
+    ('div', 'class', 'story-content'),
+    ('div', 'class', 'entry-content'),
+    ('div', 'class', 'content-wrapper'),
+    ('div', 'class', 'main-content'),
+    ('section', 'class', 'main'),
+    ('div', 'class', 'article-content'),
+    ('div', 'id', 'article-body'),
+    ('div', 'class', 'article-text'),
+    ('div', 'class', 'post-body')
+]
+
+
+def _selector_xpath(tag, attribute, value) -> str:
+    if attribute is None:
+        return f"//{tag}"
+    if attribute == 'id':
+        return f"//{tag}[@id='{value}']"
+    return f"//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {value} ')]"
+
+
+@functools.lru_cache(maxsize=None)
+def content_xpath():
+    """One union query that finds every candidate container in a single tree scan"""
+    from lxml import etree
+
+    return etree.XPath(" | ".join(_selector_xpath(*selector) for selector in CONTENT_SELECTORS))
 
-# load environment variables 
-load_dotenv()
 
 class FullTextExtractor:
     """Robust text extraction without newspaper library"""
+    # Pages are streamed and truncated after this many bytes
+    MAX_BYTES = 2_000_000
+
     @staticmethod
-    def extract_text(url: str) -> str:
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Connection': 'keep-alive',
-                'Referer': 'https://www.google.com/'
-            }
-
-            # Try to bypass paywalls for specific sites
-            if "businessinsider.com" in url:
-                headers['Referer'] = 'https://www.facebook.com/'
-                headers['Cookie'] = 'bounceClientVisit=1; bounceClientFirstVisit=1'
-            
-            response = requests.get(url, headers=headers, timeout=15)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'lxml')
-
-            # Remove unwanted elements
-            for element in soup(['script', 'style', 'nav', 'footer', 'aside', 'form', 'header', 
-                                 'iframe', 'button', 'svg', 'figure', 'noscript', 'img', 'link']):
-                element.decompose()
-
-            # Find main content using common selectors
-            selectors = [
-                'article', 
-                'div.article-body',
-                'div.post-content',
-                'div.story-content',
-                'div.entry-content',
-                'div.content-wrapper',
-                'div.main-content',
-                'section.main',
-                'div.article-content',
-                'div#article-body',
-                'div.article-text',
-                'div.post-body'
-            ]
-            
-            article_body = None
-            for selector in selectors:
-                article_body = soup.select_one(selector)
-                if article_body:
-                    break
+    def extract_text(url: str, client=None, max_bytes: int = MAX_BYTES, parser=None, previous: str = None) -> str:
+        """Download `url` and extract its article text ("" on failure).
 
-            # Fallback to body if no specific content found
-            if not article_body:
-                article_body = soup.body
-
-            # Extract text with paragraph structure
-            text = ""
-            for element in article_body.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'blockquote']):
-                if element.name == 'p':
-                    text += element.get_text().strip() + "\n\n"
-                elif element.name == 'blockquote':
-                    text += f"> {element.get_text().strip()}\n\n"
-                else:  # Headings
-                    text += f"\n\n{element.get_text().strip().upper()}\n\n"
-
-            # Clean and compress text
-            text = re.sub(r'\n{3,}', '\n\n', text)  # Remove excessive newlines
-            text = re.sub(r'\[\+[0-9,]+\s*chars?\]', '', text)  # Remove truncation markers
-            return text.strip()
+        `parser` (e.g. a ParsePool) parses the page in place of parse_html.
+        With `previous`, the text last extracted from `url`, the page is
+        revalidated and `previous` is returned if it did not change.
+        """
+        try:
+            with span("extract_text") as extract_span:
+                page = (client or get_http_client()).get_page(
+                    url,
+                    headers=FullTextExtractor.request_headers(url),
+                    conditional=previous is not None,
+                    max_bytes=max_bytes,
+                    html_only=True
+                )
+                extract_span.add("bytes", page.size_bytes)
+                if page.not_modified:
+                    return previous
+                return (parser or FullTextExtractor).parse_html(page.content, page.encoding)
                 
         except Exception as e:
             logging.error(f"Extraction failed for {url}: {str(e)}")
             return ""
 
+    @staticmethod
+    def request_headers(url: str) -> dict:
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5',
+            'Connection': 'keep-alive',
+            'Referer': 'https://www.google.com/'
+        }
+
+        # Try to bypass paywalls for specific sites
+        if "businessinsider.com" in url:
+            headers['Referer'] = 'https://www.facebook.com/'
+            headers['Cookie'] = 'bounceClientVisit=1; bounceClientFirstVisit=1'
+        return headers
+
+    @staticmethod
+    def parse_html(html, encoding: str = 'utf-8') -> str:
+        """Extract article text (from str, or bytes in `encoding`) with lxml, scanning the tree once per step"""
+        import lxml.html
+        from lxml import etree
+
+        if isinstance(html, str):
+            html, encoding = html.encode('utf-8', errors='replace'), 'utf-8'
+        # lxml decodes the raw bytes itself, replacing invalid sequences
+        parser = lxml.html.HTMLParser(encoding=encoding, remove_comments=True)
+        root = lxml.html.document_fromstring(html, parser=parser)
+
+        # Remove unwanted elements (tail text is kept, as with decompose)
+        etree.strip_elements(root, *UNWANTED_TAGS, with_tail=False)
+
+        article_body = FullTextExtractor.main_content(root)
+
+        # Extract text with paragraph structure
+        parts = []
+        for element in article_body.iter('p', 'h1', 'h2', 'h3', 'h4', 'blockquote'):
+            content = element.text_content().strip()
+            if element.tag == 'p':
+                parts.append(content + "\n\n")
+            elif element.tag == 'blockquote':
+                parts.append(f"> {content}\n\n")
+            else:  # Headings
+                parts.append(f"\n\n{content.upper()}\n\n")
+
+        # Join once, compressing newlines and removing truncation markers
+        return text_cleaning.join_blocks(parts)
+
+    @staticmethod
+    def main_content(root):
+        """Pick the highest-priority content container, falling back to <body>"""
+        best, best_rank = None, len(CONTENT_SELECTORS)
+        for element in content_xpath()(root):
+            classes = (element.get('class') or '').split()
+            for rank, (tag, attribute, value) in enumerate(CONTENT_SELECTORS[:best_rank]):
+                if element.tag == tag and (
+                    attribute is None
+                    or (attribute == 'id' and element.get('id') == value)
+                    or (attribute == 'class' and value in classes)
+                ):
+                    best, best_rank = element, rank
+                    break
+            if best_rank == 0:
+                break
+        if best is not None:
+            return best
+        body = root.find('.//body')
+        return body if body is not None else root
+
+    @staticmethod
+    def parse_html_soup(html: str) -> str:
+        """Original BeautifulSoup extraction, kept as a reference for benchmarks"""
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, 'lxml')
+
+        # Remove unwanted elements
+        for element in soup(list(UNWANTED_TAGS)):
+            element.decompose()
+
+        # Find main content using common selectors
+        selectors = [
+            'article', 
+            'div.article-body',
+            'div.post-content',
+            'div.story-content',
+            'div.entry-content',
+            'div.content-wrapper',
+            'div.main-content',
+            'section.main',
+            'div.article-content',
+            'div#article-body',
+            'div.article-text',
+            'div.post-body'
+        ]
+        
+        article_body = None
+        for selector in selectors:
+            article_body = soup.select_one(selector)
+            if article_body:
+                break
+
+        # Fallback to body if no specific content found
+        if not article_body:
+            article_body = soup.body
+
+        # Extract text with paragraph structure
+        text = ""
+        for element in article_body.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'blockquote']):
+            if element.name == 'p':
+                text += element.get_text().strip() + "\n\n"
+            elif element.name == 'blockquote':
+                text += f"> {element.get_text().strip()}\n\n"
+            else:  # Headings
+                text += f"\n\n{element.get_text().strip().upper()}\n\n"
+
+        # Clean and compress text
+        text = re.sub(r'\n{3,}', '\n\n', text)  # Remove excessive newlines
+        text = text_cleaning.TRUNCATION_RE.sub('', text)  # Remove truncation markers
+        return text.strip()
+
 class ArticleSummarizer:
-    def __init__(self, model_name="llama3-70b-8192"):
+    # Upper bound on reduce levels, as a guard against summaries that never shrink
+    MAX_REDUCE_DEPTH = 4
+
+    def __init__(self, model_name="llama3-70b-8192", max_concurrency: int = 4, cache=None, client=None,
+                 max_chunk_tokens: int = None, llm=None, compressor=None, scheduler=None,
+                 overflow_model: str = None, parser=None, change_threshold: float = None):
+        self.model_name = model_name
+        # Calls go through an LLMScheduler (the shared one unless `llm` is supplied);
+        # `overflow_model` takes summaries while `model_name` is rate limited
+        self.scheduler = scheduler
+        self.overflow_model = overflow_model
+        self.client = client
+        # Optional ParsePool that parses pages in worker processes
+        self.parser = parser
+        # Optional extractive pre-pass (ExtractiveCompressor) that trims text before the LLM sees it
+        self.compressor = compressor
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        # With a threshold, articles seen before are diffed against the text their
+        # summary was written from and re-summarized only when materially changed
+        self.changes = ChangeTracker(cache, change_threshold) if cache and change_threshold is not None else None
         self.groq_api_key = os.getenv("GROQ_API_KEY")
-        if not self.groq_api_key:
+        # Caller-supplied chat model (e.g. the offline benchmark stand-in)
+        self._llm = llm
+        if llm is None and not self.groq_api_key:
             raise ValueError("GROQ_API_KEY not found in .env file")
-        
-        self.model = ChatGroq(
-            temperature=0.3,
-            model_name=model_name,
-            api_key=self.groq_api_key
-        )
 
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=8000,
-            chunk_overlap=300,
-            length_function=len 
+        # Size chunks from the model's context window and per-minute token budget
+        # rather than a fixed character count
+        self.chunk_tokens = input_token_budget(
+            model_name, prompt_tokens=estimate_tokens(SUMMARY_TEMPLATE),
+            tokens_per_minute=self._tokens_per_minute()
         )
+        if max_chunk_tokens:
+            self.chunk_tokens = min(self.chunk_tokens, max_chunk_tokens)
 
-        self.summary_prompt = PromptTemplate.from_template(
-            """
-            Create a professional 2-paragraph news summary from the following article content.
-            Follow these guidelines:
-            1. Omit any introductory phrases like "Here is a summary"
-            2. First paragraph: Core innovation/event and key facts 
-            3. Second paragraph: Key entities and business implications 
-            4. Include specific numbers and metrics when available 
-            5. Maintain jouranlistic tone
+    def _tokens_per_minute(self):
+        """Token budget the scheduler enforces for model_name, or None when calls bypass it"""
+        if self._llm is not None and self.scheduler is None:
+            return None
+        from src.llm_scheduler import get_llm_scheduler
 
-            Example structure:
-            [Company] has [achievement] using [technology]. The development [specific impact]... 
-            Key players include [names] from [organizations]. This could [business implication]...
+        return (self.scheduler or get_llm_scheduler()).budget(self.model_name).tokens_per_minute
 
-            Article Content:
-            {content}
+    @functools.cached_property
+    def model(self):
+        if self._llm is not None and self.scheduler is None:
+            return self._llm
+        from src.llm_scheduler import get_llm_scheduler
+        from src.scheduled_model import ScheduledChatModel, groq_chat_model
 
-            Professional Summary: 
+        scheduler = self.scheduler or get_llm_scheduler()
+        models = {
+            name: self._llm or groq_chat_model(name, self.groq_api_key, temperature=0.3, scheduler=scheduler)
+            for name in filter(None, (self.model_name, self.overflow_model))
+        }
+        return ScheduledChatModel(models, self.model_name, scheduler, overflow=self.overflow_model,
+                                  completion_tokens=SUMMARY_TOKENS_ESTIMATE)
 
-            """ 
-        )
+    @functools.cached_property
+    def summary_prompt(self):
+        from langchain_core.prompts import PromptTemplate
+
+        return PromptTemplate.from_template(SUMMARY_TEMPLATE)
 
-        self.summary_chain = (
+    @functools.cached_property
+    def summary_chain(self):
+        from langchain_core.output_parsers import StrOutputParser
+        from langchain_core.runnables import RunnablePassthrough
+
+        return (
             {"content": RunnablePassthrough()}
             | self.summary_prompt
             | self.model
             |StrOutputParser()
         )
 
+    @functools.cached_property
+    def update_chain(self):
+        from langchain_core.prompts import PromptTemplate
+        from langchain_core.output_parsers import StrOutputParser
+
+        return PromptTemplate.from_template(UPDATE_TEMPLATE) | self.model | StrOutputParser()
+
+    @functools.cached_property
+    def text_splitter(self):
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+        return RecursiveCharacterTextSplitter(
+            chunk_size=self.chunk_tokens,
+            chunk_overlap=80,
+            length_function=estimate_tokens
+        )
+
     def summarize(self, article: dict) -> str:
         """Robust summarization with multiple fallbacks"""
+        clean_text = self.get_content(article)
+        if clean_text is None:
+            return "Summary unavailable: Could not retrieve content"
+        return self.summarize_text(clean_text, url=article['url'])
+
+    def get_content(self, article: dict):
+        """Extract and clean article text, or None if nothing usable was found"""
         # Get full article content 
-        full_text = FullTextExtractor.extract_text(article['url'])
+        full_text = self.extract_text(article)
 
         # Use snippet if full text extraction failed 
         if not full_text.strip() or len(full_text) < 300:
             logging.warning(f"Using snippet for {article['url']}")
-            full_text = self.clean_snippet(article['content'])
-            if len(full_text) < 100:
-                return "Summary unavailable: Could not retrieve content"
-            
-        # Clean and prepare text 
-        clean_text = self.preprocess_text(full_text)
+            clean_text = self.clean_snippet(article['content'])
+            if len(clean_text) < 100:
+                return None
+        else:
+            # Clean and prepare text 
+            clean_text = self.preprocess_text(full_text)
         logging.info(f"Processing text: {len(clean_text)} characters")
-        
-        # Handle long articles with chunking 
-        if len(clean_text) > 8000:
-            chunks = self.text_splitter.split_text(clean_text)
-            chunk_summaries = []
-
-            for i, chunk in enumerate(chunks, 1):
-                logging.info(f"Summarizing chunk {i}/{len(chunks)}")
-                chunk_summaries.append(self.summarize_chunk(chunk))
-                
-            combined_content = "\n\n".join(chunk_summaries)
-            return self.summarize_chunk(combined_content)
-        
-        return self.summarize_chunk(clean_text)
-     
+        return clean_text
+
+    def extract_text(self, article: dict) -> str:
+        """Extract the article page text, cached by URL and NewsAPI content hash.
+
+        With change tracking the page is always revalidated, since edits rarely
+        change the NewsAPI snippet.
+        """
+        key = content_hash(article['url'], article.get('content') or "")
+        if self.cache and not self.changes:
+            cached = self.cache.get("extract", key)
+            if cached is not None:
+                return cached
+
+        # A page that answers 304 gets the text last extracted from its URL, found through "extract_key"
+        previous_key = self.cache.get("extract_key", article['url']) if self.cache else None
+        previous = self.cache.get("extract", previous_key) if previous_key else None
+        full_text = FullTextExtractor.extract_text(article['url'], client=self.client, parser=self.parser,
+                                                   previous=previous)
+        if self.cache and full_text:
+            self.cache.set("extract", key, full_text)
+            self.cache.set("extract_key", article['url'], key)
+        return full_text
+
+    def summarize_text(self, clean_text: str, url: str = None) -> str:
+        """Summarize already extracted text, chunking articles that exceed the token budget.
+
+        With change tracking, pass the article's `url` so an article seen
+        before keeps or updates its previous summary (see `revise`).
+        """
+        revised = self.revise(url, clean_text)
+        if revised is not None:
+            return revised
+        summary = self.summarize_chunk(self._condense(clean_text))
+        self._record_version(url, clean_text, summary)
+        return summary
+
+    def stream_text(self, clean_text: str, url: str = None):
+        """Like summarize_text, but yield the final summary in pieces as the model writes it"""
+        revised = self.revise(url, clean_text)
+        if revised is not None:
+            yield revised
+            return
+        parts = []
+        for part in self.stream_chunk(self._condense(clean_text)):
+            parts.append(part)
+            yield part
+        self._record_version(url, clean_text, "".join(parts))
+
+    def revise(self, url: str, clean_text: str):
+        """Summary of an article summarized before, or None when it has to be summarized afresh.
+
+        The text is diffed paragraph by paragraph against the version the
+        previous summary was written from. Below the change threshold that
+        summary is reused as is (its sentiment then comes from the cache);
+        above it, the model updates the summary from the changed paragraphs
+        alone. Reused summaries leave the stored version alone, so small
+        edits add up until they cross the threshold.
+        """
+        if not self.changes or not url:
+            return None
+        version = self.changes.get(url, self.model_name, SUMMARY_PROMPT_VERSION)
+        if version is None:
+            return None
+        with span("change_detection") as change_span:
+            change = version.diff(clean_text)
+            material = self.changes.is_material(change)
+            change_span.add("updated" if material else "reused", 1)
+        if not material:
+            logging.info(f"Reusing summary of {url} ({change.share:.0%} changed)")
+            return version.summary
+
+        update = self._update_input(version, change)
+        if update is None:
+            return None
+        logging.info(f"Updating summary of {url} ({change.share:.0%} changed)")
+        try:
+            with span("summarize_chunk", chunks=1):
+                summary = self.update_chain.invoke(update)
+        except Exception as e:
+            logging.error(f"Summary update error: {str(e)}")
+            return None
+        self._record_version(url, clean_text, summary)
+        return summary
+
+    def _update_input(self, version, change):
+        """Variables of the update prompt, or None if the change is better summarized afresh"""
+        # Removed paragraphs are not stored, so a change that only drops text cannot be described
+        if not change.changed:
+            return None
+        changes = "\n\n".join(change.changed)
+        if estimate_tokens(version.summary) + estimate_tokens(changes) > self.chunk_tokens:
+            return None
+        return {"summary": version.summary, "changes": changes}
+
+    def _record_version(self, url: str, clean_text: str, summary: str):
+        if self.changes and url and summary and summary != SUMMARY_FAILED:
+            self.changes.record(url, self.model_name, SUMMARY_PROMPT_VERSION, clean_text, summary)
+
+    def _condense(self, clean_text: str) -> str:
+        """Input for the final summary call: the (compressed) text, map-reduced if it overflows the budget"""
+        clean_text = self.compress(clean_text)
+        if estimate_tokens(clean_text) <= self.chunk_tokens:
+            return clean_text
+
+        # Handle long articles with map-reduce over chunks 
+        chunks = self.split_text(clean_text)
+        summaries = self.summarize_chunks(chunks)
+
+        # Add reduce levels only while the combined summaries overflow the budget
+        for depth in range(self.MAX_REDUCE_DEPTH):
+            groups = self._pack(summaries)
+            if len(groups) == 1 or depth == self.MAX_REDUCE_DEPTH - 1:
+                break
+            logging.info(f"Reducing {len(summaries)} summaries in {len(groups)} groups")
+            summaries = self.summarize_chunks(groups)
+        return "\n\n".join(summaries)
+
     def summarize_chunk(self, text: str) -> str:
         """Handle single chunk summarization with error recovery"""
+        cached = self._cached_summary(text)
+        if cached is not None:
+            return cached
+        try:
+            with span("summarize_chunk", chunks=1):
+                summary = self.summary_chain.invoke(text)
+        except Exception as e:
+            logging.error(f"Summarization error: {str(e)}")
+            return SUMMARY_FAILED 
+        self._store_summary(text, summary)
+        return summary
+
+    def stream_chunk(self, text: str):
+        """Streaming variant of summarize_chunk; a cached summary is yielded whole"""
+        cached = self._cached_summary(text)
+        if cached is not None:
+            yield cached
+            return
+        parts = []
+        try:
+            with span("summarize_chunk", chunks=1):
+                for part in self.summary_chain.stream(text):
+                    parts.append(part)
+                    yield part
+        except Exception as e:
+            logging.error(f"Summarization error: {str(e)}")
+            if not parts:
+                yield SUMMARY_FAILED
+            return
+        self._store_summary(text, "".join(parts))
+
+    def summarize_chunks(self, chunks: list[str]) -> list[str]:
+        """Map step: summarize chunks concurrently, keeping their order"""
+        summaries = [self._cached_summary(chunk) for chunk in chunks]
+        missing = [i for i, summary in enumerate(summaries) if summary is None]
+        if missing:
+            with span("summarize_chunk", chunks=len(missing)):
+                results = self.summary_chain.batch(
+                    [chunks[i] for i in missing],
+                    config={"max_concurrency": self.max_concurrency},
+                    return_exceptions=True
+                )
+            for i, result in zip(missing, results):
+                summaries[i] = self._chunk_result(chunks[i], result)
+        return summaries
+
+    async def asummarize(self, article: dict) -> str:
+        """Async variant of summarize; extraction runs in a worker thread"""
+        clean_text = await asyncio.to_thread(self.get_content, article)
+        if clean_text is None:
+            return "Summary unavailable: Could not retrieve content"
+        return await self.asummarize_text(clean_text, url=article['url'])
+
+    async def asummarize_text(self, clean_text: str, url: str = None) -> str:
+        """Async variant of summarize_text"""
+        revised = await asyncio.to_thread(self.revise, url, clean_text)
+        if revised is not None:
+            return revised
+        summary = await self._asummarize_condensed(clean_text)
+        self._record_version(url, clean_text, summary)
+        return summary
+
+    async def _asummarize_condensed(self, clean_text: str) -> str:
+        clean_text = self.compress(clean_text)
+        if estimate_tokens(clean_text) <= self.chunk_tokens:
+            return await self.asummarize_chunk(clean_text)
+
+        chunks = self.split_text(clean_text)
+        summaries = await self.asummarize_chunks(chunks)
+
+        for depth in range(self.MAX_REDUCE_DEPTH):
+            groups = self._pack(summaries)
+            if len(groups) == 1 or depth == self.MAX_REDUCE_DEPTH - 1:
+                break
+            logging.info(f"Reducing {len(summaries)} summaries in {len(groups)} groups")
+            summaries = await self.asummarize_chunks(groups)
+        return await self.asummarize_chunk("\n\n".join(summaries))
+
+    def plan(self, clean_text: str, url: str = None) -> dict:
+        """Estimate the LLM calls and tokens summarize_text would use, without calling the model"""
+        version = self.changes.get(url, self.model_name, SUMMARY_PROMPT_VERSION) if self.changes and url else None
+        if version is not None:
+            change = version.diff(clean_text)
+            if not self.changes.is_material(change):
+                return {"llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+            update = self._update_input(version, change)
+            if update is not None:
+                return {"llm_calls": 1, "prompt_tokens": estimate_tokens(UPDATE_TEMPLATE.format(**update)),
+                        "completion_tokens": SUMMARY_TOKENS_ESTIMATE}
+
+        clean_text = self.compress(clean_text)
+        text_tokens = estimate_tokens(clean_text)
+        prompt_tokens = estimate_tokens(SUMMARY_TEMPLATE)
+        if text_tokens <= self.chunk_tokens:
+            if self._cached_summary(clean_text) is not None:
+                return {"llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+            return {"llm_calls": 1, "prompt_tokens": prompt_tokens + text_tokens,
+                    "completion_tokens": SUMMARY_TOKENS_ESTIMATE}
+
+        # Map over chunks, then reduce the summaries until one call can take them all
+        calls = math.ceil(text_tokens / self.chunk_tokens)
+        input_tokens = text_tokens + calls * prompt_tokens
+        summary_tokens = calls * SUMMARY_TOKENS_ESTIMATE
+        for depth in range(self.MAX_REDUCE_DEPTH):
+            groups = math.ceil(summary_tokens / self.chunk_tokens)
+            if groups == 1 or depth == self.MAX_REDUCE_DEPTH - 1:
+                break
+            calls += groups
+            input_tokens += summary_tokens + groups * prompt_tokens
+            summary_tokens = groups * SUMMARY_TOKENS_ESTIMATE
+        calls += 1
+        input_tokens += summary_tokens + prompt_tokens
+        return {"llm_calls": calls, "prompt_tokens": input_tokens,
+                "completion_tokens": calls * SUMMARY_TOKENS_ESTIMATE}
+
+    def compress(self, clean_text: str) -> str:
+        """Apply the extractive pre-pass, if configured"""
+        if not self.compressor:
+            return clean_text
+        with span("compress", bytes=len(clean_text)):
+            compressed = self.compressor.compress(clean_text)
+        if len(compressed) < len(clean_text):
+            logging.info(f"Compressed text from {len(clean_text)} to {len(compressed)} characters")
+        return compressed
+
+    def split_text(self, clean_text: str) -> list[str]:
+        # Chunks are cached too, so fully cached runs never load the text splitter
+        key = content_hash(clean_text, self.chunk_tokens)
+        cached = self.cache.get("split", key) if self.cache else None
+        with span("split_text") as split_span:
+            if cached is not None:
+                chunks = json.loads(cached)
+            else:
+                chunks = self.text_splitter.split_text(clean_text)
+                if self.cache:
+                    self.cache.set("split", key, json.dumps(chunks))
+            split_span.add("chunks", len(chunks))
+        logging.info(f"Summarizing {len(chunks)} chunks of up to {self.chunk_tokens} tokens")
+        return chunks
+
+    def _pack(self, summaries: list[str]) -> list[str]:
+        """Greedily join consecutive summaries into groups that each fit the token budget"""
+        groups, current, current_tokens = [], [], 0
+        for summary in summaries:
+            tokens = estimate_tokens(summary) + 1
+            if current and current_tokens + tokens > self.chunk_tokens:
+                groups.append("\n\n".join(current))
+                current, current_tokens = [], 0
+            current.append(summary)
+            current_tokens += tokens
+        if current:
+            groups.append("\n\n".join(current))
+        return groups
+
+    async def asummarize_chunk(self, text: str) -> str:
+        """Async variant of summarize_chunk"""
+        cached = self._cached_summary(text)
+        if cached is not None:
+            return cached
         try:
-            return self.summary_chain.invoke(text)
+            with span("summarize_chunk", chunks=1):
+                summary = await self.summary_chain.ainvoke(text)
         except Exception as e:
             logging.error(f"Summarization error: {str(e)}")
-            return "Summary generation failed" 
+            return SUMMARY_FAILED
+        self._store_summary(text, summary)
+        return summary
+
+    async def asummarize_chunks(self, chunks: list[str]) -> list[str]:
+        """Async map step over chunks, bounded by max_concurrency"""
+        summaries = [self._cached_summary(chunk) for chunk in chunks]
+        missing = [i for i, summary in enumerate(summaries) if summary is None]
+        if missing:
+            with span("summarize_chunk", chunks=len(missing)):
+                results = await self.summary_chain.abatch(
+                    [chunks[i] for i in missing],
+                    config={"max_concurrency": self.max_concurrency},
+                    return_exceptions=True
+                )
+            for i, result in zip(missing, results):
+                summaries[i] = self._chunk_result(chunks[i], result)
+        return summaries
+
+    def _chunk_result(self, text: str, result) -> str:
+        if isinstance(result, Exception):
+            logging.error(f"Summarization error: {str(result)}")
+            return SUMMARY_FAILED
+        self._store_summary(text, result)
+        return result
+
+    def _summary_key(self, text: str) -> str:
+        return content_hash(text, self.model_name, SUMMARY_PROMPT_VERSION)
+
+    def _cached_summary(self, text: str):
+        if not self.cache:
+            return None
+        return self.cache.get("summary", self._summary_key(text))
+
+    def _store_summary(self, text: str, summary: str):
+        if self.cache:
+            self.cache.set("summary", self._summary_key(text), summary)
         
     def preprocess_text(self, text: str) -> str:
         """Clean text before processing"""
-        # Remove common boilerplate
-        patterns = [
-            r"Sign up for.*newsletters",
-            r"Subscribe to.*channel",
-            r"Follow us on.*",
-            r"Download our.*app",
-            r"Read more:.*",
-            r"Continue reading.*",
-            r"Advertisement",
-            r"Recommended for you",
-            r"Related:.*",
-            r"Please enter your email",
-            r"Already have an account\? Log in",
-            r"Create a free account",
-            r"© Copyright.*"
-        ]
-        
-        
-        for pattern in patterns:
-            text = re.sub(pattern, "", text, flags=re.IGNORECASE)
-        
-        return text.strip()
+        with span("preprocess_text", bytes=len(text)):
+            return text_cleaning.clean_text(text)
         
     def clean_snippet(self, snippet: str) -> str:
         """Clean NewsAPI snippets"""
-        # Remove truncation markers
-        snippet = re.sub(r'\[\+[0-9,]+\s*chars?\]', '', snippet)
-        # Remove HTML tags
-        snippet = re.sub(r'<[^>]+>', '', snippet)
-        return snippet
+        return text_cleaning.clean_text(snippet or "")